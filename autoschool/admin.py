@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from .search import filter_matching
 from .models import (
     CustomUser, DriverGroup, StudentGroup, Lecture,
-    LectureImage, Test, Question, Answer, TestResult
+    LectureImage, Test, Question, Answer, TestResult, TestAttempt,
+    LeaderboardEntry, TestVersion
 )
 
 @admin.register(CustomUser)
@@ -33,6 +35,12 @@ class LectureAdmin(admin.ModelAdmin):
     list_filter = ('author', 'groups')
     search_fields = ('title', 'content')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск через полнотекстовый индекс вместо LIKE '%...%'
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, 'lecture', search_term), False
+
 @admin.register(LectureImage)
 class LectureImageAdmin(admin.ModelAdmin):
     list_display = ('lecture', 'caption')
@@ -46,18 +54,54 @@ class TestAdmin(admin.ModelAdmin):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ('test', 'text')
+    list_display = ('test', 'text', 'topic')
     list_filter = ('test',)
     search_fields = ('text',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, 'question', search_term), False
+
 @admin.register(Answer)
 class AnswerAdmin(admin.ModelAdmin):
     list_display = ('question', 'text', 'is_correct')
     list_filter = ('question', 'is_correct')
     search_fields = ('text',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, 'answer', search_term), False
+
 @admin.register(TestResult)
 class TestResultAdmin(admin.ModelAdmin):
     list_display = ('test', 'student', 'score', 'max_score', 'date_taken')
     list_filter = ('test', 'student')
-    search_fields = ('test__title', 'student__username')
\ No newline at end of file
+    search_fields = ('test__title', 'student__username')
+
+@admin.register(TestVersion)
+class TestVersionAdmin(admin.ModelAdmin):
+    list_display = ('test', 'number', 'published_by', 'created_at')
+    list_filter = ('test',)
+    search_fields = ('test__title',)
+    # Версии — неизменяемые снимки: создаются публикацией и только просматриваются
+    readonly_fields = ('test', 'number', 'questions', 'answer_key', 'published_by', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(TestAttempt)
+class TestAttemptAdmin(admin.ModelAdmin):
+    list_display = ('test', 'student', 'created_at', 'submitted_at')
+    list_filter = ('test',)
+    search_fields = ('test__title', 'student__username')
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('group', 'student', 'rating', 'tests_taken', 'best_score_sum')
+    list_filter = ('group',)
+    search_fields = ('student__username',)
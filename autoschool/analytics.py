@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import GroupTestStats, StudentGroup, StudentTestStats, TestResult, TestStats
+
+BATCH_SIZE = 1000
+
+
+def pass_ratio():
+    return getattr(settings, 'AUTOSCHOOL_PASS_RATIO', 0.8)
+
+
+class Rollup:
+    __slots__ = ('attempts', 'passed', 'score_sum', 'score_sq_sum',
+                 'max_score_sum', 'best_score', 'last_score')
+
+    def __init__(self):
+        self.attempts = 0
+        self.passed = 0
+        self.score_sum = 0
+        self.score_sq_sum = 0
+        self.max_score_sum = 0
+        self.best_score = 0
+        self.last_score = None
+
+    def add(self, score, max_score, ratio):
+        self.attempts += 1
+        self.passed += int(max_score > 0 and score >= max_score * ratio)
+        self.score_sum += score
+        self.score_sq_sum += score * score
+        self.max_score_sum += max_score
+        self.best_score = max(self.best_score, score)
+        self.last_score = score
+
+    def as_fields(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _group_map(pairs=None):
+    """{(student_id, test_id): [group_id, ...]} для групп, где курсанту назначен тест.
+
+    Без pairs строится по всем группам (для полного пересчёта).
+    """
+    rows = StudentGroup.objects.filter(group__tests__isnull=False)
+    if pairs is not None:
+        rows = rows.filter(
+            student_id__in={student_id for student_id, _ in pairs},
+            group__tests__in={test_id for _, test_id in pairs}
+        )
+    group_map = {}
+    for student_id, test_id, group_id in rows.values_list('student_id', 'group__tests', 'group_id'):
+        if pairs is None or (student_id, test_id) in pairs:
+            group_map.setdefault((student_id, test_id), []).append(group_id)
+    return group_map
+
+
+def _accumulate(rows, group_map):
+    """rows: (test_id, student_id, score, max_score) в порядке сдачи."""
+    ratio = pass_ratio()
+    by_test, by_group, by_student = {}, {}, {}
+    for test_id, student_id, score, max_score in rows:
+        by_test.setdefault(test_id, Rollup()).add(score, max_score, ratio)
+        by_student.setdefault((student_id, test_id), Rollup()).add(score, max_score, ratio)
+        for group_id in group_map.get((student_id, test_id), ()):
+            by_group.setdefault((group_id, test_id), Rollup()).add(score, max_score, ratio)
+    return by_test, by_group, by_student
+
+
+def _apply(model, lookups, rollup):
+    model.objects.filter(**lookups).update(
+        attempts=F('attempts') + rollup.attempts,
+        passed=F('passed') + rollup.passed,
+        score_sum=F('score_sum') + rollup.score_sum,
+        score_sq_sum=F('score_sq_sum') + rollup.score_sq_sum,
+        max_score_sum=F('max_score_sum') + rollup.max_score_sum,
+        best_score=Greatest(F('best_score'), rollup.best_score),
+        last_score=rollup.last_score,
+    )
+
+
+def record_results(results):
+    """Добавляет только что сохранённые результаты к сводным таблицам."""
+    if not results:
+        return
+    rows = [(r.test_id, r.student_id, r.score, r.max_score) for r in results]
+    group_map = _group_map({(student_id, test_id) for test_id, student_id, _, _ in rows})
+    by_test, by_group, by_student = _accumulate(rows, group_map)
+
+    with transaction.atomic():
+        # Сначала гарантируем наличие строк, затем увеличиваем счётчики на месте
+        TestStats.objects.bulk_create(
+            [TestStats(test_id=test_id) for test_id in by_test], ignore_conflicts=True)
+        GroupTestStats.objects.bulk_create(
+            [GroupTestStats(group_id=g, test_id=t) for g, t in by_group], ignore_conflicts=True)
+        StudentTestStats.objects.bulk_create(
+            [StudentTestStats(student_id=s, test_id=t) for s, t in by_student], ignore_conflicts=True)
+
+        for test_id, rollup in by_test.items():
+            _apply(TestStats, {'test_id': test_id}, rollup)
+        for (group_id, test_id), rollup in by_group.items():
+            _apply(GroupTestStats, {'group_id': group_id, 'test_id': test_id}, rollup)
+        for (student_id, test_id), rollup in by_student.items():
+            _apply(StudentTestStats, {'student_id': student_id, 'test_id': test_id}, rollup)
+
+
+def rebuild():
+    """Пересчитывает сводные таблицы с нуля по всем TestResult."""
+    group_map = _group_map()
+    rows = TestResult.objects.order_by('date_taken', 'id').values_list(
+        'test_id', 'student_id', 'score', 'max_score'
+    ).iterator(chunk_size=BATCH_SIZE)
+    by_test, by_group, by_student = _accumulate(rows, group_map)
+
+    with transaction.atomic():
+        for model in (TestStats, GroupTestStats, StudentTestStats):
+            model.objects.all().delete()
+        TestStats.objects.bulk_create(
+            [TestStats(test_id=test_id, **rollup.as_fields()) for test_id, rollup in by_test.items()],
+            batch_size=BATCH_SIZE)
+        GroupTestStats.objects.bulk_create(
+            [GroupTestStats(group_id=g, test_id=t, **rollup.as_fields())
+             for (g, t), rollup in by_group.items()],
+            batch_size=BATCH_SIZE)
+        StudentTestStats.objects.bulk_create(
+            [StudentTestStats(student_id=s, test_id=t, **rollup.as_fields())
+             for (s, t), rollup in by_student.items()],
+            batch_size=BATCH_SIZE)
+    return len(by_test), len(by_group), len(by_student)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AutoschoolConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'autoschool'
+
+    def ready(self):
+        from . import checks, database, signals  # noqa: F401
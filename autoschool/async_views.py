@@ -0,0 +1,133 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import aauthenticate
+from .conditional import (
+    aget_versions, auser_versions, collection_key, make_etag, not_modified, set_validators
+)
+from .fieldsets import sparse_queryset
+from .models import Lecture, Test, TestResult
+from .pagination import KeysetPagination, TestResultPagination
+from .payloads import aget_student_payload
+from .serializers import LectureSerializer, StudentTestSerializer, TestResultSerializer
+from .visibility import visible_ids
+
+# Асинхронные представления для чтения курсантом (ASGI). Повторяют ответы
+# LectureViewSet, TestViewSet и TestResultViewSet, но не занимают поток на
+# время медленного клиента: запросы к базе и кэшу выполняются через async API.
+
+
+def student_view(view):
+    """Аутентифицирует запрос и пускает только курсантов."""
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=401)
+        if user.user_type != 'student':
+            return JsonResponse({'error': 'Доступно только курсантам'}, status=403)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _render(data):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json')
+
+
+async def _visible(request, model):
+    # get_for_model может обратиться к базе, поэтому подзапрос строится в потоке
+    ids = await sync_to_async(visible_ids)(request.user, model)
+    return model.objects.filter(id__in=ids)
+
+
+async def _page(request, queryset, pagination_class, serializer_class, always=()):
+    # Та же курсорная пагинация и тот же формат курсора, что у синхронного API
+    drf_request = Request(request)
+    paginator = pagination_class()
+    context = {'request': drf_request}
+    queryset = sparse_queryset(queryset, serializer_class(many=True, context=context),
+                               always=[*always, *(name.lstrip('-') for name in paginator.ordering)])
+    page = await sync_to_async(paginator.paginate_queryset)(queryset, drf_request)
+    # Вопросы опубликованной версии при промахе кэша читаются из базы — сериализуем в потоке
+    data = await sync_to_async(lambda: serializer_class(page, many=True, context=context).data)()
+    return _render({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': data,
+    })
+
+
+async def _conditional_list(request, model, render):
+    collection = await aget_versions([collection_key(model)])
+    versions = (*collection, *await auser_versions(request.user.pk, 'visibility'))
+    etag = make_etag(request, model._meta.model_name, *versions)
+    last_modified = max(versions) / 1e9
+    if not_modified(request, etag, last_modified):
+        return set_validators(HttpResponseNotModified(), etag, last_modified)
+    return set_validators(await render(), etag, last_modified)
+
+
+async def _conditional_detail(request, instance, render):
+    updated_at = instance.updated_at.timestamp()
+    etag = make_etag(request, instance._meta.model_name, instance.pk, updated_at)
+    if not_modified(request, etag, updated_at):
+        return set_validators(HttpResponseNotModified(), etag, updated_at)
+    return set_validators(await render(), etag, updated_at)
+
+
+def _not_found():
+    return JsonResponse({'detail': 'Не найдено.'}, status=404)
+
+
+@student_view
+async def test_list(request):
+    queryset = await _visible(request, Test)
+    return await _conditional_list(request, Test, lambda: _page(
+        request, queryset, KeysetPagination, StudentTestSerializer, always=('published_version',)
+    ))
+
+
+@student_view
+async def test_detail(request, pk):
+    test = await (await _visible(request, Test)).filter(pk=pk).afirst()
+    if test is None:
+        return _not_found()
+
+    async def render():
+        payload = await aget_student_payload(test)
+        return HttpResponse(payload, content_type='application/json')
+    return await _conditional_detail(request, test, render)
+
+
+@student_view
+async def lecture_list(request):
+    queryset = await _visible(request, Lecture)
+    return await _conditional_list(
+        request, Lecture, lambda: _page(request, queryset, KeysetPagination, LectureSerializer)
+    )
+
+
+@student_view
+async def lecture_detail(request, pk):
+    lecture = await (await _visible(request, Lecture)).prefetch_related(
+        'groups', 'images'
+    ).filter(pk=pk).afirst()
+    if lecture is None:
+        return _not_found()
+
+    async def render():
+        return _render(LectureSerializer(lecture, context={'request': Request(request)}).data)
+    return await _conditional_detail(request, lecture, render)
+
+
+@student_view
+async def result_list(request):
+    queryset = TestResult.objects.filter(student=request.user)
+    return await _page(request, queryset, TestResultPagination, TestResultSerializer)
@@ -0,0 +1,257 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .conditional import bump_user_versions
+from .models import CustomUser, StudentGroup
+
+USER_FIELDS = ('id', 'username', 'user_type', 'is_active', 'is_staff', 'is_superuser')
+TOKEN_CACHE_KEY = 'autoschool:auth:token:{key}'
+# Строки UserVersion может ещё не быть — тогда поколение 0
+GENERATION_FIELD = 'user__versions__tokens'
+
+
+class TokenCache:
+    """Кэш токен -> компактная запись пользователя.
+
+    Первый уровень — LRU в памяти процесса с TTL, второй (необязательный) —
+    общий кэш Django. Запись хранит «поколение» пользователя из
+    UserVersion.tokens; сброс сдвигает его одним запросом к базе. Попадание
+    в LRU сверяет поколение с базой не чаще раза в check_interval секунд,
+    а в остальное время не стоит ни одного запроса. Поэтому отзыв токена
+    в своём процессе действует сразу, в остальных — не позже чем через
+    check_interval.
+    """
+
+    def __init__(self, maxsize, ttl, check_interval=5, shared_alias=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.shared_alias = shared_alias
+        self._local = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def get(self, key):
+        entry = self._local_entry(key)
+        if entry is not None:
+            checked_until, record = entry
+            if checked_until > time.monotonic():
+                return record
+            if current_generation(key) == record['generation']:
+                self._mark_checked(key)
+                return record
+            with self._lock:
+                self._drop_local(key)
+        shared = self.shared
+        if shared is None:
+            return None
+        token_key = TOKEN_CACHE_KEY.format(key=key)
+        record = shared.get(token_key)
+        if record is None:
+            return None
+        if current_generation(key) != record['generation']:
+            shared.delete(token_key)
+            return None
+        self._set_local(key, record)
+        return record
+
+    async def aget(self, key):
+        entry = self._local_entry(key)
+        if entry is not None:
+            checked_until, record = entry
+            if checked_until > time.monotonic():
+                return record
+            if await acurrent_generation(key) == record['generation']:
+                self._mark_checked(key)
+                return record
+            with self._lock:
+                self._drop_local(key)
+        shared = self.shared
+        if shared is None:
+            return None
+        token_key = TOKEN_CACHE_KEY.format(key=key)
+        record = await shared.aget(token_key)
+        if record is None:
+            return None
+        if await acurrent_generation(key) != record['generation']:
+            await shared.adelete(token_key)
+            return None
+        self._set_local(key, record)
+        return record
+
+    def set(self, key, record):
+        shared = self.shared
+        if shared is not None:
+            shared.set(TOKEN_CACHE_KEY.format(key=key), record, self.ttl)
+        self._set_local(key, record)
+
+    async def aset(self, key, record):
+        shared = self.shared
+        if shared is not None:
+            await shared.aset(TOKEN_CACHE_KEY.format(key=key), record, self.ttl)
+        self._set_local(key, record)
+
+    def invalidate_token(self, key):
+        with self._lock:
+            self._drop_local(key)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(TOKEN_CACHE_KEY.format(key=key))
+
+    def invalidate_users(self, user_ids):
+        user_ids = list(user_ids)
+        with self._lock:
+            for user_id in user_ids:
+                for key in list(self._by_user.get(user_id, ())):
+                    self._drop_local(key)
+        bump_user_versions('tokens', user_ids)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            self._by_user.clear()
+
+    def _local_entry(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._local.move_to_end(key)
+                return entry[1:]
+            self._drop_local(key)
+            return None
+
+    def _mark_checked(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local[key] = (entry[0], time.monotonic() + self.check_interval, entry[2])
+
+    def _set_local(self, key, record):
+        now = time.monotonic()
+        with self._lock:
+            self._drop_local(key)
+            self._local[key] = (now + self.ttl, now + self.check_interval, record)
+            self._by_user.setdefault(record['id'], set()).add(key)
+            while len(self._local) > self.maxsize:
+                self._drop_local(next(iter(self._local)))
+
+    def _drop_local(self, key):
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            user_id = entry[2]['id']
+            keys = self._by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[user_id]
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'AUTOSCHOOL_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTOSCHOOL_TOKEN_CACHE_TTL', 60),
+    check_interval=getattr(settings, 'AUTOSCHOOL_TOKEN_CACHE_CHECK_INTERVAL', 5),
+    shared_alias=getattr(settings, 'AUTOSCHOOL_TOKEN_SHARED_CACHE', None),
+)
+
+
+def current_generation(key):
+    """Поколение владельца токена; None — токена больше нет."""
+    row = Token.objects.filter(key=key).values_list('user_id', GENERATION_FIELD).first()
+    return None if row is None else row[1] or 0
+
+
+async def acurrent_generation(key):
+    row = await Token.objects.filter(key=key).values_list('user_id', GENERATION_FIELD).afirst()
+    return None if row is None else row[1] or 0
+
+
+def _record(row):
+    record = dict(zip(USER_FIELDS, row))
+    record['generation'] = row[-1] or 0
+    return record
+
+
+def load_record(key):
+    row = Token.objects.filter(key=key).values_list(
+        *(f'user__{field}' for field in USER_FIELDS), GENERATION_FIELD
+    ).first()
+    if row is None:
+        return None
+    record = _record(row)
+    record['group_ids'] = tuple(
+        StudentGroup.objects.filter(student_id=record['id']).values_list('group_id', flat=True)
+    )
+    return record
+
+
+async def aload_record(key):
+    row = await Token.objects.filter(key=key).values_list(
+        *(f'user__{field}' for field in USER_FIELDS), GENERATION_FIELD
+    ).afirst()
+    if row is None:
+        return None
+    record = _record(row)
+    record['group_ids'] = tuple([
+        group_id async for group_id in
+        StudentGroup.objects.filter(student_id=record['id']).values_list('group_id', flat=True)
+    ])
+    return record
+
+
+def build_user(record):
+    # Остальные поля отложены и догрузятся из базы только при обращении к ним;
+    # from_db ждёт значения в порядке полей модели
+    field_names = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in record]
+    user = CustomUser.from_db('default', field_names, [record[name] for name in field_names])
+    user.group_ids = record['group_ids']
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, которая не ходит в базу, пока запись токена в кэше."""
+
+    def authenticate_credentials(self, key):
+        record = token_cache.get(key)
+        if record is None:
+            record = load_record(key)
+            if record is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token_cache.set(key, record)
+
+        if not record['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        user = build_user(record)
+        return user, Token(key=key, user_id=user.pk)
+
+
+async def aauthenticate(request):
+    """Пользователь асинхронного запроса по токену или сессии; None — не аутентифицирован."""
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if auth and auth[0].lower() == CachedTokenAuthentication.keyword.lower():
+        if len(auth) != 2:
+            return None
+        record = await token_cache.aget(auth[1])
+        if record is None:
+            record = await aload_record(auth[1])
+            if record is None:
+                return None
+            await token_cache.aset(auth[1], record)
+        return build_user(record) if record['is_active'] else None
+    user = await request.auser()
+    return user if user.is_authenticated else None
@@ -0,0 +1,175 @@
+import asyncio
+import io
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, p):
+    """Перцентиль по методу ближайшего ранга; values должны быть отсортированы."""
+    if not values:
+        return None
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Сводка прогона: пропускная способность и задержки в миллисекундах."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        **{
+            f'p{p}_ms': round(percentile(latencies, p) * 1000, 2) if latencies else None
+            for p in (50, 95, 99)
+        },
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def measure(client, method, path, iterations, warmup=3, data=None):
+    """Последовательно вызывает эндпоинт тестовым клиентом Django.
+
+    Возвращает сводку задержек и число SQL-запросов на запрос (медиана и
+    максимум), ответы с кодом не 2xx/304 считаются ошибками.
+    """
+    call = getattr(client, method.lower())
+    kwargs = {'data': data, 'content_type': 'application/json'} if data is not None else {}
+
+    def request():
+        response = call(path, **kwargs)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code < 300 or response.status_code == 304
+
+    for _ in range(warmup):
+        request()
+    latencies, query_counts, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            ok = request()
+            latencies.append(time.perf_counter() - start)
+        query_counts.append(len(queries))
+        errors += not ok
+    summary = summarize(latencies, time.perf_counter() - started, errors)
+    query_counts.sort()
+    summary['queries_median'] = percentile(query_counts, 50)
+    summary['queries_max'] = query_counts[-1] if query_counts else None
+    return summary
+
+
+def _split(total, clients):
+    return [total // clients + (1 if i < total % clients else 0) for i in range(clients)]
+
+
+def run_wsgi(app, path, headers, requests, concurrency, workers, client_delay=0.0):
+    """concurrency клиентов против пула из workers потоков WSGI-сервера.
+
+    client_delay — сколько «медленный» клиент читает тело ответа; всё это
+    время поток сервера занят, как у синхронного воркера.
+    """
+    path, _, query = path.partition('?')
+    environ_headers = {'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()}
+
+    def handle():
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+            'wsgi.multiprocess': False, 'wsgi.run_once': False, **environ_headers,
+        }
+        status = []
+        response = app(environ, lambda code, response_headers, exc_info=None: status.append(code))
+        try:
+            for _ in response:
+                pass
+            if client_delay:
+                time.sleep(client_delay)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return status[0].startswith('200')
+
+    latencies, errors = [], 0
+    with ThreadPoolExecutor(max_workers=workers) as server:
+        def client(count):
+            nonlocal errors
+            for _ in range(count):
+                start = time.perf_counter()
+                ok = server.submit(handle).result()
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            list(clients.map(client, _split(requests, concurrency)))
+        elapsed = time.perf_counter() - started
+        # Соединения с базой открываются в потоках пула — закрываем их там же
+        list(server.map(lambda _: connections.close_all(), range(workers)))
+    return summarize(latencies, elapsed, errors)
+
+
+def run_asgi(app, path, headers, requests, concurrency, client_delay=0.0):
+    """concurrency клиентов против одного цикла событий ASGI."""
+    path, _, query = path.partition('?')
+    scope_headers = [(b'host', b'localhost')] + [
+        (name.lower().encode(), value.encode()) for name, value in headers.items()
+    ]
+
+    async def handle():
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '', 'headers': scope_headers,
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        finished = asyncio.Event()
+        request_sent = False
+        status = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                if client_delay:
+                    await asyncio.sleep(client_delay)
+                finished.set()
+
+        await app(scope, receive, send)
+        return status[0] == 200
+
+    async def main():
+        latencies, errors = [], 0
+
+        async def client(count):
+            nonlocal errors
+            for _ in range(count):
+                start = time.perf_counter()
+                ok = await handle()
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(count) for count in _split(requests, concurrency)))
+        return summarize(latencies, time.perf_counter() - started, errors)
+
+    return asyncio.run(main())
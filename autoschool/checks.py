@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Кэши, содержимое которых не видно другим процессам
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Версии для ETag, рейтингов и кэша токенов должны быть общими для всех воркеров."""
+    aliases = {'default', getattr(settings, 'AUTOSCHOOL_TOKEN_SHARED_CACHE', None) or 'default'}
+    return [
+        Warning(
+            f'Кэш {alias!r} хранится в памяти процесса',
+            hint='Версии и сбросы кэша не будут видны другим воркерам: настройте в CACHES '
+                 'DatabaseCache или Redis',
+            id='autoschool.W001',
+        )
+        for alias in sorted(aliases)
+        if settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+    ]
@@ -0,0 +1,149 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import UserVersion
+
+COLLECTION_VERSION_KEY = 'autoschool:collection_version:{name}'
+
+
+def collection_key(model):
+    return COLLECTION_VERSION_KEY.format(name=model._meta.model_name)
+
+
+def _fill_missing(keys, versions):
+    # Счётчик пропал из кэша — начинаем с текущего времени, чтобы не совпасть со старым
+    now = time.time_ns()
+    return {key: now for key in keys if key not in versions}
+
+
+def get_versions(keys):
+    """Версии по ключам одним обращением к общему кэшу (у DatabaseCache — одним запросом).
+
+    Пропавшие ключи записываются одним set_many. Если два воркера засеют ключ
+    одновременно, победит один из них — это лишь один лишний промах ETag.
+    """
+    versions = cache.get_many(keys)
+    missing = _fill_missing(keys, versions)
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+async def aget_versions(keys):
+    versions = await cache.aget_many(keys)
+    missing = _fill_missing(keys, versions)
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def collection_version(model):
+    return get_versions([collection_key(model)])[0]
+
+
+def user_versions(user_id, *fields):
+    """Версии курсанта из UserVersion; пока строки нет — нули."""
+    row = UserVersion.objects.filter(user_id=user_id).values_list(*fields).first()
+    return row or (0,) * len(fields)
+
+
+async def auser_versions(user_id, *fields):
+    row = await UserVersion.objects.filter(user_id=user_id).values_list(*fields).afirst()
+    return row or (0,) * len(fields)
+
+
+def bump_user_versions(field, user_ids):
+    """Сдвигает версию field у курсантов одним INSERT ... ON CONFLICT DO UPDATE."""
+    now = time.time_ns()
+    UserVersion.objects.bulk_create(
+        [UserVersion(user_id=user_id, **{field: now}) for user_id in set(user_ids)],
+        update_conflicts=True, unique_fields=['user'], update_fields=[field]
+    )
+
+
+def bump_collection(model):
+    """Любое изменение лекции/теста или их дочерних объектов меняет ETag списков."""
+    cache.set(collection_key(model), time.time_ns(), None)
+
+
+def bump_users(user_ids):
+    """Изменился набор видимых курсанту объектов (его группы)."""
+    bump_user_versions('visibility', user_ids)
+
+
+def bump_results(user_ids):
+    """У курсантов появились новые результаты тестов."""
+    bump_user_versions('results', user_ids)
+
+
+def make_etag(request, *parts):
+    # Представление зависит от роли, формата ответа и параметров запроса (курсор, page_size)
+    user = request.user
+    raw = ':'.join(str(part) for part in (
+        *parts, user.pk, user.user_type, request.META.get('HTTP_ACCEPT', ''), request.get_full_path()
+    ))
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+
+def not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(last_modified) <= since
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _conditional(request, etag, last_modified, render):
+    if not_modified(request, etag, last_modified):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = render()
+    return set_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list/retrieve; при совпадении — 304 без сериализации.
+
+    Валидатор объекта строится из его updated_at, валидатор списка — из
+    версии коллекции (в общем кэше Django) и версии курсанта (UserVersion),
+    которые сдвигаются сигналами.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        versions = (collection_version(model), *user_versions(request.user.pk, 'visibility'))
+        return _conditional(
+            request, make_etag(request, model._meta.model_name, *versions), max(versions) / 1e9,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        updated_at = instance.updated_at.timestamp()
+        return _conditional(
+            request, make_etag(request, instance._meta.model_name, instance.pk, updated_at), updated_at,
+            lambda: self.retrieve_response(instance)
+        )
+
+    def retrieve_response(self, instance):
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework.renderers import JSONRenderer
+
+from .conditional import collection_key, get_versions, user_versions
+from .models import DriverGroup, Lecture, StudentTestStats, Test, TestResult
+from .visibility import visible_ids
+
+DASHBOARD_CACHE_KEY = 'autoschool:dashboard:{student_id}:{versions}'
+
+
+def dashboard_versions(student_id):
+    """Версии всего, из чего собирается сводка: групп курсанта, содержимого и его результатов.
+
+    Версии групп и результатов курсанта хранятся в UserVersion, версии
+    содержимого — в общем кэше (CACHES) и читаются одним get_many, поэтому
+    сброс в одном воркере виден всем остальным.
+    """
+    return (*user_versions(student_id, 'visibility', 'results'), *get_versions([
+        collection_key(DriverGroup),
+        collection_key(Lecture),
+        collection_key(Test),
+    ]))
+
+
+def build_dashboard(student):
+    """Сводка главного экрана курсанта — четыре запроса при любом объёме данных.
+
+    Тест считается ожидающим, пока у курсанта нет ни одной сданной попытки
+    (по StudentTestStats.passed).
+    """
+    limit = getattr(settings, 'AUTOSCHOOL_DASHBOARD_ITEMS', 20)
+    groups = DriverGroup.objects.filter(students__student=student).order_by('name', 'id').values(
+        'id', 'name', 'description'
+    )
+    lectures = Lecture.objects.filter(
+        id__in=visible_ids(student, Lecture)
+    ).order_by('-created_at', '-id').values('id', 'title', 'created_at', 'updated_at')[:limit]
+    passed = StudentTestStats.objects.filter(student=student, passed__gt=0).values('test_id')
+    pending_tests = Test.objects.filter(
+        id__in=visible_ids(student, Test)
+    ).exclude(id__in=passed).order_by('-created_at', '-id').values(
+        'id', 'title', 'ticket_size', 'created_at', 'updated_at'
+    )[:limit]
+    results = TestResult.objects.filter(student=student).order_by('-date_taken', '-id').values(
+        'id', 'test', 'score', 'max_score', 'date_taken', test_title=F('test__title')
+    )[:limit]
+    return {
+        'groups': list(groups),
+        'lectures': list(lectures),
+        'pending_tests': list(pending_tests),
+        'latest_results': list(results),
+    }
+
+
+def get_dashboard(student, versions=None):
+    """JSON сводки курсанта из кэша; ключ меняется вместе с любой из версий."""
+    if versions is None:
+        versions = dashboard_versions(student.pk)
+    cache_key = DASHBOARD_CACHE_KEY.format(
+        student_id=student.pk, versions='.'.join(str(version) for version in versions)
+    )
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = JSONRenderer().render(build_dashboard(student))
+        cache.set(cache_key, payload, getattr(settings, 'AUTOSCHOOL_DASHBOARD_CACHE_TIMEOUT', 60 * 60))
+    return payload
@@ -0,0 +1,145 @@
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PIN_CACHE_KEY = 'autoschool:db_pin:{client}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# app_label служебной модели DatabaseCache
+CACHE_APP_LABEL = 'django_cache'
+
+# Алиас реплики для чтения в текущем запросе; None — читать с основной базы
+_read_alias = ContextVar('autoschool_read_alias', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'AUTOSCHOOL_DB_REPLICAS', ()))
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """PRAGMA для каждого нового подключения к SQLite.
+
+    journal_mode=WAL сохраняется в файле базы, остальные действуют только
+    в пределах подключения, поэтому выполняются каждый раз.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(getattr(settings, 'AUTOSCHOOL_SQLITE_PRAGMAS', {}))
+    if connection.alias in replica_aliases():
+        pragmas['query_only'] = 'ON'
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _client_key(request):
+    # Пользователь ещё не известен (DRF аутентифицирует в представлении), поэтому
+    # клиента узнаём по токену или сессионной cookie
+    credential = (request.META.get('HTTP_AUTHORIZATION')
+                  or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credential:
+        return None
+    return PIN_CACHE_KEY.format(client=hashlib.sha256(credential.encode()).hexdigest())
+
+
+def pin_to_primary(request):
+    """После записи клиент какое-то время читает с основной базы (read-your-writes)."""
+    key = _client_key(request)
+    if key is not None:
+        cache.set(key, True, getattr(settings, 'AUTOSCHOOL_DB_PIN_SECONDS', 5))
+
+
+async def apin_to_primary(request):
+    key = _client_key(request)
+    if key is not None:
+        await cache.aset(key, True, getattr(settings, 'AUTOSCHOOL_DB_PIN_SECONDS', 5))
+
+
+def is_pinned(request):
+    key = _client_key(request)
+    return key is not None and cache.get(key, False)
+
+
+async def ais_pinned(request):
+    key = _client_key(request)
+    return key is not None and await cache.aget(key, False)
+
+
+class ReplicaRouter:
+    """Чтение — с реплики, выбранной для запроса ReplicaRoutingMiddleware; запись — в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # Таблица кэша хранит версии и закрепления: читать её с отстающей реплики нельзя
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет безопасные запросы на реплики, а после записи закрепляет клиента за основной базой.
+
+    Поддерживает и синхронный, и асинхронный стек, чтобы под ASGI не
+    переключаться между потоками на каждом запросе.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replicas = replica_aliases()
+        if not replicas:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                pin_to_primary(request)
+            return response
+
+        alias = None if is_pinned(request) else random.choice(replicas)
+        token = _read_alias.set(alias)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+    async def __acall__(self, request):
+        replicas = replica_aliases()
+        if not replicas:
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            if response.status_code < 400:
+                await apin_to_primary(request)
+            return response
+
+        alias = None if await ais_pinned(request) else random.choice(replicas)
+        token = _read_alias.set(alias)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
@@ -0,0 +1,154 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, item_analysis, leaderboard, search, visibility
+from .models import (
+    Answer, AnswerAttempt, CustomUser, DriverGroup, Lecture, Question, StudentGroup,
+    Test, TestResult
+)
+
+BATCH_SIZE = 1000
+
+WORDS = (
+    'дорога перекрёсток светофор разметка знак пешеход обгон стоянка остановка скорость '
+    'полоса поворот разворот приоритет транспорт водитель тормоз дистанция обочина '
+    'автомагистраль тоннель мост переезд шлагбаум регулировщик жест сигнал аварийный '
+    'буксировка ремень шлем зеркало фара габарит туман гололёд видимость манёвр'
+).split()
+
+
+class DatasetError(ValueError):
+    pass
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(prefix='bench', instructors=5, groups_per_instructor=2, students_per_group=20,
+             lectures=20, tests=10, questions=20, answers=4, results_per_student=5,
+             password='benchmark', seed=0, history_days=180):
+    """Создаёт синтетический набор данных заданного масштаба и возвращает счётчики.
+
+    Всё пишется через bulk_create в одной транзакции; сигналы при этом не
+    срабатывают, поэтому индексы видимости, поиска и аналитика
+    пересчитываются в конце целиком.
+    """
+    if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+        raise DatasetError(f'Пользователи с префиксом {prefix}_ уже существуют')
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(password)
+
+    def users(kind, count):
+        return CustomUser.objects.bulk_create(
+            [CustomUser(username=f'{prefix}_{kind}{i}', user_type=kind, password=password,
+                        first_name=kind.capitalize(), last_name=str(i))
+             for i in range(count)],
+            batch_size=BATCH_SIZE)
+
+    with transaction.atomic():
+        teachers = users('instructor', instructors)
+        groups = DriverGroup.objects.bulk_create(
+            [DriverGroup(name=f'{prefix} группа {n}', instructor=teacher,
+                         created_at=now - timedelta(days=rng.randint(0, history_days)))
+             for n, teacher in enumerate(t for t in teachers for _ in range(groups_per_instructor))],
+            batch_size=BATCH_SIZE)
+        students = users('student', len(groups) * students_per_group)
+        StudentGroup.objects.bulk_create(
+            [StudentGroup(student=student, group=groups[i // students_per_group])
+             for i, student in enumerate(students)],
+            batch_size=BATCH_SIZE)
+
+        def assign_groups(objects, through, field):
+            links = []
+            for obj in objects:
+                for group in rng.sample(groups, min(len(groups), rng.randint(1, 3))):
+                    links.append(through(**{field: obj.pk, 'drivergroup_id': group.pk}))
+            through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+        lecture_objects = Lecture.objects.bulk_create(
+            [Lecture(title=_text(rng, 4), content=_text(rng, 300), author=rng.choice(teachers),
+                     created_at=now - timedelta(days=rng.randint(0, history_days)))
+             for _ in range(lectures)],
+            batch_size=BATCH_SIZE)
+        assign_groups(lecture_objects, Lecture.groups.through, 'lecture_id')
+
+        test_objects = Test.objects.bulk_create(
+            [Test(title=_text(rng, 3), description=_text(rng, 20), author=rng.choice(teachers),
+                  created_at=now - timedelta(days=rng.randint(0, history_days)))
+             for _ in range(tests)],
+            batch_size=BATCH_SIZE)
+        assign_groups(test_objects, Test.groups.through, 'test_id')
+
+        question_objects = Question.objects.bulk_create(
+            [Question(test=test, text=_text(rng, 15) + '?')
+             for test in test_objects for _ in range(questions)],
+            batch_size=BATCH_SIZE)
+        answer_rows = []
+        for question in question_objects:
+            correct = rng.randrange(answers)
+            answer_rows.extend(Answer(question=question, text=_text(rng, 5), is_correct=i == correct)
+                               for i in range(answers))
+        answer_objects = Answer.objects.bulk_create(answer_rows, batch_size=BATCH_SIZE)
+
+        # Ключ ответов и варианты строим в памяти, без grading.get_answer_key на каждый тест
+        options = {}
+        for answer in answer_objects:
+            options.setdefault(answer.question_id, []).append(answer)
+        test_questions = {}
+        for question in question_objects:
+            test_questions.setdefault(question.test_id, []).append(question.pk)
+        visible_tests = {}
+        for link in Test.groups.through.objects.filter(test__in=test_objects):
+            visible_tests.setdefault(link.drivergroup_id, []).append(link.test_id)
+
+        results, responses = [], []
+        for i, student in enumerate(students):
+            available = visible_tests.get(groups[i // students_per_group].pk)
+            if not available:
+                continue
+            skill = rng.uniform(0.4, 0.95)
+            for _ in range(results_per_student):
+                test_id = rng.choice(available)
+                graded = []
+                for question_id in test_questions[test_id]:
+                    if rng.random() < skill:
+                        answer = next(a for a in options[question_id] if a.is_correct)
+                    else:
+                        answer = rng.choice(options[question_id])
+                    graded.append((question_id, answer.pk, answer.is_correct))
+                results.append(TestResult(
+                    test_id=test_id, student=student,
+                    score=sum(is_correct for *_, is_correct in graded), max_score=len(graded),
+                    date_taken=now - timedelta(seconds=rng.randint(0, history_days * 86400))
+                ))
+                responses.append(graded)
+        results = TestResult.objects.bulk_create(results, batch_size=BATCH_SIZE)
+        AnswerAttempt.objects.bulk_create(
+            (AnswerAttempt(result_id=result.pk, question_id=question_id,
+                           answer_id=answer_id, is_correct=is_correct)
+             for result, graded in zip(results, responses)
+             for question_id, answer_id, is_correct in graded),
+            batch_size=BATCH_SIZE)
+
+        visibility.rebuild()
+        analytics.rebuild()
+        item_analysis.rebuild()
+        leaderboard.rebuild()
+        search.rebuild()
+
+    return {
+        'instructors': len(teachers),
+        'groups': len(groups),
+        'students': len(students),
+        'lectures': len(lecture_objects),
+        'tests': len(test_objects),
+        'questions': len(question_objects),
+        'answers': len(answer_objects),
+        'results': len(results),
+    }
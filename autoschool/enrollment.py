@@ -0,0 +1,90 @@
+import csv
+import io
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import leaderboard, visibility
+from .authentication import token_cache
+from .models import CustomUser, StudentGroup
+
+
+class EnrollmentError(ValueError):
+    pass
+
+
+def parse_student_refs(data, files):
+    """Собирает id курсантов из student_ids и логины из загруженного CSV (поле file)."""
+    if hasattr(data, 'getlist'):
+        values = data.getlist('student_ids')
+    else:
+        values = data.get('student_ids') or []
+    if not isinstance(values, list):
+        raise EnrollmentError('student_ids должен быть списком')
+
+    student_ids = set()
+    for value in values:
+        try:
+            student_ids.add(int(value))
+        except (TypeError, ValueError):
+            raise EnrollmentError(f'Некорректный ID курсанта: {value}')
+
+    usernames = set()
+    upload = files.get('file')
+    if upload is not None:
+        try:
+            text = io.TextIOWrapper(upload, encoding='utf-8-sig')
+            for row in csv.reader(text):
+                if row and row[0].strip() and row[0].strip().lower() != 'username':
+                    usernames.add(row[0].strip())
+        except UnicodeDecodeError:
+            raise EnrollmentError('CSV-файл должен быть в кодировке UTF-8')
+
+    if not student_ids and not usernames:
+        raise EnrollmentError('Нужно указать student_ids или загрузить CSV с логинами')
+    return student_ids, usernames
+
+
+def resolve_students(student_ids, usernames):
+    """Один IN-запрос: возвращает (найденные id курсантов, ненайденные id и логины)."""
+    found = dict(
+        CustomUser.objects.filter(
+            Q(id__in=student_ids) | Q(username__in=usernames),
+            user_type='student'
+        ).values_list('id', 'username')
+    )
+    found_usernames = set(found.values())
+    missing = sorted(student_ids - found.keys()) + sorted(usernames - found_usernames)
+    return set(found), missing
+
+
+def enroll(group, student_ids):
+    """Добавляет курсантов в группу; возвращает (добавленные, уже состоявшие)."""
+    with transaction.atomic():
+        existing = set(
+            StudentGroup.objects.filter(group=group, student_id__in=student_ids)
+            .values_list('student_id', flat=True)
+        )
+        added = sorted(student_ids - existing)
+        StudentGroup.objects.bulk_create(
+            [StudentGroup(group=group, student_id=student_id) for student_id in added],
+            ignore_conflicts=True
+        )
+        # bulk_create не вызывает сигналы, индекс видимости и кэш токенов обновляем сами
+        visibility.refresh_students(added)
+        leaderboard.refresh_members(group.pk, added)
+    token_cache.invalidate_users(added)
+    return added, sorted(existing)
+
+
+def unenroll(group, student_ids):
+    """Убирает курсантов из группы; возвращает (удалённые, не состоявшие в группе)."""
+    with transaction.atomic():
+        memberships = StudentGroup.objects.filter(group=group, student_id__in=student_ids)
+        removed = sorted(memberships.values_list('student_id', flat=True))
+        # Одним DELETE без сигналов на каждую строку; их работу делаем сами, разом на всех
+        memberships._raw_delete(memberships.db)
+        visibility.refresh_students(removed)
+        leaderboard.remove_members(group.pk, removed)
+    token_cache.invalidate_users(removed)
+    return removed, sorted(student_ids - set(removed))
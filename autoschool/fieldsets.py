@@ -0,0 +1,130 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(request, param):
+    params = getattr(request, 'query_params', None)
+    if params is None:
+        params = getattr(request, 'GET', {})
+    value = params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def has_selection(request):
+    return request is not None and (
+        _names(request, FIELDS_PARAM) is not None or _names(request, EXPAND_PARAM) is not None
+    )
+
+
+def field_filter(request, expandable, many):
+    """Функция name -> bool для полей корневого сериализатора.
+
+    ?fields= оставляет только перечисленные поля (и раскрытые через
+    ?expand=). Без него отдаются все поля, кроме вложенных из expandable:
+    в списках они появляются только по ?expand=, в детальном ответе — всегда.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return lambda name: True
+    requested = _names(request, FIELDS_PARAM)
+    expanded = _names(request, EXPAND_PARAM) or set()
+    if requested is not None:
+        return lambda name: name in requested or name in expanded
+    return lambda name: name not in expandable or not many or name in expanded
+
+
+class SparseFieldsMixin:
+    """?fields= и ?expand= для корневого сериализатора; вложенные отдаются целиком."""
+
+    # Вложенные поля, которые в списках отдаются только по ?expand=
+    expandable_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        many = isinstance(parent, serializers.ListSerializer)
+        if many:
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        keep = field_filter(self.context.get('request'), self.expandable_fields, many)
+        return {name: field for name, field in fields.items() if keep(name)}
+
+
+def _nested_prefetches(serializer, prefix):
+    """Пути prefetch_related для вложенного сериализатора и его собственных связей."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    lookups = []
+    for field in serializer.fields.values():
+        if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            lookups.append(f'{prefix}__{field.source}')
+            if isinstance(field, serializers.ListSerializer):
+                lookups.extend(_nested_prefetches(field, f'{prefix}__{field.source}'))
+    return lookups
+
+
+def sparse_queryset(queryset, serializer, always=()):
+    """Подгоняет queryset под поля сериализатора.
+
+    Колонки неотданных полей не загружаются (only), связи подгружаются
+    prefetch_related только для отдаваемых вложенных полей. Если какое-то
+    поле нельзя сопоставить колонке (свойство, метод), грузятся все колонки.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    opts = queryset.model._meta
+    columns = {opts.pk.name, *always}
+    prefetches = []
+    load_all = False
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            load_all = True
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            if isinstance(field, serializers.ManyRelatedField) and model_field.many_to_many:
+                # Для списка id достаточно первичных ключей связанных объектов
+                related = model_field.related_model
+                prefetches.append(Prefetch(field.source, queryset=related.objects.only(related._meta.pk.name)))
+            else:
+                prefetches.append(field.source)
+                if isinstance(field, serializers.ListSerializer):
+                    prefetches.extend(_nested_prefetches(field, field.source))
+        else:
+            columns.add(model_field.name)
+
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if not load_all and not queryset.query.select_related:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class SparseQuerysetMixin:
+    """Для list/retrieve загружает только то, что отдаст сериализатор (см. sparse_queryset)."""
+
+    # Поля, которые нужны представлению помимо сериализатора (например, для ETag)
+    always_fields = ()
+
+    def sparse_fields_enabled(self):
+        return self.action in ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.sparse_fields_enabled():
+            return queryset
+        always = list(self.always_fields)
+        if self.action == 'list' and self.paginator is not None:
+            # Поля сортировки курсорной пагинации нужны для построения курсора
+            always.extend(name.lstrip('-') for name in getattr(self.paginator, 'ordering', ()))
+        return sparse_queryset(queryset, self.get_serializer(many=self.action == 'list'), always)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import analytics, item_analysis, leaderboard
+from .conditional import bump_results
+from .models import Question, TestResult, TestVersion
+from .payloads import content_version
+
+ANSWER_KEY_CACHE_KEY = 'autoschool:answer_key:{test_id}:{version}'
+VERSION_ANSWER_KEY_CACHE_KEY = 'autoschool:version_answer_key:{version_id}'
+
+
+def build_answer_key(test_id, question_ids=None):
+    """Ключ ответов теста одним запросом: {id вопроса: frozenset(id верных ответов)}.
+
+    question_ids ограничивает ключ вопросами билета.
+    """
+    key = {}
+    questions = Question.objects.filter(test_id=test_id)
+    if question_ids is not None:
+        questions = questions.filter(id__in=question_ids)
+    rows = questions.values_list('id', 'answers__id', 'answers__is_correct')
+    for question_id, answer_id, is_correct in rows:
+        correct = key.setdefault(question_id, set())
+        if answer_id is not None and is_correct:
+            correct.add(answer_id)
+    return {question_id: frozenset(correct) for question_id, correct in key.items()}
+
+
+def _answer_key_cache_key(test):
+    # Версия — updated_at теста, как у кэша представления для курсанта: правка
+    # вопросов в одном процессе меняет ключ для всех, сбрасывать кэш не нужно
+    return ANSWER_KEY_CACHE_KEY.format(test_id=test.id, version=content_version(test))
+
+
+def get_answer_key(test):
+    cache_key = _answer_key_cache_key(test)
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = build_answer_key(test.id)
+        cache.set(cache_key, answer_key, getattr(settings, 'AUTOSCHOOL_PAYLOAD_CACHE_TIMEOUT', 24 * 60 * 60))
+    return answer_key
+
+
+def get_version_answer_key(version_id):
+    """Ключ ответов опубликованной версии.
+
+    Версия неизменна, поэтому ключ кэшируется без срока и никогда не сбрасывается.
+    """
+    cache_key = VERSION_ANSWER_KEY_CACHE_KEY.format(version_id=version_id)
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        stored = TestVersion.objects.filter(pk=version_id).values_list('answer_key', flat=True).get()
+        answer_key = {int(question_id): frozenset(correct) for question_id, correct in stored.items()}
+        cache.set(cache_key, answer_key, None)
+    return answer_key
+
+
+def get_test_answer_key(test):
+    """Ключ ответов, по которому проверяется тест: опубликованной версии, а без неё — черновика."""
+    if test.published_version_id:
+        return get_version_answer_key(test.published_version_id)
+    return get_answer_key(test)
+
+
+def get_ticket_answer_key(test, question_ids, version_id=None):
+    """Ключ ответов только для вопросов билета, в порядке их выдачи.
+
+    Билет из опубликованной версии проверяется по её ключу. Иначе, если ключ
+    всего теста уже в кэше, берём из него; если нет — из базы читаются
+    только вопросы билета.
+    """
+    if version_id is not None:
+        answer_key = get_version_answer_key(version_id)
+    else:
+        answer_key = cache.get(_answer_key_cache_key(test))
+    if answer_key is None:
+        answer_key = build_answer_key(test.id, question_ids)
+    return {question_id: answer_key[question_id] for question_id in question_ids if question_id in answer_key}
+
+
+def grade(answer_key, submitted_answers):
+    """Проверяет ответы вида {"<id вопроса>": <id ответа>}.
+
+    Возвращает (score, max_score, responses), где responses — список
+    (id вопроса, id выбранного ответа или None, верно ли) для журнала ответов.
+    """
+    score = 0
+    responses = []
+    for question_id, correct in answer_key.items():
+        try:
+            answer_id = int(submitted_answers.get(str(question_id)))
+        except (TypeError, ValueError):
+            answer_id = None
+        is_correct = answer_id is not None and answer_id in correct
+        score += is_correct
+        responses.append((question_id, answer_id, is_correct))
+    return score, len(answer_key), responses
+
+
+def save_results(results):
+    """Сохраняет пачку TestResult одной вставкой в одной транзакции.
+
+    Все записи результатов проходят здесь: в той же транзакции пишется
+    журнал ответов и обновляются сводные таблицы аналитики и рейтинги групп.
+    """
+    with transaction.atomic():
+        results = TestResult.objects.bulk_create(results)
+        item_analysis.record_attempts(results)
+        analytics.record_results(results)
+        leaderboard.record_results(results)
+        student_ids = {result.student_id for result in results}
+        transaction.on_commit(lambda: bump_results(student_ids))
+    return results
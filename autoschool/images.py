@@ -0,0 +1,137 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .models import LectureImage, Question
+
+logger = logging.getLogger(__name__)
+
+# Имя варианта -> наибольшая сторона в пикселях (None — исходный размер)
+VARIANTS = {
+    'thumb': 320,
+    'medium': 1024,
+    'webp': None,
+}
+WEBP_QUALITY = 80
+IMAGE_MODELS = (LectureImage, Question)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'AUTOSCHOOL_IMAGE_WORKERS', 2),
+    thread_name_prefix='autoschool-images'
+)
+
+
+def needs_processing(instance):
+    return bool(instance.image) and instance.image_variants.get('source') != instance.image.name
+
+
+def schedule(instance):
+    """Ставит обработку изображения в фоновый пул после фиксации транзакции."""
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: _executor.submit(_run, model, pk))
+
+
+def _run(model, pk):
+    try:
+        process(model, pk)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s #%s', model.__name__, pk)
+    finally:
+        connections.close_all()
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as handle:
+        for chunk in handle.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def variant_path(digest, name):
+    return f'variants/{digest[:2]}/{digest}/{name}.webp'
+
+
+def find_processed(digest, exclude):
+    for model in IMAGE_MODELS:
+        queryset = model.objects.filter(image_hash=digest).exclude(image_variants={})
+        if model is type(exclude):
+            queryset = queryset.exclude(pk=exclude.pk)
+        original = queryset.first()
+        if original is not None:
+            return original
+    return None
+
+
+def build_variants(field_file, digest):
+    with field_file.open('rb') as handle:
+        image = ImageOps.exif_transpose(Image.open(handle))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    variants = {}
+    for name, size in VARIANTS.items():
+        path = variant_path(digest, name)
+        if not default_storage.exists(path):
+            variant = image.copy()
+            if size:
+                variant.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+            path = default_storage.save(path, ContentFile(buffer.getvalue()))
+        variants[name] = path
+    return image.width, image.height, variants
+
+
+def process(model, pk):
+    """Считает хэш, размеры и варианты изображения; одинаковые загрузки объединяет."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not needs_processing(instance):
+        return
+    source = instance.image.name
+    digest = content_hash(instance.image)
+
+    original = find_processed(digest, exclude=instance)
+    if original is not None:
+        # Такой файл уже обработан: ссылаемся на него, а дубликат удаляем
+        name = original.image.name
+        width, height = original.image_width, original.image_height
+        variants = dict(original.image_variants)
+    else:
+        name = source
+        width, height, variants = build_variants(instance.image, digest)
+    variants['source'] = name
+
+    updated = model.objects.filter(pk=pk, image=source).update(
+        image=name,
+        image_hash=digest,
+        image_width=width,
+        image_height=height,
+        image_variants=variants
+    )
+    if updated and name != source:
+        default_storage.delete(source)
+    if updated:
+        # Варианты входят в представление теста или лекции: сдвигаем их версию
+        from .signals import lecture_content_changed, test_content_changed
+        if model is Question:
+            test_content_changed(instance.test_id)
+        else:
+            lecture_content_changed(instance.lecture_id)
+
+
+def variant_urls(instance):
+    variants = instance.image_variants or {}
+    return {
+        name: default_storage.url(path)
+        for name, path in variants.items()
+        if name != 'source'
+    }
@@ -0,0 +1,461 @@
+import csv
+import io
+import json
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from PIL import Image
+
+from . import images, search
+from .models import Answer, CustomUser, DriverGroup, Question, Test
+from .permissions import user_creation_error
+from .signals import test_content_changed
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'user_type', 'phone_number', 'password')
+USER_TYPES = {value for value, _ in CustomUser.USER_TYPE_CHOICES}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class TestImportError(ImportFormatError):
+    """Ошибки проверки теста: {путь к полю: [сообщения]}."""
+
+    def __init__(self, errors):
+        super().__init__('Тест не прошёл проверку')
+        self.errors = errors
+
+
+def _decode(content):
+    if isinstance(content, bytes):
+        try:
+            return content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFormatError('Файл должен быть в кодировке UTF-8')
+    return content
+
+
+def read_rows(content, file_format):
+    """Строки импорта из CSV (с заголовком) или JSON-списка объектов."""
+    content = _decode(content)
+    if file_format == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    if file_format == 'json':
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise ImportFormatError('Некорректный JSON')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ImportFormatError('JSON должен быть списком объектов')
+        return rows
+    raise ImportFormatError('Формат должен быть csv или json')
+
+
+# Один пул на процесс, а не на запрос. Дочерние процессы запускаются через spawn:
+# fork из многопоточного сервера копирует чужие блокировки и соединения с БД.
+# Процессы пула создаются при первой большой пачке и переиспользуются; Django
+# в них настраивается заново (инициализатор не может жить в этом модуле —
+# его импорт тянет модели до django.setup)
+_hash_pool = ProcessPoolExecutor(
+    max_workers=getattr(settings, 'AUTOSCHOOL_PASSWORD_HASH_WORKERS', None),
+    mp_context=multiprocessing.get_context('spawn'),
+    initializer=django.setup,
+)
+
+
+def hash_passwords(passwords):
+    """Хэширует пароли; большие пачки раскладываются по процессам."""
+    workers = getattr(settings, 'AUTOSCHOOL_PASSWORD_HASH_WORKERS', None)
+    threshold = getattr(settings, 'AUTOSCHOOL_PASSWORD_HASH_POOL_THRESHOLD', 8)
+    if len(passwords) < threshold or workers == 1:
+        return [make_password(password) for password in passwords]
+    return list(_hash_pool.map(make_password, passwords, chunksize=4))
+
+
+def _clean_row(row):
+    data = {field: str(row.get(field) or '').strip() for field in USER_FIELDS}
+    data['password'] = str(row.get('password') or '')
+    errors = {}
+
+    if not data['username']:
+        errors['username'] = ['Обязательное поле']
+    else:
+        try:
+            CustomUser.username_validator(data['username'])
+        except ValidationError as exc:
+            errors['username'] = exc.messages
+    if data['user_type'] not in USER_TYPES:
+        errors['user_type'] = ['Допустимые значения: ' + ', '.join(sorted(USER_TYPES))]
+    if data['email']:
+        try:
+            validate_email(data['email'])
+        except ValidationError as exc:
+            errors['email'] = exc.messages
+    for field in ('first_name', 'last_name', 'phone_number', 'username'):
+        max_length = CustomUser._meta.get_field(field).max_length
+        if len(data[field]) > max_length:
+            errors.setdefault(field, []).append(f'Не более {max_length} символов')
+    if not data['password']:
+        errors['password'] = ['Обязательное поле']
+    elif 'username' not in errors:
+        try:
+            validate_password(data['password'], user=CustomUser(
+                username=data['username'], email=data['email'],
+                first_name=data['first_name'], last_name=data['last_name']
+            ))
+        except ValidationError as exc:
+            errors['password'] = exc.messages
+    return data, errors
+
+
+def import_users(rows, actor=None):
+    """Создаёт пользователей одной вставкой и возвращает построчный отчёт.
+
+    actor — пользователь, от имени которого идёт импорт; права на каждый
+    user_type проверяются один раз на всю пачку. Без actor (команда
+    управления) проверки прав не выполняются.
+    """
+    cleaned = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        data, row_errors = _clean_row(row)
+        if row_errors:
+            errors.append({'row': number, 'username': data['username'], 'errors': row_errors})
+        else:
+            cleaned.append((number, data))
+
+    if actor is not None:
+        denied = {}
+        for user_type in {data['user_type'] for _, data in cleaned}:
+            message = user_creation_error(actor, user_type)
+            if message:
+                denied[user_type] = message
+        if denied:
+            for number, data in cleaned:
+                if data['user_type'] in denied:
+                    errors.append({'row': number, 'username': data['username'],
+                                   'errors': {'user_type': [denied[data['user_type']]]}})
+            cleaned = [(number, data) for number, data in cleaned if data['user_type'] not in denied]
+
+    # Дубликаты внутри файла и уже существующие логины — одним запросом
+    taken = set(CustomUser.objects.filter(
+        username__in=[data['username'] for _, data in cleaned]
+    ).values_list('username', flat=True))
+    unique = []
+    for number, data in cleaned:
+        if data['username'] in taken:
+            errors.append({'row': number, 'username': data['username'],
+                           'errors': {'username': ['Пользователь с таким логином уже существует']}})
+        else:
+            taken.add(data['username'])
+            unique.append((number, data))
+
+    hashes = hash_passwords([data['password'] for _, data in unique])
+    users = [
+        CustomUser(**{field: data[field] for field in USER_FIELDS if field != 'password'}, password=hashed)
+        for (_, data), hashed in zip(unique, hashes)
+    ]
+    with transaction.atomic():
+        users = CustomUser.objects.bulk_create(users)
+
+    created = [
+        {'row': number, 'id': user.pk, 'username': user.username}
+        for (number, _), user in zip(unique, users)
+    ]
+    errors.sort(key=lambda item: item['row'])
+    return {'created': created, 'errors': errors}
+
+
+TEST_FORMATS = {'.json': 'json', '.csv': 'csv', '.xlsx': 'xlsx'}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'да', '+', 'x'}
+
+
+def test_file_format(name):
+    """Формат файла теста по расширению; неизвестное расширение — ошибка, а не CSV."""
+    file_format = TEST_FORMATS.get(posixpath.splitext(name.lower())[1])
+    if file_format is None:
+        raise ImportFormatError('Формат должен быть json, csv или xlsx')
+    return file_format
+
+
+def image_files(uploads):
+    """{имя файла: файл} для изображений вопросов.
+
+    Вопросы ссылаются на изображения по имени, поэтому два файла с одним
+    именем — ошибка проверки, а не молчаливая замена одного другим.
+    """
+    files, duplicates = {}, set()
+    for upload in uploads:
+        if upload.name in files:
+            duplicates.add(upload.name)
+        files[upload.name] = upload
+    if duplicates:
+        raise TestImportError({
+            'images': [f'Файл {name} загружен несколько раз' for name in sorted(duplicates)]
+        })
+    return files
+
+
+def read_workbook(content):
+    """Строки первого листа XLSX как словари по заголовку; нужен openpyxl."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('Для импорта XLSX нужен пакет openpyxl')
+    try:
+        sheet = load_workbook(io.BytesIO(content), read_only=True, data_only=True).active
+    except Exception:
+        raise ImportFormatError('Некорректный файл XLSX')
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell or '').strip() for cell in next(rows, ())]
+    return [
+        dict(zip(header, row)) for row in rows
+        if any(cell not in (None, '') for cell in row)
+    ]
+
+
+def questions_from_rows(rows):
+    """Вопросы из таблицы, где каждая строка — один ответ.
+
+    Колонки: question, topic, image, answer, correct. Непустая ячейка
+    question начинает новый вопрос, строки с пустой question добавляют
+    ответы к предыдущему.
+    """
+    questions = []
+    for number, row in enumerate(rows, start=2):
+        row = {str(key).strip().lower(): value for key, value in row.items() if key}
+        text = str(row.get('question') or '').strip()
+        if text:
+            questions.append({
+                'text': text,
+                'topic': row.get('topic') or '',
+                'image': row.get('image') or None,
+                'answers': [],
+            })
+        elif not questions:
+            raise ImportFormatError(f'Строка {number}: ответ без вопроса')
+        answer = str(row.get('answer') or '').strip()
+        if answer:
+            questions[-1]['answers'].append({'text': answer, 'is_correct': row.get('correct')})
+    return questions
+
+
+def read_test(content, file_format):
+    """Дерево теста {title, ..., questions: [{text, answers: [...]}]} из JSON, CSV или XLSX.
+
+    В CSV и XLSX только вопросы; поля самого теста передаются отдельно.
+    """
+    if file_format == 'xlsx':
+        return {'questions': questions_from_rows(read_workbook(content))}
+    if file_format == 'csv':
+        return {'questions': questions_from_rows(read_rows(content, 'csv'))}
+    if file_format != 'json':
+        raise ImportFormatError('Формат должен быть json, csv или xlsx')
+    try:
+        data = json.loads(_decode(content))
+    except ValueError:
+        raise ImportFormatError('Некорректный JSON')
+    if isinstance(data, list):
+        return {'questions': data}
+    if not isinstance(data, dict):
+        raise ImportFormatError('JSON должен быть объектом теста или списком вопросов')
+    return data
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value if value is not None else '').strip().lower() in TRUE_VALUES
+
+
+def _is_image(upload):
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        upload.seek(0)
+
+
+def clean_test(data, files):
+    """Проверяет всё дерево до записи; возвращает (очищенные данные, ошибки).
+
+    files — {имя файла: файл} для ссылок на изображения из поля image.
+    """
+    errors = {}
+
+    def error(path, message):
+        errors.setdefault(path, []).append(message)
+
+    def text(value, path, model, field, required=True):
+        value = str(value if value is not None else '').strip()
+        max_length = model._meta.get_field(field).max_length
+        if required and not value:
+            error(path, 'Обязательное поле')
+        elif max_length and len(value) > max_length:
+            error(path, f'Не более {max_length} символов')
+        return value
+
+    cleaned = {
+        'title': text(data.get('title'), 'title', Test, 'title'),
+        'description': text(data.get('description'), 'description', Test, 'description', required=False),
+        'ticket_by_topic': _flag(data.get('ticket_by_topic')),
+        'ticket_size': None,
+        'groups': [],
+        'questions': [],
+    }
+
+    ticket_size = data.get('ticket_size')
+    if ticket_size not in (None, ''):
+        try:
+            cleaned['ticket_size'] = int(ticket_size)
+            if cleaned['ticket_size'] < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            error('ticket_size', 'Должно быть положительным целым числом')
+
+    groups = data.get('groups') or []
+    if isinstance(groups, str):
+        groups = [group for group in groups.split(',') if group.strip()]
+    try:
+        cleaned['groups'] = sorted({int(group) for group in groups})
+    except (TypeError, ValueError):
+        error('groups', 'Нужен список ID групп')
+    else:
+        found = set(DriverGroup.objects.filter(id__in=cleaned['groups']).values_list('id', flat=True))
+        missing = [group for group in cleaned['groups'] if group not in found]
+        if missing:
+            error('groups', 'Группы не найдены: ' + ', '.join(map(str, missing)))
+
+    questions = data.get('questions')
+    if not isinstance(questions, list) or not questions:
+        error('questions', 'Нужен непустой список вопросов')
+        questions = []
+    checked_images = {}
+    for index, question in enumerate(questions):
+        path = f'questions[{index}]'
+        if not isinstance(question, dict):
+            error(path, 'Вопрос должен быть объектом')
+            continue
+        item = {
+            'text': text(question.get('text'), f'{path}.text', Question, 'text'),
+            'topic': text(question.get('topic'), f'{path}.topic', Question, 'topic', required=False),
+            'image': str(question.get('image') or '').strip() or None,
+            'answers': [],
+        }
+        if item['image']:
+            upload = files.get(item['image'])
+            if upload is None:
+                error(f'{path}.image', f"Файл {item['image']} не загружен")
+            else:
+                if item['image'] not in checked_images:
+                    checked_images[item['image']] = _is_image(upload)
+                if not checked_images[item['image']]:
+                    error(f'{path}.image', f"Файл {item['image']} не является изображением")
+
+        answers = question.get('answers')
+        if not isinstance(answers, list) or len(answers) < 2:
+            error(f'{path}.answers', 'Нужно не меньше двух ответов')
+            answers = answers if isinstance(answers, list) else []
+        for answer_index, answer in enumerate(answers):
+            answer_path = f'{path}.answers[{answer_index}]'
+            if not isinstance(answer, dict):
+                error(answer_path, 'Ответ должен быть объектом')
+                continue
+            item['answers'].append({
+                'text': text(answer.get('text'), f'{answer_path}.text', Answer, 'text'),
+                'is_correct': _flag(answer.get('is_correct')),
+            })
+        if len(answers) >= 2 and not any(answer['is_correct'] for answer in item['answers']):
+            error(f'{path}.answers', 'Нужен хотя бы один верный ответ')
+        cleaned['questions'].append(item)
+
+    if cleaned['ticket_size'] and cleaned['ticket_size'] > len(questions):
+        error('ticket_size', 'Размер билета больше числа вопросов')
+    return cleaned, errors
+
+
+def store_images(files):
+    """Сохраняет изображения вопросов в хранилище параллельно: {имя файла: путь в хранилище}."""
+    if not files:
+        return {}
+    field = Question._meta.get_field('image')
+
+    def save(item):
+        name, upload = item
+        return name, field.storage.save(field.generate_filename(None, posixpath.basename(name)), upload)
+
+    workers = getattr(settings, 'AUTOSCHOOL_IMAGE_UPLOAD_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        return dict(pool.map(save, files.items()))
+
+
+def import_test(data, author, files=None):
+    """Создаёт тест с вопросами и ответами в одной транзакции.
+
+    Дерево проверяется целиком заранее (TestImportError со всеми ошибками,
+    в базу ничего не пишется). Вопросы и ответы вставляются bulk_create,
+    поэтому то, что обычно делают сигналы, — сброс ключа ответов и версии
+    теста, поисковый индекс, обработка изображений — выполняется здесь явно.
+    Возвращает id созданных объектов в порядке исходного дерева.
+    """
+    files = files or {}
+    cleaned, errors = clean_test(data, files)
+    if errors:
+        raise TestImportError(errors)
+
+    stored = store_images({
+        name: files[name] for name in {question['image'] for question in cleaned['questions']} if name
+    })
+    try:
+        with transaction.atomic():
+            test = Test.objects.create(
+                title=cleaned['title'],
+                description=cleaned['description'],
+                author=author,
+                ticket_size=cleaned['ticket_size'],
+                ticket_by_topic=cleaned['ticket_by_topic'],
+            )
+            test.groups.set(cleaned['groups'])
+            questions = Question.objects.bulk_create([
+                Question(test=test, text=item['text'], topic=item['topic'],
+                         image=stored.get(item['image']))
+                for item in cleaned['questions']
+            ])
+            answers = Answer.objects.bulk_create([
+                Answer(question=question, text=answer['text'], is_correct=answer['is_correct'])
+                for question, item in zip(questions, cleaned['questions'])
+                for answer in item['answers']
+            ])
+
+            test_content_changed(test.pk)
+            backend = search.get_backend()
+            backend.index(search.question_documents(questions))
+            backend.index(search.answer_documents((answer.pk, test.pk, answer.text) for answer in answers))
+            for question in questions:
+                if images.needs_processing(question):
+                    images.schedule(question)
+    except Exception:
+        for path in stored.values():
+            Question._meta.get_field('image').storage.delete(path)
+        raise
+
+    answer_ids = iter(answer.pk for answer in answers)
+    return {
+        'test': test.pk,
+        'questions': [
+            {'id': question.pk, 'answers': [next(answer_ids) for _ in item['answers']]}
+            for question, item in zip(questions, cleaned['questions'])
+        ],
+    }
@@ -0,0 +1,219 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('autoschool_request_metrics', default=None)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """Форма запроса: без литералов, списки IN (...) любой длины совпадают."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.shape_time = Counter()
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self._serializer_depth = 0
+
+    def record_query(self, sql, duration):
+        shape = normalize_sql(sql)
+        self.queries += 1
+        self.db_time += duration
+        self.shapes[shape] += 1
+        self.shape_time[shape] += duration
+
+    def repeated_shapes(self, threshold):
+        """Формы, выполненные не меньше threshold раз за запрос, — кандидаты в N+1."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class QueryRecorder:
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.record_query(sql, time.perf_counter() - start)
+
+
+def current_metrics():
+    return _current.get()
+
+
+class _SerializerTimer:
+    def __enter__(self):
+        metrics = _current.get()
+        self.metrics = metrics if metrics is not None and not metrics._serializer_depth else None
+        if metrics is not None:
+            metrics._serializer_depth += 1
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics._serializer_depth -= 1
+        # Учитываем только внешний сериализатор, чтобы вложенные не считались дважды
+        if self.metrics is not None:
+            self.metrics.serializer_time += time.perf_counter() - self.start
+
+
+class TimedSerializerMixin:
+    """Время сериализации попадает в метрики запроса.
+
+    Считается только внешний to_representation: вложенные сериализаторы и
+    элементы списка уже входят во время родителя.
+    """
+
+    def to_representation(self, instance):
+        with _SerializerTimer():
+            return super().to_representation(instance)
+
+
+def _server_timing(metrics, total):
+    parts = [
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'serialize;dur={metrics.serializer_time * 1000:.1f}',
+        f'render;dur={metrics.render_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    repeated = metrics.repeated_shapes(getattr(settings, 'AUTOSCHOOL_N_PLUS_ONE_THRESHOLD', 5))
+    if repeated:
+        parts.append(f'nplusone;desc="{len(repeated)} repeated shapes"')
+    return ', '.join(parts)
+
+
+def _record_queries(stack, metrics):
+    recorder = QueryRecorder(metrics)
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+
+class QueryInstrumentationMiddleware:
+    """Считает SQL-запросы, время базы, сериализации и рендеринга для каждого запроса.
+
+    Итог отдаётся в заголовке Server-Timing и пишется одной JSON-строкой в
+    лог autoschool.instrumentation. Медленные запросы и запросы с
+    повторяющимися формами SQL (N+1) попадают в лог предупреждений вместе с
+    формами — с вероятностью AUTOSCHOOL_SLOW_REQUEST_SAMPLE_RATE.
+
+    Поддерживает и синхронный, и асинхронный стек: стоя первой в MIDDLEWARE,
+    синхронная версия заставила бы всю цепочку под ASGI работать в потоке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'AUTOSCHOOL_INSTRUMENTATION', True):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _record_queries(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'AUTOSCHOOL_INSTRUMENTATION', True):
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Соединения с базой привязаны к потоку: обёртку ставим в том потоке,
+                # где sync_to_async и async-методы ORM выполняют запросы этого запроса
+                await sync_to_async(_record_queries)(stack, metrics)
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - start)
+
+    def _finish(self, request, response, metrics, total):
+        response['Server-Timing'] = _server_timing(metrics, total)
+        self._log(request, response, metrics, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response рендерится после этого хука: засекаем время до конца рендера
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def finished(rendered):
+                metrics.render_time += time.perf_counter() - started
+            response.add_post_render_callback(finished)
+        return response
+
+    def _log(self, request, response, metrics, total):
+        threshold = getattr(settings, 'AUTOSCHOOL_N_PLUS_ONE_THRESHOLD', 5)
+        repeated = metrics.repeated_shapes(threshold)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'serialize_ms': round(metrics.serializer_time * 1000, 2),
+            'render_ms': round(metrics.render_time * 1000, 2),
+            'repeated_shapes': len(repeated),
+        }
+        logger.info(json.dumps(record))
+
+        slow = total * 1000 >= getattr(settings, 'AUTOSCHOOL_SLOW_REQUEST_MS', 500)
+        if not (slow or repeated):
+            return
+        if random.random() >= getattr(settings, 'AUTOSCHOOL_SLOW_REQUEST_SAMPLE_RATE', 1.0):
+            return
+        shapes = repeated or [(shape, metrics.shapes[shape])
+                              for shape, _ in metrics.shape_time.most_common(5)]
+        record['shapes'] = [
+            {'sql': shape, 'count': count, 'db_ms': round(metrics.shape_time[shape] * 1000, 2)}
+            for shape, count in shapes[:10]
+        ]
+        logger.warning(json.dumps(record))
@@ -0,0 +1,105 @@
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, When
+
+from .models import AnswerAttempt, Question, QuestionStats
+
+BATCH_SIZE = 1000
+
+STATS_FIELDS = ('attempts', 'correct', 'total_sum', 'total_sq_sum', 'correct_total_sum')
+
+
+def _ratio(score, max_score):
+    return score / max_score if max_score else 0.0
+
+
+def record_attempts(results):
+    """Пишет журнал ответов для сохранённых результатов и обновляет QuestionStats.
+
+    Ответы берутся из атрибута responses, который заполняет grading.grade.
+    """
+    attempts = []
+    deltas = {}
+    for result in results:
+        responses = getattr(result, 'responses', None)
+        if not responses:
+            continue
+        ratio = _ratio(result.score, result.max_score)
+        for question_id, answer_id, is_correct in responses:
+            attempts.append(AnswerAttempt(
+                result_id=result.pk,
+                question_id=question_id,
+                answer_id=answer_id,
+                is_correct=is_correct
+            ))
+            delta = deltas.setdefault(question_id, [0, 0, 0.0, 0.0, 0.0])
+            delta[0] += 1
+            delta[1] += int(is_correct)
+            delta[2] += ratio
+            delta[3] += ratio * ratio
+            delta[4] += ratio if is_correct else 0.0
+
+    if not attempts:
+        return
+    with transaction.atomic():
+        AnswerAttempt.objects.bulk_create(attempts, batch_size=BATCH_SIZE)
+        # Вопрос опубликованной версии могли удалить из черновика: журнал
+        # хранит его id, а строки QuestionStats без вопроса не бывает
+        existing = set(Question.objects.filter(id__in=deltas).values_list('id', flat=True))
+        _upsert_stats({question_id: delta for question_id, delta in deltas.items() if question_id in existing})
+
+
+def _upsert_stats(deltas):
+    # Один INSERT ... ON CONFLICT на все вопросы попытки (SQLite >= 3.24 и PostgreSQL)
+    quote = connection.ops.quote_name
+    table = quote(QuestionStats._meta.db_table)
+    columns = ', '.join(quote(name) for name in ('question_id',) + STATS_FIELDS)
+    updates = ', '.join(f'{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}'
+                        for name in STATS_FIELDS)
+    row = '(' + ', '.join(['%s'] * (len(STATS_FIELDS) + 1)) + ')'
+    items = list(deltas.items())
+    if not items:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), BATCH_SIZE // 10):
+            chunk = items[start:start + BATCH_SIZE // 10]
+            params = [value for question_id, delta in chunk for value in (question_id, *delta)]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([row] * len(chunk))} '
+                f'ON CONFLICT ({quote("question_id")}) DO UPDATE SET {updates}',
+                params
+            )
+
+
+def rebuild():
+    """Пересчитывает QuestionStats одним агрегирующим проходом по журналу ответов."""
+    ratio = Case(
+        When(result__max_score__gt=0,
+             then=F('result__score') * 1.0 / F('result__max_score')),
+        default=0.0,
+        output_field=FloatField()
+    )
+    rows = (AnswerAttempt.objects
+            .filter(question_id__in=Question.objects.values('id'))
+            .values('question_id')
+            .annotate(
+                attempts=Count('id'),
+                correct=Count('id', filter=Q(is_correct=True)),
+                total_sum=Sum(ratio),
+                total_sq_sum=Sum(ratio * ratio),
+                correct_total_sum=Sum(ratio, filter=Q(is_correct=True)),
+            )
+            .order_by())
+    with transaction.atomic():
+        QuestionStats.objects.all().delete()
+        QuestionStats.objects.bulk_create(
+            (QuestionStats(
+                question_id=row['question_id'],
+                attempts=row['attempts'],
+                correct=row['correct'],
+                total_sum=row['total_sum'] or 0.0,
+                total_sq_sum=row['total_sq_sum'] or 0.0,
+                correct_total_sum=row['correct_total_sum'] or 0.0,
+            ) for row in rows.iterator()),
+            batch_size=BATCH_SIZE
+        )
+    return QuestionStats.objects.count()
@@ -0,0 +1,255 @@
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import DriverGroup, LeaderboardEntry, StudentGroup, StudentTestStats
+
+BATCH_SIZE = 1000
+ENTRY_FIELDS = ('tests_taken', 'best_score_sum', 'max_score_sum', 'rating')
+
+
+def _rating(best_score_sum, max_score_sum):
+    return round(best_score_sum / max_score_sum * 100, 2) if max_score_sum else 0.0
+
+
+def _key(student_id, row):
+    # По возрастанию ключа — от первого места к последнему
+    return (-row[3], -row[1], student_id)
+
+
+class Board:
+    """Рейтинг одной группы в памяти процесса.
+
+    rows — {id курсанта: (tests_taken, best_score_sum, max_score_sum, rating)},
+    keys — отсортированный список ключей _key. Место находится бинарным
+    поиском за O(log n), top-K — срез. Курсанты с одинаковыми рейтингом и
+    суммой баллов делят место.
+    """
+    __slots__ = ('version', 'rows', 'keys')
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.keys = sorted(_key(student_id, row) for student_id, row in rows.items())
+
+    def rank(self, student_id):
+        row = self.rows.get(student_id)
+        if row is None:
+            return None
+        return bisect_left(self.keys, _key(student_id, row)[:2]) + 1
+
+    def top(self, limit):
+        standings = []
+        rank, previous = 0, None
+        for position, key in enumerate(self.keys[:limit], 1):
+            if key[:2] != previous:
+                rank, previous = position, key[:2]
+            standings.append((rank, key[2], self.rows[key[2]]))
+        return standings
+
+    def put(self, student_id, row):
+        self.discard(student_id)
+        self.rows[student_id] = row
+        insort(self.keys, _key(student_id, row))
+
+    def discard(self, student_id):
+        row = self.rows.pop(student_id, None)
+        if row is not None:
+            del self.keys[bisect_left(self.keys, _key(student_id, row))]
+
+
+_boards = OrderedDict()
+_lock = threading.Lock()
+
+
+def _current_version(group_id):
+    return DriverGroup.objects.filter(pk=group_id).values_list('leaderboard_version', flat=True).first()
+
+
+def _bump(group_ids):
+    """Сдвигает версии рейтингов групп и возвращает новые {группа: версия}.
+
+    Вызывается после записи строк рейтинга в той же транзакции: до её
+    фиксации строка группы заблокирована, поэтому прочитанная версия —
+    ровно наша, и никто не увидит новую версию со старыми строками.
+    """
+    group_ids = list(group_ids)
+    if not group_ids:
+        return {}
+    with transaction.atomic():
+        DriverGroup.objects.filter(pk__in=group_ids).update(leaderboard_version=F('leaderboard_version') + 1)
+        return dict(DriverGroup.objects.filter(pk__in=group_ids).values_list('id', 'leaderboard_version'))
+
+
+def _load(group_id, version):
+    rows = {
+        student_id: tuple(row) for student_id, *row in
+        LeaderboardEntry.objects.filter(group_id=group_id).values_list('student_id', *ENTRY_FIELDS)
+    }
+    return Board(version, rows)
+
+
+def standings(group_id, limit, student_id=None):
+    """(число курсантов, top-K [(место, id курсанта, строка)], место student_id или None).
+
+    Рейтинг берётся из памяти процесса, пока его версия совпадает с
+    DriverGroup.leaderboard_version в базе; иначе перечитывается из
+    LeaderboardEntry одним запросом.
+    """
+    version = _current_version(group_id)
+    with _lock:
+        board = _boards.get(group_id)
+        if board is not None and board.version != version:
+            board = None
+    if board is None:
+        board = _load(group_id, version)
+        with _lock:
+            _boards[group_id] = board
+            while len(_boards) > getattr(settings, 'AUTOSCHOOL_LEADERBOARD_CACHE_GROUPS', 1000):
+                _boards.popitem(last=False)
+    with _lock:
+        if group_id in _boards:
+            _boards.move_to_end(group_id)
+        me = None
+        if student_id is not None and student_id in board.rows:
+            me = (board.rank(student_id), student_id, board.rows[student_id])
+        return len(board.rows), board.top(limit), me
+
+
+def _publish(changes, versions):
+    """Применяет изменения {группа: {курсант: строка или None}} к рейтингам в памяти.
+
+    versions — версии групп после этих изменений (см. _bump). Если между
+    загрузкой рейтинга и этим изменением версию сдвинул кто-то ещё (другой
+    процесс), локальный рейтинг выбрасывается и при следующем чтении
+    перечитывается из базы.
+    """
+    for group_id, rows in changes.items():
+        version = versions.get(group_id)
+        with _lock:
+            board = _boards.get(group_id)
+            if board is None:
+                continue
+            if rows is None or version is None or version != board.version + 1:
+                del _boards[group_id]
+                continue
+            for student_id, row in rows.items():
+                if row is None:
+                    board.discard(student_id)
+                else:
+                    board.put(student_id, row)
+            board.version = version
+
+
+def _boards_clear():
+    with _lock:
+        _boards.clear()
+
+
+def _compute(pairs):
+    """Строки рейтинга для пар (группа, курсант) по StudentTestStats — одним запросом."""
+    totals = {pair: [0, 0, 0] for pair in pairs}
+    if not totals:
+        return {}
+    rows = StudentTestStats.objects.filter(
+        student_id__in={student_id for _, student_id in pairs},
+        test__groups__in={group_id for group_id, _ in pairs},
+        attempts__gt=0
+    ).values_list('test__groups', 'student_id', 'best_score', 'max_score_sum', 'attempts')
+    for group_id, student_id, best_score, max_score_sum, attempts in rows:
+        total = totals.get((group_id, student_id))
+        if total is None:
+            continue
+        total[0] += 1
+        total[1] += best_score
+        # Максимум теста может меняться вместе с вопросами — берём средний по попыткам
+        total[2] += round(max_score_sum / attempts)
+    return {
+        pair: (tests_taken, best_score_sum, max_score_sum, _rating(best_score_sum, max_score_sum))
+        for pair, (tests_taken, best_score_sum, max_score_sum) in totals.items()
+    }
+
+
+def _store(rows):
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(group_id=group_id, student_id=student_id, **dict(zip(ENTRY_FIELDS, row)))
+         for (group_id, student_id), row in rows.items()],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['group', 'student'],
+        update_fields=[*ENTRY_FIELDS, 'updated_at'],
+    )
+
+
+def _changes(rows):
+    changes = {}
+    for (group_id, student_id), row in rows.items():
+        changes.setdefault(group_id, {})[student_id] = row
+    return changes
+
+
+def _refresh(pairs):
+    rows = _compute(pairs)
+    _store(rows)
+    changes = _changes(rows)
+    versions = _bump(changes)
+    transaction.on_commit(lambda: _publish(changes, versions))
+
+
+def record_results(results):
+    """Обновляет строки рейтинга курсантов после сдачи (вызывается после analytics.record_results)."""
+    if not results:
+        return
+    pairs = set(
+        StudentGroup.objects.filter(
+            student_id__in={result.student_id for result in results},
+            group__tests__in={result.test_id for result in results}
+        ).values_list('group_id', 'student_id')
+    )
+    _refresh(pairs)
+
+
+def refresh_members(group_id, student_ids):
+    """Курсанты добавлены в группу: у них появляются строки рейтинга."""
+    if student_ids:
+        _refresh({(group_id, student_id) for student_id in student_ids})
+
+
+def remove_members(group_id, student_ids):
+    if not student_ids:
+        return
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(group_id=group_id, student_id__in=student_ids).delete()
+        changes = {group_id: dict.fromkeys(student_ids)}
+        versions = _bump(changes)
+        transaction.on_commit(lambda: _publish(changes, versions))
+
+
+def refresh_groups(group_ids):
+    """Полный пересчёт рейтинга групп — после изменения назначенных им тестов."""
+    group_ids = list(group_ids)
+    if not group_ids:
+        return
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(group_id__in=group_ids).delete()
+        _store(_compute(set(
+            StudentGroup.objects.filter(group_id__in=group_ids).values_list('group_id', 'student_id')
+        )))
+        versions = _bump(group_ids)
+        transaction.on_commit(lambda: _publish(dict.fromkeys(group_ids), versions))
+
+
+def rebuild():
+    """Пересчитывает все рейтинги с нуля по StudentTestStats (после analytics.rebuild)."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        rows = _compute(set(StudentGroup.objects.values_list('group_id', 'student_id')))
+        _store(rows)
+        DriverGroup.objects.update(leaderboard_version=F('leaderboard_version') + 1)
+        # Все рейтинги в памяти устарели: перечитываются при следующем обращении
+        transaction.on_commit(_boards_clear)
+    return len(rows)
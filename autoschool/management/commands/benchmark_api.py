@@ -0,0 +1,160 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from autoschool.benchmarking import measure
+from autoschool.models import (
+    CustomUser, DriverGroup, Lecture, Question, StudentGroup, Test, TestResult
+)
+from autoschool.visibility import visible_ids
+
+# (имя, роль, метод, путь); в пути подставляются id объектов, видимых этой роли
+ENDPOINTS = (
+    ('tests_list', 'student', 'GET', '/api/tests/'),
+    ('test_detail', 'student', 'GET', '/api/tests/{test}/'),
+    ('lectures_list', 'student', 'GET', '/api/lectures/'),
+    ('lecture_detail', 'student', 'GET', '/api/lectures/{lecture}/'),
+    ('own_results', 'student', 'GET', '/api/results/'),
+    ('search', 'student', 'GET', '/api/search/?q={word}'),
+    ('submit_test', 'student', 'POST', '/api/tests/{test}/submit_test/'),
+    ('groups_list', 'instructor', 'GET', '/api/groups/'),
+    ('results_list', 'instructor', 'GET', '/api/results/'),
+    ('results_export', 'instructor', 'GET', '/api/results/export/'),
+    ('test_analytics', 'instructor', 'GET', '/api/analytics/tests/'),
+    ('item_analysis', 'instructor', 'GET', '/api/tests/{test}/item_analysis/'),
+    ('users_list', 'admin', 'GET', '/api/users/'),
+)
+WRITE_ENDPOINTS = {'submit_test'}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет эндпоинты /api/ в процессе: пропускная способность, p50/p95/p99 '
+            'и число SQL-запросов; результат сохраняется в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Запросов на эндпоинт')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            choices=[name for name, *_ in ENDPOINTS],
+                            help='Замерить только указанные эндпоинты (можно повторять)')
+        parser.add_argument('--writes', action='store_true',
+                            help='Включить эндпоинты, которые пишут в базу (submit_test)')
+        parser.add_argument('--output', help='Куда сохранить JSON с результатами')
+        parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        actors = self._actors()
+        clients = {}
+        for role, user in actors.items():
+            if user is not None:
+                token, _ = Token.objects.get_or_create(user=user)
+                clients[role] = Client(HTTP_HOST='localhost', HTTP_ACCEPT='application/json',
+                                       HTTP_AUTHORIZATION=f'Token {token.key}')
+        context = self._context(actors)
+
+        report = {
+            'commit': _git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'dataset': {
+                'users': CustomUser.objects.count(),
+                'tests': Test.objects.count(),
+                'questions': Question.objects.count(),
+                'lectures': Lecture.objects.count(),
+                'results': TestResult.objects.count(),
+            },
+            'endpoints': {},
+        }
+        for name, role, method, path in ENDPOINTS:
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            if name in WRITE_ENDPOINTS and not options['writes']:
+                continue
+            try:
+                path = path.format(**context[role])
+            except (KeyError, TypeError):
+                self.stderr.write(f'{name}: нет данных для роли {role}, пропущено')
+                continue
+            data = {'answers': {}} if name == 'submit_test' else None
+            summary = measure(clients[role], method, path, options['iterations'],
+                              options['warmup'], data=data)
+            report['endpoints'][name] = {'method': method, 'path': path, **summary}
+            self.stdout.write(
+                f"{name:16} {summary['throughput_rps']:>8} запр/с  p50 {summary['p50_ms']:>8} мс  "
+                f"p95 {summary['p95_ms']:>8} мс  p99 {summary['p99_ms']:>8} мс  "
+                f"SQL {summary['queries_median']}  ошибок {summary['errors']}"
+            )
+
+        if options['compare']:
+            self._compare(report, options['compare'])
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+            self.stdout.write(self.style.SUCCESS(f"Результаты сохранены в {options['output']}"))
+
+    def _actors(self):
+        student_ids = StudentGroup.objects.values('student_id')
+        instructor_ids = DriverGroup.objects.filter(tests__isnull=False).values('instructor_id')
+        return {
+            'student': CustomUser.objects.filter(user_type='student', id__in=student_ids,
+                                                 is_active=True).order_by('id').first(),
+            'instructor': CustomUser.objects.filter(user_type='instructor', id__in=instructor_ids,
+                                                    is_active=True).order_by('id').first(),
+            'admin': CustomUser.objects.filter(user_type='admin', is_active=True).order_by('id').first(),
+        }
+
+    def _context(self, actors):
+        context = {}
+        for role, user in actors.items():
+            if user is None:
+                continue
+            if role == 'student':
+                tests = Test.objects.filter(id__in=visible_ids(user, Test))
+                lectures = Lecture.objects.filter(id__in=visible_ids(user, Lecture))
+            elif role == 'instructor':
+                tests = Test.objects.filter(groups__instructor=user)
+                lectures = Lecture.objects.filter(groups__instructor=user)
+            else:
+                tests, lectures = Test.objects.all(), Lecture.objects.all()
+            lecture = lectures.order_by('id').only('id', 'title').first()
+            context[role] = {
+                'test': tests.order_by('id').values_list('id', flat=True).first(),
+                'lecture': lecture.pk if lecture else None,
+                'word': lecture.title.split()[0].lower() if lecture and lecture.title.split() else '',
+            }
+            if None in context[role].values():
+                # Пропускаем только эндпоинты, которым нужен отсутствующий объект
+                context[role] = {key: value for key, value in context[role].items() if value is not None}
+        return context
+
+    def _compare(self, report, path):
+        try:
+            baseline = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Не удалось прочитать {path}: {exc}')
+        self.stdout.write(f"Сравнение с {baseline.get('commit') or path}:")
+        for name, current in report['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if not previous or not previous.get('p95_ms'):
+                continue
+            change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+            queries = current['queries_median'] - previous['queries_median']
+            line = f'{name:16} p95 {change:+.1f}%  SQL {queries:+d}'
+            self.stdout.write(self.style.WARNING(line) if change > 10 or queries > 0 else line)
@@ -0,0 +1,61 @@
+import json
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from rest_framework.authtoken.models import Token
+
+from autoschool.benchmarking import run_asgi, run_wsgi
+from autoschool.models import CustomUser
+
+# Эндпоинт -> (синхронный путь DRF, асинхронный путь)
+ENDPOINTS = {
+    'tests': ('/api/tests/', '/api/student/tests/'),
+    'lectures': ('/api/lectures/', '/api/student/lectures/'),
+    'results': ('/api/results/', '/api/student/results/'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность и задержки чтения курсантом: '
+            'синхронные представления под WSGI против асинхронных под ASGI (в одном процессе)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Логин курсанта, от имени которого идут запросы')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='lectures')
+        parser.add_argument('--detail', type=int, help='id объекта: мерить детальное представление')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=100, help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=8, help='Потоков WSGI-сервера')
+        parser.add_argument('--client-delay', type=float, default=0.0,
+                            help='Секунд на чтение ответа медленным клиентом')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.filter(username=options['user']).first()
+        if user is None or user.user_type != 'student':
+            raise CommandError('Нужен существующий курсант')
+        if options['detail'] is not None and options['endpoint'] == 'results':
+            raise CommandError('У результатов нет асинхронного детального представления')
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'Authorization': f'Token {token.key}', 'Accept': 'application/json'}
+
+        sync_path, async_path = ENDPOINTS[options['endpoint']]
+        if options['detail'] is not None:
+            sync_path += f"{options['detail']}/"
+            async_path += f"{options['detail']}/"
+
+        report = {
+            'wsgi': run_wsgi(get_wsgi_application(), sync_path, headers, options['requests'],
+                             options['concurrency'], options['threads'], options['client_delay']),
+            'asgi': run_asgi(get_asgi_application(), async_path, headers, options['requests'],
+                             options['concurrency'], options['client_delay']),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for name, summary in report.items():
+            self.stdout.write(
+                f"{name}: {summary['throughput_rps']} запр/с, p50 {summary['p50_ms']} мс, "
+                f"p95 {summary['p95_ms']} мс, p99 {summary['p99_ms']} мс, ошибок {summary['errors']}"
+            )
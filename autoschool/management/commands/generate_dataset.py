@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from autoschool.datasets import DatasetError, generate
+
+
+class Command(BaseCommand):
+    help = 'Создаёт синтетический набор данных для нагрузочных замеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Префикс логинов создаваемых пользователей')
+        parser.add_argument('--instructors', type=int, default=5)
+        parser.add_argument('--groups-per-instructor', type=int, default=2)
+        parser.add_argument('--students-per-group', type=int, default=20)
+        parser.add_argument('--lectures', type=int, default=20)
+        parser.add_argument('--tests', type=int, default=10)
+        parser.add_argument('--questions', type=int, default=20, help='Вопросов в тесте')
+        parser.add_argument('--answers', type=int, default=4, help='Вариантов ответа на вопрос')
+        parser.add_argument('--results-per-student', type=int, default=5,
+                            help='Результатов тестов в истории каждого курсанта')
+        parser.add_argument('--password', default='benchmark', help='Пароль всех созданных пользователей')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['answers'] < 1:
+            raise CommandError('Нужен хотя бы один вариант ответа')
+        if options['questions'] < 1:
+            raise CommandError('Нужен хотя бы один вопрос в тесте')
+        try:
+            counts = generate(
+                prefix=options['prefix'],
+                instructors=options['instructors'],
+                groups_per_instructor=options['groups_per_instructor'],
+                students_per_group=options['students_per_group'],
+                lectures=options['lectures'],
+                tests=options['tests'],
+                questions=options['questions'],
+                answers=options['answers'],
+                results_per_student=options['results_per_student'],
+                password=options['password'],
+                seed=options['seed'],
+            )
+        except DatasetError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: ' + ', '.join(f'{name} {count}' for name, count in counts.items())
+        ))
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from autoschool.imports import ImportFormatError, TestImportError, import_test, read_test, test_file_format
+from autoschool.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Импорт теста с вопросами и ответами из JSON, CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл теста; изображения ищутся рядом с ним')
+        parser.add_argument('--format', choices=['json', 'csv', 'xlsx'], dest='file_format',
+                            help='Формат файла; по умолчанию определяется по расширению')
+        parser.add_argument('--author', required=True, help='Логин автора (администратор или инструктор)')
+        parser.add_argument('--title', help='Название теста (для CSV и XLSX обязательно)')
+        parser.add_argument('--description')
+        parser.add_argument('--group', type=int, action='append', dest='groups', help='ID группы (можно повторять)')
+        parser.add_argument('--ticket-size', type=int)
+        parser.add_argument('--by-topic', action='store_true', help='Составлять билеты пропорционально темам')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'Файл {path} не найден')
+        author = CustomUser.objects.filter(
+            username=options['author'], user_type__in=['admin', 'instructor']
+        ).first()
+        if author is None:
+            raise CommandError(f"Автор {options['author']} не найден среди администраторов и инструкторов")
+        try:
+            data = read_test(path.read_bytes(), options['file_format'] or test_file_format(path.name))
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+        for field in ('title', 'description', 'groups', 'ticket_size'):
+            if options[field] is not None:
+                data[field] = options[field]
+        if options['by_topic']:
+            data['ticket_by_topic'] = True
+
+        names = {
+            str(question.get('image')).strip() for question in data.get('questions') or []
+            if isinstance(question, dict) and question.get('image')
+        }
+        files = {
+            name: File(open(path.parent / name, 'rb'), name=name)
+            for name in names if (path.parent / name).is_file()
+        }
+        try:
+            report = import_test(data, author, files)
+        except TestImportError as exc:
+            for field, messages in exc.errors.items():
+                self.stderr.write(f"{field}: {'; '.join(messages)}")
+            raise CommandError('Тест не импортирован')
+        finally:
+            for upload in files.values():
+                upload.close()
+
+        answers = sum(len(question['answers']) for question in report['questions'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Создан тест #{report['test']}: вопросов {len(report['questions'])}, ответов {answers}"
+        ))
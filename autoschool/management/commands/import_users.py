@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from autoschool.imports import ImportFormatError, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Массовый импорт пользователей из CSV или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу CSV (с заголовком) или JSON')
+        parser.add_argument('--format', choices=['csv', 'json'], dest='file_format',
+                            help='Формат файла; по умолчанию определяется по расширению')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['file_format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+        try:
+            rows = read_rows(path.read_bytes(), file_format)
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        report = import_users(rows)
+        for error in report['errors']:
+            self.stderr.write(f"Строка {error['row']} ({error['username']}): "
+                              f"{json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано пользователей: {len(report['created'])}, ошибок: {len(report['errors'])}"
+        ))
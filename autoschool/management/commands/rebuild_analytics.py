@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from autoschool import analytics, item_analysis, leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводную аналитику по результатам тестов с нуля'
+
+    def handle(self, *args, **options):
+        tests, groups, students = analytics.rebuild()
+        questions = item_analysis.rebuild()
+        # Рейтинги строятся по StudentTestStats, поэтому пересчитываются после них
+        entries = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Аналитика пересчитана: тестов {tests}, групп×тестов {groups}, '
+            f'курсантов×тестов {students}, вопросов {questions}, строк рейтинга {entries}'
+        ))
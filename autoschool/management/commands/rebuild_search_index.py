@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from autoschool.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс лекций, вопросов и ответов'
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from autoschool.visibility import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс видимости лекций и тестов для курсантов'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Индекс видимости перестроен: {count} записей'))
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from autoschool import analytics, item_analysis, leaderboard
+from autoschool.conditional import bump_results
+from autoschool.grading import get_version_answer_key
+from autoschool.models import AnswerAttempt, Test, TestResult
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Перепроверяет результаты теста по ключу ответов выбранной версии'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test', type=int, required=True, help='ID теста')
+        parser.add_argument('--target-version', type=int, dest='target',
+                            help='Номер версии, по которой проверять; по умолчанию опубликованная')
+        parser.add_argument('--source-version', type=int, dest='source',
+                            help='Перепроверить только результаты, сданные по версии с этим номером')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать изменения, ничего не сохраняя')
+
+    def handle(self, *args, **options):
+        test = Test.objects.filter(pk=options['test']).first()
+        if test is None:
+            raise CommandError(f"Тест #{options['test']} не найден")
+        if options['target'] is not None:
+            version = test.versions.filter(number=options['target']).first()
+        else:
+            version = test.published_version
+        if version is None:
+            raise CommandError('Версия для перепроверки не найдена: опубликуйте тест или укажите --target-version')
+        answer_key = get_version_answer_key(version.pk)
+
+        results = TestResult.objects.filter(test=test).exclude(version=version)
+        if options['source'] is not None:
+            results = results.filter(version__number=options['source'])
+        results = results.in_bulk()
+
+        # Проверяются только вопросы, которые курсант действительно получил и которые есть в версии
+        totals = {result_id: [0, 0] for result_id in results}
+        changed_attempts = []
+        attempts = AnswerAttempt.objects.filter(result_id__in=results).only(
+            'id', 'result_id', 'question_id', 'answer_id', 'is_correct'
+        )
+        for attempt in attempts.iterator(chunk_size=BATCH_SIZE):
+            correct = answer_key.get(attempt.question_id)
+            if correct is None:
+                continue
+            is_correct = attempt.answer_id is not None and attempt.answer_id in correct
+            totals[attempt.result_id][0] += is_correct
+            totals[attempt.result_id][1] += 1
+            if attempt.is_correct != is_correct:
+                attempt.is_correct = is_correct
+                changed_attempts.append(attempt)
+
+        regraded, skipped = [], 0
+        for result_id, (score, max_score) in totals.items():
+            if not max_score:
+                # Без журнала ответов (или без общих с версией вопросов) проверять нечего
+                skipped += 1
+                continue
+            result = results[result_id]
+            result.score, result.max_score, result.version = score, max_score, version
+            regraded.append(result)
+
+        if not options['dry_run'] and regraded:
+            with transaction.atomic():
+                TestResult.objects.bulk_update(regraded, ['score', 'max_score', 'version'], batch_size=BATCH_SIZE)
+                AnswerAttempt.objects.bulk_update(changed_attempts, ['is_correct'], batch_size=BATCH_SIZE)
+                # Сводные таблицы и рейтинги строятся по результатам — пересчитываем их целиком
+                analytics.rebuild()
+                item_analysis.rebuild()
+                leaderboard.rebuild()
+                student_ids = {result.student_id for result in regraded}
+                transaction.on_commit(lambda: bump_results(student_ids))
+
+        prefix = 'Будет перепроверено' if options['dry_run'] else 'Перепроверено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} по версии {version.number}: результатов {len(regraded)}, '
+            f'изменено ответов {len(changed_attempts)}, пропущено без журнала ответов {skipped}'
+        ))
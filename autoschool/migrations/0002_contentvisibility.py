@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_visibility(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ContentVisibility = apps.get_model('autoschool', 'ContentVisibility')
+    StudentGroup = apps.get_model('autoschool', 'StudentGroup')
+
+    for model_name, related in (('lecture', 'lectures'), ('test', 'tests')):
+        content_type, _ = ContentType.objects.get_or_create(app_label='autoschool', model=model_name)
+        pairs = StudentGroup.objects.filter(
+            **{f'group__{related}__isnull': False}
+        ).values_list('student_id', f'group__{related}').distinct()
+        ContentVisibility.objects.bulk_create(
+            [ContentVisibility(student_id=student_id, content_type=content_type, object_id=object_id)
+             for student_id, object_id in pairs],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_content', to='autoschool.customuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='autoschool__content_c6a998_idx')],
+                'unique_together': {('student', 'content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(populate_visibility, migrations.RunPython.noop),
+    ]
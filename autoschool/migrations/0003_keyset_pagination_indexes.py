@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0002_contentvisibility'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drivergroup',
+            index=models.Index(fields=['created_at', 'id'], name='autoschool__created_9bcc05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lecture',
+            index=models.Index(fields=['created_at', 'id'], name='autoschool__created_b1955e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['created_at', 'id'], name='autoschool__created_267981_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['date_taken', 'id'], name='autoschool__date_ta_e04c8e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['student', 'date_taken', 'id'], name='autoschool__student_b8c729_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('score_sq_sum', models.BigIntegerField(default=0)),
+                ('max_score_sum', models.BigIntegerField(default=0)),
+                ('best_score', models.IntegerField(default=0)),
+                ('last_score', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='autoschool.test')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupTestStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('score_sq_sum', models.BigIntegerField(default=0)),
+                ('max_score_sum', models.BigIntegerField(default=0)),
+                ('best_score', models.IntegerField(default=0)),
+                ('last_score', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_stats', to='autoschool.drivergroup')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_stats', to='autoschool.test')),
+            ],
+            options={
+                'unique_together': {('group', 'test')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentTestStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('score_sq_sum', models.BigIntegerField(default=0)),
+                ('max_score_sum', models.BigIntegerField(default=0)),
+                ('best_score', models.IntegerField(default=0)),
+                ('last_score', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(limit_choices_to={'user_type': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='test_stats', to='autoschool.customuser')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='autoschool.test')),
+            ],
+            options={
+                'unique_together': {('student', 'test')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0004_result_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('total_sq_sum', models.FloatField(default=0)),
+                ('correct_total_sum', models.FloatField(default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='autoschool.question')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnswerAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_id', models.BigIntegerField()),
+                ('answer_id', models.BigIntegerField(blank=True, null=True)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_attempts', to='autoschool.testresult')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question_id', 'is_correct'], name='autoschool__questio_c2b2a1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    # Полнотекстовый индекс FTS5 есть только у SQLite; для других СУБД
+    # индекс создаёт соответствующий AUTOSCHOOL_SEARCH_BACKEND
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS autoschool_search USING fts5("
+        "title, body, lecture_id UNINDEXED, test_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        "SELECT id * 4 + 1, title, content, id, NULL FROM autoschool_lecture"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        "SELECT id * 4 + 2, '', text, NULL, test_id FROM autoschool_question"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        "SELECT a.id * 4 + 3, '', a.text, NULL, q.test_id "
+        "FROM autoschool_answer a JOIN autoschool_question q ON q.id = a.question_id"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS autoschool_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0008_exam_tickets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tests_taken', models.PositiveIntegerField(default=0)),
+                ('best_score_sum', models.BigIntegerField(default=0)),
+                ('max_score_sum', models.BigIntegerField(default=0)),
+                ('rating', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='autoschool.drivergroup')),
+                ('student', models.ForeignKey(limit_choices_to={'user_type': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='autoschool.customuser')),
+            ],
+            options={
+                'unique_together': {('group', 'student')},
+            },
+        ),
+    ]
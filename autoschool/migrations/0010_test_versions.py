@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0009_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('questions', models.JSONField()),
+                ('answer_key', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('published_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='autoschool.customuser')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='autoschool.test')),
+            ],
+            options={
+                'unique_together': {('test', 'number')},
+            },
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='published_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='autoschool.testversion'),
+        ),
+        migrations.AddField(
+            model_name='testattempt',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='attempts', to='autoschool.testversion'),
+        ),
+        migrations.AddField(
+            model_name='testresult',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='results', to='autoschool.testversion'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0010_test_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drivergroup',
+            name='leaderboard_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
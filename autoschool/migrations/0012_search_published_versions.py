@@ -0,0 +1,58 @@
+from django.db import migrations
+
+
+def fill_search_table(schema_editor, slots, versions):
+    schema_editor.execute('DELETE FROM autoschool_search')
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        f"SELECT id * {slots} + 1, title, content, id, NULL FROM autoschool_lecture"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        f"SELECT id * {slots} + 2, '', text, NULL, test_id FROM autoschool_question"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        f"SELECT a.id * {slots} + 3, '', a.text, NULL, q.test_id "
+        "FROM autoschool_answer a JOIN autoschool_question q ON q.id = a.question_id"
+    )
+    if not versions:
+        return
+    # Вопросы и ответы опубликованных версий — с кодом на 4 больше, чем у черновика
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        "SELECT json_extract(question.value, '$.id') * 8 + 6, '', json_extract(question.value, '$.text'), "
+        "NULL, t.id "
+        "FROM autoschool_test t JOIN autoschool_testversion v ON v.id = t.published_version_id, "
+        "json_each(v.questions) AS question"
+    )
+    schema_editor.execute(
+        "INSERT INTO autoschool_search (rowid, title, body, lecture_id, test_id) "
+        "SELECT json_extract(answer.value, '$.id') * 8 + 7, '', json_extract(answer.value, '$.text'), "
+        "NULL, t.id "
+        "FROM autoschool_test t JOIN autoschool_testversion v ON v.id = t.published_version_id, "
+        "json_each(v.questions) AS question, json_each(question.value, '$.answers') AS answer"
+    )
+
+
+def index_published_versions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    fill_search_table(schema_editor, 8, versions=True)
+
+
+def drop_published_versions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    fill_search_table(schema_editor, 4, versions=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0011_leaderboard_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_published_versions, drop_published_versions),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-17 21:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations, models
+
+
+def create_cache_tables(apps, schema_editor):
+    # Таблицы DatabaseCache из CACHES; для кэшей других типов команда ничего не делает
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0012_search_published_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='UserVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='versions', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('visibility', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
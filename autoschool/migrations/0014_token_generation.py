@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0013_cache_and_user_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userversion',
+            name='tokens',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,90 @@
+import datetime
+
+from django.db import migrations
+from django.utils import timezone
+
+# Таблицы, которые до AUTH_USER_MODEL = 'autoschool.CustomUser' ссылались на auth_user
+USER_REFERENCES = [
+    ('authtoken', 'Token'),
+    ('admin', 'LogEntry'),
+]
+
+
+def stale_references(apps, connection):
+    """Модели, чей user_id в базе всё ещё ссылается на auth_user."""
+    stale = []
+    with connection.cursor() as cursor:
+        for app_label, model_name in USER_REFERENCES:
+            model = apps.get_model(app_label, model_name)
+            relations = connection.introspection.get_relations(cursor, model._meta.db_table)
+            if relations.get('user_id', (None, None))[1] == 'auth_user':
+                stale.append(model)
+    return stale
+
+
+def aware(value):
+    # SQLite отдаёт время из сырого запроса без пояса; хранится оно в UTC
+    if value is None or timezone.is_aware(value):
+        return value
+    return timezone.make_aware(value, datetime.timezone.utc)
+
+
+def copy_auth_users(apps, connection):
+    """Переносит учётные записи auth_user в CustomUser; возвращает {старый id: новый id}."""
+    CustomUser = apps.get_model('autoschool', 'CustomUser')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT id, password, last_login, is_superuser, username, first_name, last_name, '
+            'email, is_staff, is_active, date_joined FROM auth_user'
+        )
+        rows = cursor.fetchall()
+    mapping = {}
+    for (old_id, password, last_login, is_superuser, username, first_name, last_name,
+         email, is_staff, is_active, date_joined) in rows:
+        # Совпадающий логин считаем тем же человеком
+        user, _ = CustomUser.objects.get_or_create(username=username, defaults={
+            'password': password, 'last_login': aware(last_login), 'is_superuser': is_superuser,
+            'first_name': first_name, 'last_name': last_name, 'email': email,
+            'is_staff': is_staff, 'is_active': is_active, 'date_joined': aware(date_joined),
+            'user_type': 'admin' if is_staff or is_superuser else 'student',
+        })
+        mapping[old_id] = user.pk
+    return mapping
+
+
+def move_auth_user_references(apps, schema_editor):
+    connection = schema_editor.connection
+    stale = stale_references(apps, connection)
+    if not stale:
+        # Новая база: таблицы созданы уже со ссылкой на CustomUser
+        return
+    mapping = copy_auth_users(apps, connection)
+    AuthUser = apps.get_model('auth', 'User')
+    for model in stale:
+        new_field = model._meta.get_field('user')
+        old_field = new_field.clone()
+        old_field.set_attributes_from_name('user')
+        old_field.model = model
+        old_field.remote_field.model = AuthUser
+        schema_editor.alter_field(model, old_field, new_field)
+        table = schema_editor.quote_name(model._meta.db_table)
+        # Через отрицательные id, чтобы не задеть уникальный user_id у токенов
+        for old_id, new_id in mapping.items():
+            schema_editor.execute(f'UPDATE {table} SET user_id = %s WHERE user_id = %s', [-new_id, old_id])
+        schema_editor.execute(f'UPDATE {table} SET user_id = -user_id WHERE user_id < 0')
+    # Сессии хранят id из auth_user — проще попросить всех войти заново
+    apps.get_model('sessions', 'Session').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0014_token_generation'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+        ('admin', '0003_logentry_add_action_flag_choices'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_auth_user_references, migrations.RunPython.noop),
+    ]
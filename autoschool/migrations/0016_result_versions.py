@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autoschool', '0015_move_auth_user_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userversion',
+            name='results',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
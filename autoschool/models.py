@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 
 
@@ -49,6 +50,14 @@ class DriverGroup(models.Model):
     )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Версия рейтинга группы (autoschool.leaderboard): сдвигается в одной транзакции
+    # с изменением LeaderboardEntry, по ней процессы сверяют рейтинг в памяти
+    leaderboard_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -87,6 +96,11 @@ class Lecture(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -95,6 +109,11 @@ class LectureImage(models.Model):
     lecture = models.ForeignKey(Lecture, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='lectures/')
     caption = models.CharField(max_length=200, blank=True)
+    # Заполняются фоновой обработкой (autoschool.images)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.lecture.title}"
@@ -110,9 +129,27 @@ class Test(models.Model):
         limit_choices_to={'user_type__in': ['admin', 'instructor']}
     )
     groups = models.ManyToManyField(DriverGroup, related_name='tests')
+    # Экзаменационный билет: каждая попытка получает ticket_size случайных вопросов
+    # из банка теста (None — все вопросы), при ticket_by_topic — пропорционально темам
+    ticket_size = models.PositiveIntegerField(null=True, blank=True)
+    ticket_by_topic = models.BooleanField(default=False)
+    # Версия, которую видят курсанты и по которой проверяются ответы; живые
+    # вопросы и ответы теста — черновик следующей версии (autoschool.versions)
+    published_version = models.ForeignKey(
+        'TestVersion',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -120,7 +157,13 @@ class Test(models.Model):
 class Question(models.Model):
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='questions')
     text = models.TextField()
+    topic = models.CharField(max_length=100, blank=True)
     image = models.ImageField(upload_to='questions/', blank=True, null=True)
+    # Заполняются фоновой обработкой (autoschool.images)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Question {self.id} for {self.test.title}"
@@ -135,6 +178,30 @@ class Answer(models.Model):
         return f"Answer {self.id} for Question {self.question.id}"
 
 
+class TestVersion(models.Model):
+    """Опубликованный снимок теста. Не меняется: правки идут в черновик."""
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='versions')
+    number = models.PositiveIntegerField()
+    # Вопросы в представлении для курсанта (без признака правильного ответа)
+    questions = models.JSONField()
+    # {id вопроса: [id верных ответов]} в порядке вопросов
+    answer_key = models.JSONField()
+    published_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('test', 'number')
+
+    def __str__(self):
+        return f"{self.test_id} v{self.number}"
+
+
 class TestResult(models.Model):
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='results')
     student = models.ForeignKey(
@@ -145,7 +212,239 @@ class TestResult(models.Model):
     )
     score = models.IntegerField()
     max_score = models.IntegerField()
+    # Версия, по ключу которой проверен результат (None — проверен по черновику)
+    version = models.ForeignKey(
+        TestVersion,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='results'
+    )
     date_taken = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_taken', 'id']),
+            models.Index(fields=['student', 'date_taken', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.test.title}: {self.score}/{self.max_score}"
+
+
+class TestAttempt(models.Model):
+    """Выданный курсанту билет: seed и id вопросов в порядке выдачи."""
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='attempts')
+    student = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='test_attempts',
+        limit_choices_to={'user_type': 'student'}
+    )
+    seed = models.BigIntegerField()
+    question_ids = models.JSONField()
+    version = models.ForeignKey(
+        TestVersion,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='attempts'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Attempt {self.pk} of {self.student_id} on {self.test_id}"
+
+
+class AnswerAttempt(models.Model):
+    """Журнал ответов: какой вариант выбран на каждый вопрос в попытке (только добавление)."""
+    result = models.ForeignKey(TestResult, on_delete=models.CASCADE, related_name='answer_attempts')
+    # Без внешних ключей: журнал компактный и переживает правку вопросов
+    question_id = models.BigIntegerField()
+    answer_id = models.BigIntegerField(null=True, blank=True)
+    is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question_id', 'is_correct']),
+        ]
+
+    def __str__(self):
+        return f"Result {self.result_id}: question {self.question_id} -> {self.answer_id}"
+
+
+class QuestionStats(models.Model):
+    """Накопительные данные для анализа заданий (трудность и дискриминативность)."""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    # Суммы доли набранных баллов за весь тест: по всем попыткам и по ответившим верно
+    total_sum = models.FloatField(default=0)
+    total_sq_sum = models.FloatField(default=0)
+    correct_total_sum = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+    @property
+    def difficulty(self):
+        if not self.attempts:
+            return None
+        return self.correct / self.attempts
+
+    @property
+    def discrimination(self):
+        """Точечно-бисериальная корреляция верного ответа с итогом теста."""
+        n, n1 = self.attempts, self.correct
+        if not n or n1 in (0, n):
+            return None
+        mean = self.total_sum / n
+        variance = self.total_sq_sum / n - mean ** 2
+        if variance <= 0:
+            return None
+        mean_correct = self.correct_total_sum / n1
+        mean_wrong = (self.total_sum - self.correct_total_sum) / (n - n1)
+        p = n1 / n
+        return (mean_correct - mean_wrong) / variance ** 0.5 * (p * (1 - p)) ** 0.5
+
+
+class ResultStats(models.Model):
+    """Накопительные показатели по результатам тестов (обновляются при каждой сдаче)."""
+    attempts = models.PositiveIntegerField(default=0)
+    passed = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    score_sq_sum = models.BigIntegerField(default=0)
+    max_score_sum = models.BigIntegerField(default=0)
+    best_score = models.IntegerField(default=0)
+    last_score = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def mean(self):
+        if not self.attempts:
+            return None
+        return self.score_sum / self.attempts
+
+    @property
+    def variance(self):
+        if not self.attempts:
+            return None
+        return max(self.score_sq_sum / self.attempts - self.mean ** 2, 0.0)
+
+    @property
+    def pass_rate(self):
+        if not self.attempts:
+            return None
+        return self.passed / self.attempts
+
+    @property
+    def average_ratio(self):
+        if not self.max_score_sum:
+            return None
+        return self.score_sum / self.max_score_sum
+
+
+class TestStats(ResultStats):
+    test = models.OneToOneField(Test, on_delete=models.CASCADE, related_name='stats')
+
+    def __str__(self):
+        return f"Stats for {self.test_id}"
+
+
+class GroupTestStats(ResultStats):
+    group = models.ForeignKey(DriverGroup, on_delete=models.CASCADE, related_name='test_stats')
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='group_stats')
+
+    class Meta:
+        unique_together = ('group', 'test')
+
+    def __str__(self):
+        return f"Stats for {self.test_id} in group {self.group_id}"
+
+
+class StudentTestStats(ResultStats):
+    student = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='test_stats',
+        limit_choices_to={'user_type': 'student'}
+    )
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='student_stats')
+
+    class Meta:
+        unique_together = ('student', 'test')
+
+    def __str__(self):
+        return f"Stats for {self.test_id} of student {self.student_id}"
+
+
+class LeaderboardEntry(models.Model):
+    """Строка рейтинга группы: лучшие баллы курсанта по назначенным группе тестам."""
+    group = models.ForeignKey(DriverGroup, on_delete=models.CASCADE, related_name='leaderboard')
+    student = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        limit_choices_to={'user_type': 'student'}
+    )
+    tests_taken = models.PositiveIntegerField(default=0)
+    best_score_sum = models.BigIntegerField(default=0)
+    max_score_sum = models.BigIntegerField(default=0)
+    # Средний процент лучших попыток: best_score_sum / max_score_sum * 100
+    rating = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('group', 'student')
+
+    def __str__(self):
+        return f"{self.student_id} in group {self.group_id}: {self.rating}"
+
+
+class ContentVisibility(models.Model):
+    """Материализованный индекс: какие лекции и тесты видит курсант через свои группы."""
+    student = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='visible_content'
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+
+    class Meta:
+        unique_together = ('student', 'content_type', 'object_id')
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} -> {self.content_type_id}:{self.object_id}"
+
+
+class UserVersion(models.Model):
+    """Версии данных пользователя для ETag и кэша токенов.
+
+    Хранятся в базе, а не в кэше: сброс у многих курсантов — один запрос.
+    Отдельно от CustomUser, чтобы save() пользователя не записывал поверх
+    устаревшие значения.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='versions'
+    )
+    # Сдвигается при изменении групп курсанта (набора видимых ему объектов)
+    visibility = models.PositiveBigIntegerField(default=0)
+    # Поколение для кэша токенов (autoschool.authentication): сдвигается при смене
+    # пароля, роли, активности или групп, и закэшированные записи перестают приниматься
+    tokens = models.PositiveBigIntegerField(default=0)
+    # Сдвигается, когда у курсанта появляются или пересчитываются результаты тестов
+    results = models.PositiveBigIntegerField(default=0)
+
     def __str__(self):
-        return f"{self.student.username} - {self.test.title}: {self.score}/{self.max_score}"
\ No newline at end of file
+        return f"Versions of {self.user_id}"
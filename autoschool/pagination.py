@@ -0,0 +1,96 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по индексированным ключам, без OFFSET.
+
+    Курсор хранит значения всех полей сортировки у крайней записи страницы,
+    а следующая страница выбирается сравнением кортежей: для ('-created_at',
+    '-id') это created_at < X OR (created_at = X AND id < Y). Последнее поле
+    уникально, поэтому при совпадающих created_at смещение не нужно.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = [_flip(name) for name in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(self.cursor.position, ordering))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            values = json.loads(cursor.position)
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def _position(self, instance):
+        return json.dumps([field.value_to_string(instance) for field in self.fields])
+
+    def _after(self, position, ordering):
+        # Кортежное сравнение, раскрытое с конца: (a, b) < (x, y) <=> a < x OR (a = x AND b < y)
+        condition = None
+        for name, value in reversed(list(zip(ordering, position))):
+            field = name.lstrip('-')
+            step = Q(**{f'{field}__{"lt" if name.startswith("-") else "gt"}': value})
+            condition = step if condition is None else step | (Q(**{field: value}) & condition)
+        # Граница по первому полю отдельно — по ней индекс читается диапазоном
+        first = ordering[0]
+        bound = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': position[0]})
+        return bound & condition
+
+
+def _flip(name):
+    return name[1:] if name.startswith('-') else f'-{name}'
+
+
+class IdPagination(KeysetPagination):
+    ordering = ('-id',)
+
+
+class TestResultPagination(KeysetPagination):
+    ordering = ('-date_taken', '-id')
@@ -0,0 +1,43 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from rest_framework.renderers import JSONRenderer
+
+from .models import Test
+from .serializers import StudentTestSerializer
+
+STUDENT_PAYLOAD_CACHE_KEY = 'autoschool:test_payload:{test_id}:{version}'
+
+
+def content_version(test):
+    # updated_at теста сдвигается и при изменении его вопросов и ответов (см. signals)
+    return int(test.updated_at.timestamp() * 1_000_000)
+
+
+def render_student_payload(test_id):
+    test = Test.objects.get(pk=test_id)
+    # У теста-банка вопросы в представление не входят, у опубликованного берутся
+    # из версии (см. TicketBankSerializer) — живые вопросы нужны только черновику
+    live = not (test.ticket_size or test.published_version_id)
+    prefetch_related_objects([test], 'groups', *(('questions__answers',) if live else ()))
+    return JSONRenderer().render(StudentTestSerializer(test).data)
+
+
+def get_student_payload(test):
+    """JSON-представление теста для курсанта (без is_correct), готовое к отдаче."""
+    cache_key = STUDENT_PAYLOAD_CACHE_KEY.format(test_id=test.id, version=content_version(test))
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = render_student_payload(test.id)
+        cache.set(cache_key, payload, getattr(settings, 'AUTOSCHOOL_PAYLOAD_CACHE_TIMEOUT', 24 * 60 * 60))
+    return payload
+
+
+async def aget_student_payload(test):
+    cache_key = STUDENT_PAYLOAD_CACHE_KEY.format(test_id=test.id, version=content_version(test))
+    payload = await cache.aget(cache_key)
+    if payload is None:
+        payload = await sync_to_async(render_student_payload)(test.id)
+        await cache.aset(cache_key, payload, getattr(settings, 'AUTOSCHOOL_PAYLOAD_CACHE_TIMEOUT', 24 * 60 * 60))
+    return payload
@@ -10,4 +10,19 @@ class IsInstructorUser(permissions.BasePermission):
 
 class IsStudentUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.user_type == 'student'
\ No newline at end of file
+        return request.user.is_authenticated and request.user.user_type == 'student'
+
+
+def user_creation_error(user, user_type):
+    """Сообщение об ошибке, если user не может создавать пользователей типа user_type."""
+    if user_type == 'admin':
+        if not user.has_perm('autoschool.create_admin'):
+            return 'У вас нет прав на создание администраторов'
+    elif user_type == 'instructor':
+        if not (user.user_type == 'admin' or user.has_perm('autoschool.create_instructor')):
+            return 'У вас нет прав на создание инструкторов'
+    elif user_type == 'student':
+        if not (user.user_type in ['admin', 'instructor'] or
+                user.has_perm('autoschool.create_student')):
+            return 'У вас нет прав на создание курсантов'
+    return None
@@ -0,0 +1,213 @@
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Answer, ContentVisibility, Lecture, Question, Test, TestVersion
+
+# Код типа входит в rowid записи: rowid = id объекта * KIND_SLOTS + код.
+# Вопросы и ответы опубликованной версии индексируются отдельно от черновика
+# с кодом на PUBLISHED больше: курсанты ищут по версии, персонал — по черновику.
+PUBLISHED = 4
+KINDS = {
+    'lecture': 1, 'question': 2, 'answer': 3,
+    'published_question': 2 + PUBLISHED, 'published_answer': 3 + PUBLISHED,
+}
+KIND_NAMES = {code: name for name, code in KINDS.items() if code < PUBLISHED}
+KIND_SLOTS = 8
+
+BATCH_SIZE = 500
+
+
+def match_expression(query):
+    """Запрос пользователя -> выражение MATCH: все слова, каждое как префикс."""
+    tokens = re.findall(r'\w+', query)
+    return ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+
+
+class SearchBackend:
+    """Интерфейс поискового индекса; реализация выбирается AUTOSCHOOL_SEARCH_BACKEND."""
+
+    def index(self, documents):
+        """documents: (kind, object_id, lecture_id, test_id, title, body)."""
+        raise NotImplementedError
+
+    def remove(self, kind, object_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, student=None, kinds=None, limit=20):
+        """Список совпадений, лучшие первыми; для курсанта — только видимые ему."""
+        raise NotImplementedError
+
+    def filter(self, queryset, kind, query):
+        """queryset, суженный до всех совпавших объектов kind (черновиков), без лимита."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    table = 'autoschool_search'
+
+    @staticmethod
+    def _rowid(kind, object_id):
+        return object_id * KIND_SLOTS + KINDS[kind]
+
+    def index(self, documents):
+        documents = iter(documents)
+        with transaction.atomic(), connection.cursor() as cursor:
+            while chunk := list(islice(documents, BATCH_SIZE)):
+                rowids = [self._rowid(kind, object_id) for kind, object_id, *_ in chunk]
+                cursor.execute(
+                    f'DELETE FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(rowids))})',
+                    rowids
+                )
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, title, body, lecture_id, test_id) '
+                    f'VALUES (%s, %s, %s, %s, %s)',
+                    [(rowid, title, body, lecture_id, test_id)
+                     for rowid, (_, _, lecture_id, test_id, title, body) in zip(rowids, chunk)]
+                )
+
+    def remove(self, kind, object_ids):
+        rowids = [self._rowid(kind, object_id) for object_id in object_ids]
+        if not rowids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(rowids))})',
+                rowids
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def filter(self, queryset, kind, query):
+        expression = match_expression(query)
+        if not expression:
+            return queryset.none()
+        # Подзапрос к индексу в том же SQL: id не выгружаются в Python и не обрезаются лимитом
+        matching = RawSQL(
+            f'SELECT rowid / {KIND_SLOTS} FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid %% {KIND_SLOTS} = %s',
+            [expression, KINDS[kind]]
+        )
+        return queryset.filter(pk__in=matching)
+
+    def search(self, query, student=None, kinds=None, limit=20):
+        expression = match_expression(query)
+        if not expression:
+            return []
+        where = [f'{self.table} MATCH %s']
+        params = [expression]
+        if kinds:
+            where.append(f'(rowid %% {KIND_SLOTS} %% {PUBLISHED}) IN ({", ".join(["%s"] * len(kinds))})')
+            params.extend(KINDS[kind] for kind in kinds)
+        if student is None:
+            where.append(f'(rowid %% {KIND_SLOTS}) < {PUBLISHED}')
+        else:
+            # Та же видимость, что у LectureViewSet/TestViewSet: через индекс ContentVisibility.
+            # У опубликованного теста курсант видит версию, черновик — только у неопубликованного
+            visible = (f'SELECT object_id FROM {ContentVisibility._meta.db_table} '
+                       f'WHERE student_id = %s AND content_type_id = %s')
+            published = f'SELECT id FROM {Test._meta.db_table} WHERE published_version_id IS NOT NULL'
+            where.append(
+                f'(lecture_id IN ({visible}) OR (test_id IN ({visible}) AND '
+                f'((rowid %% {KIND_SLOTS}) >= {PUBLISHED} OR test_id NOT IN ({published}))))'
+            )
+            params.extend([
+                student.pk, ContentType.objects.get_for_model(Lecture).pk,
+                student.pk, ContentType.objects.get_for_model(Test).pk,
+            ])
+        sql = (
+            f'SELECT rowid, lecture_id, test_id, title, '
+            f"snippet({self.table}, -1, '[', ']', '…', 12), bm25({self.table}, 10.0, 1.0) AS rank "
+            f'FROM {self.table} WHERE {" AND ".join(where)} ORDER BY rank LIMIT %s'
+        )
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {
+                'type': KIND_NAMES[rowid % KIND_SLOTS % PUBLISHED],
+                'id': rowid // KIND_SLOTS,
+                'lecture': lecture_id,
+                'test': test_id,
+                'title': title,
+                'snippet': snippet,
+                'rank': rank,
+            }
+            for rowid, lecture_id, test_id, title, snippet, rank in rows
+        ]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'AUTOSCHOOL_SEARCH_BACKEND', 'autoschool.search.SQLiteFTSBackend')
+        _backend = import_string(path)()
+    return _backend
+
+
+def lecture_documents(lectures):
+    for lecture in lectures:
+        yield 'lecture', lecture.pk, lecture.pk, None, lecture.title, lecture.content
+
+
+def question_documents(questions):
+    for question in questions:
+        yield 'question', question.pk, None, question.test_id, '', question.text
+
+
+def answer_documents(rows):
+    """rows: (id ответа, id теста, текст)."""
+    for answer_id, test_id, text in rows:
+        yield 'answer', answer_id, None, test_id, '', text
+
+
+def version_documents(test_id, questions):
+    """Вопросы и ответы опубликованной версии (TestVersion.questions)."""
+    for question in questions:
+        yield 'published_question', question['id'], None, test_id, '', question['text']
+        for answer in question['answers']:
+            yield 'published_answer', answer['id'], None, test_id, '', answer['text']
+
+
+def replace_version(test_id, old_questions, new_questions):
+    """Заменяет в индексе документы прежней опубликованной версии теста на новую."""
+    backend = get_backend()
+    if old_questions:
+        backend.remove('published_question', [question['id'] for question in old_questions])
+        backend.remove('published_answer', [
+            answer['id'] for question in old_questions for answer in question['answers']
+        ])
+    backend.index(version_documents(test_id, new_questions or []))
+
+
+def rebuild():
+    backend = get_backend()
+    with transaction.atomic():
+        backend.clear()
+        backend.index(lecture_documents(Lecture.objects.only('id', 'title', 'content').iterator()))
+        backend.index(question_documents(Question.objects.only('id', 'test_id', 'text').iterator()))
+        backend.index(answer_documents(
+            Answer.objects.values_list('id', 'question__test_id', 'text').iterator()
+        ))
+        versions = TestVersion.objects.filter(test__published_version=F('pk')).values_list('test_id', 'questions')
+        for test_id, questions in versions.iterator():
+            backend.index(version_documents(test_id, questions))
+
+
+def filter_matching(queryset, kind, query):
+    return get_backend().filter(queryset, kind, query)
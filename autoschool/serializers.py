@@ -1,12 +1,21 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from .fieldsets import SparseFieldsMixin
+from .images import variant_urls
+from .instrumentation import TimedSerializerMixin
 from .models import (
     CustomUser, DriverGroup, StudentGroup, Lecture,
-    LectureImage, Test, Question, Answer, TestResult
+    LectureImage, Test, Question, Answer, TestResult,
+    TestStats, GroupTestStats, StudentTestStats, TestAttempt, TestVersion
 )
+from .versions import published_questions
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class BaseModelSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+class CustomUserSerializer(BaseModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
 
     class Meta:
@@ -31,55 +40,160 @@ class CustomUserSerializer(serializers.ModelSerializer):
         return user
 
 
-class DriverGroupSerializer(serializers.ModelSerializer):
+class DriverGroupSerializer(BaseModelSerializer):
     class Meta:
         model = DriverGroup
         fields = ('id', 'name', 'description', 'instructor', 'created_at')
 
 
-class StudentGroupSerializer(serializers.ModelSerializer):
+class StudentGroupSerializer(BaseModelSerializer):
     class Meta:
         model = StudentGroup
         fields = ('id', 'student', 'group')
 
 
-class LectureImageSerializer(serializers.ModelSerializer):
+class LectureImageSerializer(BaseModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = LectureImage
-        fields = ('id', 'image', 'caption')
+        fields = ('id', 'image', 'caption', 'image_width', 'image_height', 'variants')
+        read_only_fields = ('image_width', 'image_height')
 
+    def get_variants(self, obj):
+        return variant_urls(obj)
 
-class LectureSerializer(serializers.ModelSerializer):
+
+class LectureSerializer(BaseModelSerializer):
     images = LectureImageSerializer(many=True, read_only=True)
+    expandable_fields = ('images',)
 
     class Meta:
         model = Lecture
         fields = ('id', 'title', 'content', 'author', 'groups', 'created_at', 'updated_at', 'images')
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(BaseModelSerializer):
     class Meta:
         model = Answer
         fields = ('id', 'text', 'is_correct')
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(BaseModelSerializer):
     answers = AnswerSerializer(many=True, read_only=True)
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Question
-        fields = ('id', 'text', 'image', 'answers')
+        fields = ('id', 'text', 'topic', 'image', 'image_width', 'image_height', 'variants', 'answers')
+        read_only_fields = ('image_width', 'image_height')
+
+    def get_variants(self, obj):
+        return variant_urls(obj)
 
 
-class TestSerializer(serializers.ModelSerializer):
+class TestSerializer(BaseModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
+    expandable_fields = ('questions',)
 
     class Meta:
         model = Test
-        fields = ('id', 'title', 'description', 'author', 'groups', 'created_at', 'updated_at', 'questions')
+        fields = ('id', 'title', 'description', 'author', 'groups', 'ticket_size', 'ticket_by_topic',
+                  'published_version', 'created_at', 'updated_at', 'questions')
+        read_only_fields = ('published_version',)
+
+
+class StudentAnswerSerializer(BaseModelSerializer):
+    class Meta:
+        model = Answer
+        fields = ('id', 'text')
+
+
+class StudentQuestionSerializer(BaseModelSerializer):
+    answers = StudentAnswerSerializer(many=True, read_only=True)
+    variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Question
+        fields = ('id', 'text', 'topic', 'image', 'image_width', 'image_height', 'variants', 'answers')
+        read_only_fields = ('image_width', 'image_height')
+
+    def get_variants(self, obj):
+        return variant_urls(obj)
+
+
+class PublishedQuestions(list):
+    """Вопросы опубликованной версии — уже в представлении для курсанта."""
 
 
-class TestResultSerializer(serializers.ModelSerializer):
+class TicketBankSerializer(serializers.ListSerializer):
+    def get_attribute(self, instance):
+        # Банк билетов курсанту не отдаём: вопросы своего билета он получает в start_attempt
+        if instance.ticket_size:
+            return []
+        # Опубликованный тест курсант видит таким, каким его заморозили, а не черновик
+        if instance.published_version_id:
+            return PublishedQuestions(published_questions(instance.published_version_id))
+        return super().get_attribute(instance)
+
+    def to_representation(self, data):
+        if isinstance(data, PublishedQuestions):
+            return list(data)
+        return super().to_representation(data)
+
+
+class StudentTestSerializer(BaseModelSerializer):
+    # Представление теста для курсантов: без признака правильного ответа
+    questions = TicketBankSerializer(child=StudentQuestionSerializer(), read_only=True)
+    expandable_fields = ('questions',)
+
+    class Meta:
+        model = Test
+        fields = ('id', 'title', 'description', 'author', 'groups', 'ticket_size',
+                  'created_at', 'updated_at', 'questions')
+
+
+class TestAttemptSerializer(BaseModelSerializer):
+    class Meta:
+        model = TestAttempt
+        fields = ('id', 'test', 'created_at', 'submitted_at')
+
+
+class TestVersionSerializer(BaseModelSerializer):
+    class Meta:
+        model = TestVersion
+        fields = ('id', 'test', 'number', 'published_by', 'created_at')
+
+
+class TestResultSerializer(BaseModelSerializer):
     class Meta:
         model = TestResult
-        fields = ('id', 'test', 'student', 'score', 'max_score', 'date_taken')
\ No newline at end of file
+        fields = ('id', 'test', 'student', 'score', 'max_score', 'version', 'date_taken')
+
+
+class ResultStatsSerializer(BaseModelSerializer):
+    mean = serializers.FloatField(read_only=True)
+    variance = serializers.FloatField(read_only=True)
+    pass_rate = serializers.FloatField(read_only=True)
+    average_ratio = serializers.FloatField(read_only=True)
+
+    stats_fields = ('attempts', 'passed', 'best_score', 'last_score', 'score_sum', 'score_sq_sum',
+                    'max_score_sum', 'mean', 'variance', 'pass_rate', 'average_ratio', 'updated_at')
+
+
+class TestStatsSerializer(ResultStatsSerializer):
+    class Meta:
+        model = TestStats
+        fields = ('id', 'test') + ResultStatsSerializer.stats_fields
+
+
+class GroupTestStatsSerializer(ResultStatsSerializer):
+    class Meta:
+        model = GroupTestStats
+        fields = ('id', 'group', 'test') + ResultStatsSerializer.stats_fields
+
+
+class StudentTestStatsSerializer(ResultStatsSerializer):
+    class Meta:
+        model = StudentTestStats
+        fields = ('id', 'student', 'test') + ResultStatsSerializer.stats_fields
@@ -0,0 +1,187 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import images, leaderboard, search, versions, visibility
+from .authentication import token_cache
+from .conditional import bump_collection
+from .models import (
+    Answer, CustomUser, DriverGroup, Lecture, LectureImage, Question, StudentGroup, Test
+)
+
+
+def test_content_changed(test_id):
+    """Сдвигает updated_at теста — версию его содержимого в ключах кэша представления и ответов."""
+    Test.objects.filter(pk=test_id).update(updated_at=timezone.now())
+    bump_collection(Test)
+
+
+def lecture_content_changed(lecture_id):
+    """Сдвигает updated_at лекции при изменении её изображений."""
+    Lecture.objects.filter(pk=lecture_id).update(updated_at=timezone.now())
+    bump_collection(Lecture)
+
+
+def _changed_group_links(instance, action, reverse, pk_set, related_name):
+    """id лекций или тестов, у которых изменился набор групп, либо None, если ждать post_*."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            return [instance.pk]
+        return None
+    # Изменение со стороны DriverGroup: при очистке id известны только до неё
+    if action == 'pre_clear':
+        instance._cleared_ids = list(getattr(instance, related_name).values_list('id', flat=True))
+        return None
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_ids', [])
+    if action in ('post_add', 'post_remove'):
+        return list(pk_set)
+    return None
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    test_content_changed(instance.test_id)
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    test_id = Question.objects.filter(id=instance.question_id).values_list('test_id', flat=True).first()
+    if test_id is not None:
+        test_content_changed(test_id)
+
+
+@receiver(m2m_changed, sender=Test.groups.through)
+def test_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    test_ids = _changed_group_links(instance, action, reverse, pk_set, 'tests')
+    if test_ids is None:
+        return
+    Test.objects.filter(pk__in=test_ids).update(updated_at=timezone.now())
+    bump_collection(Test)
+    visibility.refresh_objects(Test, test_ids)
+
+
+@receiver(m2m_changed, sender=Lecture.groups.through)
+def lecture_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    lecture_ids = _changed_group_links(instance, action, reverse, pk_set, 'lectures')
+    if lecture_ids is None:
+        return
+    Lecture.objects.filter(pk__in=lecture_ids).update(updated_at=timezone.now())
+    bump_collection(Lecture)
+    visibility.refresh_objects(Lecture, lecture_ids)
+
+
+@receiver(m2m_changed, sender=Test.groups.through)
+def test_groups_leaderboard_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Рейтинг группы считается по назначенным ей тестам
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            leaderboard.refresh_groups([instance.pk])
+    elif action == 'pre_clear':
+        instance._leaderboard_group_ids = list(instance.groups.values_list('id', flat=True))
+    elif action == 'post_clear':
+        leaderboard.refresh_groups(getattr(instance, '_leaderboard_group_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        leaderboard.refresh_groups(pk_set)
+
+
+@receiver(pre_delete, sender=Test)
+def test_deleting(sender, instance, **kwargs):
+    # Связи с группами и сводки курсантов удаляются каскадом без m2m_changed
+    instance._leaderboard_group_ids = list(instance.groups.values_list('id', flat=True))
+    # Документы черновика уходят вместе с вопросами, опубликованной версии — здесь
+    if instance.published_version_id:
+        search.replace_version(instance.pk, versions.published_questions(instance.published_version_id), None)
+
+
+@receiver(post_delete, sender=Test)
+def test_deleted(sender, instance, **kwargs):
+    leaderboard.refresh_groups(getattr(instance, '_leaderboard_group_ids', []))
+
+
+@receiver(pre_delete, sender=DriverGroup)
+def group_deleted(sender, instance, **kwargs):
+    # Связи с группой удаляются каскадом без m2m_changed, а список groups — часть представления
+    now = timezone.now()
+    Lecture.objects.filter(groups=instance).update(updated_at=now)
+    Test.objects.filter(groups=instance).update(updated_at=now)
+    bump_collection(Lecture)
+    bump_collection(Test)
+
+
+@receiver([post_save, post_delete], sender=DriverGroup)
+@receiver([post_save, post_delete], sender=Lecture)
+@receiver([post_save, post_delete], sender=Test)
+def visible_content_changed(sender, instance, **kwargs):
+    bump_collection(sender)
+
+
+@receiver([post_save, post_delete], sender=LectureImage)
+def lecture_image_changed(sender, instance, **kwargs):
+    lecture_content_changed(instance.lecture_id)
+
+
+@receiver([post_save, post_delete], sender=StudentGroup)
+def student_group_changed(sender, instance, **kwargs):
+    visibility.refresh_students([instance.student_id])
+    token_cache.invalidate_users([instance.student_id])
+
+
+@receiver(post_save, sender=StudentGroup)
+def student_joined_group(sender, instance, created, **kwargs):
+    if created:
+        leaderboard.refresh_members(instance.group_id, [instance.student_id])
+
+
+@receiver(post_delete, sender=StudentGroup)
+def student_left_group(sender, instance, **kwargs):
+    leaderboard.remove_members(instance.group_id, [instance.student_id])
+
+
+@receiver(post_delete, sender=Lecture)
+@receiver(post_delete, sender=Test)
+def visible_content_deleted(sender, instance, **kwargs):
+    visibility.drop_objects(sender, [instance.pk])
+
+
+@receiver(post_save, sender=LectureImage)
+@receiver(post_save, sender=Question)
+def image_saved(sender, instance, **kwargs):
+    if images.needs_processing(instance):
+        images.schedule(instance)
+
+
+@receiver(post_save, sender=Lecture)
+def lecture_indexed(sender, instance, **kwargs):
+    search.get_backend().index(search.lecture_documents([instance]))
+
+
+@receiver(post_save, sender=Question)
+def question_indexed(sender, instance, **kwargs):
+    search.get_backend().index(search.question_documents([instance]))
+
+
+@receiver(post_save, sender=Answer)
+def answer_indexed(sender, instance, **kwargs):
+    test_id = Question.objects.filter(id=instance.question_id).values_list('test_id', flat=True).first()
+    search.get_backend().index(search.answer_documents([(instance.pk, test_id, instance.text)]))
+
+
+@receiver(post_delete, sender=Lecture)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Answer)
+def search_document_deleted(sender, instance, **kwargs):
+    search.get_backend().remove(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    # Смена пароля, user_type или is_active должна сразу отзывать закэшированные токены.
+    # При удалении пользователя каскадом удаляются его токены (token_deleted)
+    token_cache.invalidate_users([instance.pk])
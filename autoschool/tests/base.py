@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from autoschool import leaderboard
+from autoschool.authentication import token_cache
+from autoschool.models import Answer, CustomUser, DriverGroup, Question, StudentGroup, Test
+
+
+class AutoschoolTestCase(TestCase):
+    """Общие данные: администратор, инструктор, группа с двумя курсантами,
+    курсант вне групп и тест из трёх вопросов (верен первый из трёх ответов)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Без паролей: хэширование заметно замедляет создание данных
+        cls.admin = CustomUser.objects.create(username='admin', user_type='admin')
+        cls.instructor = CustomUser.objects.create(username='instructor', user_type='instructor')
+        cls.student = CustomUser.objects.create(username='student', user_type='student')
+        cls.other_student = CustomUser.objects.create(username='student2', user_type='student')
+        cls.outsider = CustomUser.objects.create(username='outsider', user_type='student')
+        cls.group = DriverGroup.objects.create(name='Группа А', instructor=cls.instructor)
+        for student in (cls.student, cls.other_student):
+            StudentGroup.objects.create(student=student, group=cls.group)
+        cls.test = Test.objects.create(title='Знаки', author=cls.instructor)
+        cls.test.groups.add(cls.group)
+        cls.questions = [cls.create_question(cls.test, f'Вопрос {number}') for number in range(3)]
+        cls.test.refresh_from_db()
+
+    @staticmethod
+    def create_question(test, text, topic='', answers=3):
+        question = Question.objects.create(test=test, text=text, topic=topic)
+        for number in range(answers):
+            Answer.objects.create(question=question, text=f'{text}: ответ {number}', is_correct=number == 0)
+        return question
+
+    def setUp(self):
+        # Кэш, LRU токенов и рейтинги в памяти живут дольше транзакции теста
+        cache.clear()
+        token_cache.clear()
+        leaderboard._boards_clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def correct_answers(self, questions=None):
+        return {
+            str(question.pk): question.answers.get(is_correct=True).pk
+            for question in (self.questions if questions is None else questions)
+        }
+
+    def wrong_answers(self, questions=None):
+        return {
+            str(question.pk): question.answers.filter(is_correct=False).first().pk
+            for question in (self.questions if questions is None else questions)
+        }
@@ -0,0 +1,66 @@
+from autoschool import analytics
+from autoschool.grading import save_results
+from autoschool.models import GroupTestStats, StudentTestStats, TestResult, TestStats
+
+from .base import AutoschoolTestCase
+
+
+class RollupTests(AutoschoolTestCase):
+    def save(self, student, score):
+        save_results([TestResult(test=self.test, student=student, score=score, max_score=3)])
+
+    def rows(self):
+        fields = ('attempts', 'passed', 'score_sum', 'score_sq_sum', 'max_score_sum', 'best_score', 'last_score')
+        return {
+            model.__name__: sorted(model.objects.values_list(*fields))
+            for model in (TestStats, GroupTestStats, StudentTestStats)
+        }
+
+    def test_results_update_rollups_incrementally(self):
+        self.save(self.student, 3)
+        self.save(self.student, 1)
+        self.save(self.other_student, 2)
+
+        test_stats = TestStats.objects.get(test=self.test)
+        self.assertEqual((test_stats.attempts, test_stats.passed, test_stats.score_sum, test_stats.best_score),
+                         (3, 1, 6, 3))
+        self.assertEqual(GroupTestStats.objects.get(group=self.group, test=self.test).attempts, 3)
+        student_stats = StudentTestStats.objects.get(student=self.student, test=self.test)
+        self.assertEqual((student_stats.attempts, student_stats.best_score, student_stats.last_score), (2, 3, 1))
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.save(self.student, 3)
+        self.save(self.other_student, 2)
+        self.save(self.outsider, 1)
+        incremental = self.rows()
+        analytics.rebuild()
+        self.assertEqual(self.rows(), incremental)
+
+
+class AnalyticsApiTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        save_results([TestResult(test=self.test, student=self.student, score=2, max_score=3)])
+
+    def test_instructor_reads_rollups(self):
+        response = self.client_for(self.instructor).get(f'/api/analytics/tests/?test={self.test.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['attempts'], 1)
+
+    def test_filters_by_group_and_student(self):
+        client = self.client_for(self.admin)
+        groups = client.get(f'/api/analytics/groups/?group={self.group.pk}').data['results']
+        self.assertEqual([row['group'] for row in groups], [self.group.pk])
+        students = client.get(f'/api/analytics/students/?student={self.other_student.pk}').data['results']
+        self.assertEqual(students, [])
+
+    def test_non_numeric_filter_is_400(self):
+        client = self.client_for(self.admin)
+        for url in ('/api/analytics/tests/?test=abc', '/api/analytics/groups/?group=1x',
+                    '/api/analytics/students/?student=-1'):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('error', response.data)
+
+    def test_students_cannot_read_analytics(self):
+        self.assertEqual(self.client_for(self.student).get('/api/analytics/tests/').status_code, 403)
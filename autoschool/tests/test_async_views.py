@@ -0,0 +1,69 @@
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+from rest_framework.authtoken.models import Token
+
+from autoschool.models import Lecture, Test, TestResult
+
+from .base import AutoschoolTestCase
+
+
+class AsyncStudentViewTests(AutoschoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lecture = Lecture.objects.create(title='Знаки', content='...', author=cls.instructor)
+        cls.lecture.groups.add(cls.group)
+        cls.hidden_test = Test.objects.create(title='Скрытый', author=cls.instructor)
+        TestResult.objects.create(student=cls.student, test=cls.test, score=3, max_score=3)
+        TestResult.objects.create(student=cls.other_student, test=cls.test, score=1, max_score=3)
+        cls.headers = {'Authorization': f'Token {Token.objects.create(user=cls.student).key}'}
+
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+
+    async def get(self, url, token=None, **headers):
+        if token is None:
+            headers.update(self.headers)
+        elif token:
+            headers['Authorization'] = f'Token {token}'
+        return await self.async_client.get(url, headers=headers)
+
+    async def sync_json(self, url):
+        response = await sync_to_async(self.client_for(self.student).get)(url)
+        return response.json()
+
+    async def test_lists_match_sync_api(self):
+        for async_url, sync_url in [('/api/student/tests/', '/api/tests/'),
+                                    ('/api/student/lectures/', '/api/lectures/'),
+                                    ('/api/student/results/', '/api/results/')]:
+            with self.subTest(url=async_url):
+                response = await self.get(async_url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['results'], (await self.sync_json(sync_url))['results'])
+
+    async def test_details(self):
+        response = await self.get(f'/api/student/tests/{self.test.pk}/')
+        self.assertEqual([question['id'] for question in response.json()['questions']],
+                         [question.pk for question in self.questions])
+        self.assertNotIn('is_correct', response.json()['questions'][0]['answers'][0])
+        response = await self.get(f'/api/student/lectures/{self.lecture.pk}/')
+        self.assertEqual(response.json()['title'], 'Знаки')
+        response = await self.get(f'/api/student/tests/{self.hidden_test.pk}/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_conditional_get(self):
+        response = await self.get('/api/student/tests/')
+        response = await self.get('/api/student/tests/', **{'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = await self.get(f'/api/student/lectures/{self.lecture.pk}/')
+        response = await self.get(f'/api/student/lectures/{self.lecture.pk}/', **{'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_only_authenticated_students(self):
+        self.assertEqual((await self.get('/api/student/tests/', token='')).status_code, 401)
+        self.assertEqual((await self.get('/api/student/tests/', token='missing')).status_code, 401)
+        key = (await Token.objects.acreate(user=self.instructor)).key
+        self.assertEqual((await self.get('/api/student/tests/', token=key)).status_code, 403)
+        response = await self.async_client.post('/api/student/tests/', headers=self.headers)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,145 @@
+import importlib
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from autoschool.authentication import TokenCache, load_record
+from autoschool.models import CustomUser
+
+from .base import AutoschoolTestCase
+
+
+class CachedTokenAuthenticationTests(AutoschoolTestCase):
+    url = '/api/student/tests/'
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.student)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, [query['sql'] for query in queries if 'authtoken_token' in query['sql']]
+
+    def test_token_is_resolved_from_cache(self):
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deleted_token_is_rejected(self):
+        self.token_queries()
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(APIClient().get(self.url, HTTP_AUTHORIZATION='Token missing').status_code, 401)
+
+    def test_user_changes_invalidate_record(self):
+        self.token_queries()
+        self.student.user_type = 'instructor'
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.student.user_type = 'student'
+        self.student.set_password('Kj3#pLm9qw')
+        self.student.save()
+        _, queries = self.token_queries()
+        self.assertEqual(len(queries), 1)
+
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class TokenCacheTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.key = Token.objects.create(user=self.student).key
+        self.record = load_record(self.key)
+
+    def test_record_is_compact(self):
+        self.assertEqual(self.record['user_type'], 'student')
+        self.assertEqual(self.record['group_ids'], (self.group.pk,))
+        self.assertIsInstance(self.record['generation'], int)
+
+    def test_local_hit_costs_no_queries(self):
+        local = TokenCache(maxsize=10, ttl=60, check_interval=60)
+        local.set(self.key, self.record)
+        with self.assertNumQueries(0):
+            self.assertEqual(local.get(self.key), self.record)
+
+    def test_invalidation_reaches_other_processes_after_check_interval(self):
+        # Два экземпляра — как два воркера; поколение общее, в базе
+        first = TokenCache(maxsize=10, ttl=60, check_interval=0)
+        second = TokenCache(maxsize=10, ttl=60, check_interval=0)
+        first.set(self.key, self.record)
+        second.set(self.key, self.record)
+        with self.assertNumQueries(1):
+            self.assertEqual(first.get(self.key), self.record)
+
+        with self.assertNumQueries(1):
+            second.invalidate_users([self.student.pk, self.other_student.pk])
+        # Запись ещё лежит в LRU первого процесса, но поколение уже другое
+        self.assertIsNone(first.get(self.key))
+        self.assertIsNone(second.get(self.key))
+
+    def test_deleted_token_is_dropped_by_other_processes(self):
+        first = TokenCache(maxsize=10, ttl=60, check_interval=0)
+        first.set(self.key, self.record)
+        Token.objects.filter(key=self.key).delete()
+        self.assertIsNone(first.get(self.key))
+
+    def test_shared_level(self):
+        first = TokenCache(maxsize=10, ttl=60, shared_alias='default')
+        second = TokenCache(maxsize=10, ttl=60, shared_alias='default')
+        first.set(self.key, self.record)
+        self.assertEqual(second.get(self.key), self.record)
+        first.invalidate_token(self.key)
+        third = TokenCache(maxsize=10, ttl=60, shared_alias='default')
+        self.assertIsNone(third.get(self.key))
+
+        first.set(self.key, self.record)
+        first.invalidate_users([self.student.pk])
+        # В общем кэше запись прежнего поколения не принимается
+        self.assertIsNone(third.get(self.key))
+
+    def test_local_lru_is_bounded_and_expires(self):
+        local = TokenCache(maxsize=1, ttl=60)
+        local.set(self.key, self.record)
+        local.set('other', dict(self.record, id=self.other_student.pk))
+        self.assertIsNone(local.get(self.key))
+        self.assertIsNotNone(local.get('other'))
+
+        expired = TokenCache(maxsize=10, ttl=0)
+        expired.set(self.key, self.record)
+        self.assertIsNone(expired.get(self.key))
+
+
+class AuthUserMigrationTests(AutoschoolTestCase):
+    migration = importlib.import_module('autoschool.migrations.0015_move_auth_user_references')
+
+    def test_fresh_database_has_nothing_to_move(self):
+        self.assertEqual(self.migration.stale_references(apps, connection), [])
+
+    def test_auth_users_are_copied_by_username(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE auth_user (id integer PRIMARY KEY, password varchar(128), last_login datetime, '
+                'is_superuser bool, username varchar(150), first_name varchar(150), last_name varchar(150), '
+                'email varchar(254), is_staff bool, is_active bool, date_joined datetime)'
+            )
+            cursor.execute(
+                "INSERT INTO auth_user VALUES "
+                "(1, 'hash', NULL, 1, 'root', '', '', '', 1, 1, '2025-03-13 11:00:00'), "
+                "(2, 'hash', NULL, 0, 'student', '', '', '', 0, 1, '2025-03-13 11:00:00')"
+            )
+        mapping = self.migration.copy_auth_users(apps, connection)
+        root = CustomUser.objects.get(username='root')
+        self.assertEqual(mapping, {1: root.pk, 2: self.student.pk})
+        self.assertEqual((root.user_type, root.is_superuser, root.password), ('admin', True, 'hash'))
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from autoschool import datasets
+from autoschool.benchmarking import percentile, summarize
+from autoschool.models import Answer, ContentVisibility, CustomUser, TestResult
+
+
+class SummaryTests(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize(self):
+        summary = summarize([0.003, 0.001, 0.002, 0.004], elapsed=0.5, errors=1)
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throughput_rps'], 8.0)
+        self.assertEqual((summary['p50_ms'], summary['p99_ms'], summary['max_ms']), (2.0, 4.0, 4.0))
+        self.assertIsNone(summarize([], elapsed=0)['p95_ms'])
+
+
+class DatasetTests(TestCase):
+    def test_generate(self):
+        counts = datasets.generate(instructors=2, groups_per_instructor=2, students_per_group=3, lectures=4,
+                                   tests=3, questions=5, answers=3, results_per_student=2)
+        self.assertEqual(counts['groups'], 4)
+        self.assertEqual(counts['students'], 12)
+        self.assertEqual(counts['answers'], 45)
+        self.assertEqual(CustomUser.objects.filter(username__startswith='bench_').count(), 14)
+        self.assertEqual(Answer.objects.filter(is_correct=True).count(), 15)
+        self.assertEqual(TestResult.objects.count(), counts['results'])
+        # bulk_create не шлёт сигналов — индексы пересчитываются в конце
+        self.assertTrue(ContentVisibility.objects.exists())
+
+        with self.assertRaises(datasets.DatasetError):
+            datasets.generate(instructors=1)
+
+    def test_generate_is_reproducible(self):
+        datasets.generate(prefix='a', instructors=1, students_per_group=2, tests=2, questions=3, seed=5)
+        first = list(TestResult.objects.order_by('id').values_list('score', flat=True))
+        TestResult.objects.all().delete()
+        datasets.generate(prefix='b', instructors=1, students_per_group=2, tests=2, questions=3, seed=5)
+        self.assertEqual(list(TestResult.objects.order_by('id').values_list('score', flat=True)), first)
+
+    def test_command_validates_answers(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', answers=0, stdout=StringIO())
+
+    def test_command_validates_questions(self):
+        with self.assertRaisesMessage(CommandError, 'вопрос'):
+            call_command('generate_dataset', questions=0, stdout=StringIO())
+        self.assertFalse(TestResult.objects.exists())
+
+
+# Клиент бенчмарка ходит на localhost; вне DEBUG его нужно разрешить явно
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class BenchmarkCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        datasets.generate(instructors=1, groups_per_instructor=1, students_per_group=2, lectures=2,
+                          tests=2, questions=3, results_per_student=2)
+        CustomUser.objects.create(username='admin', user_type='admin')
+
+    def test_report_is_saved_and_compared(self):
+        handle, output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+        call_command('benchmark_api', iterations=3, warmup=0, output=output, stdout=StringIO(),
+                     stderr=StringIO())
+        report = json.loads(open(output).read())
+        self.assertEqual(report['dataset']['tests'], 2)
+        self.assertIn('tests_list', report['endpoints'])
+        self.assertNotIn('submit_test', report['endpoints'])
+        for name, summary in report['endpoints'].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(summary['requests'], 3)
+                self.assertEqual(summary['errors'], 0)
+                self.assertGreater(summary['queries_median'], 0)
+                self.assertIsNotNone(summary['p99_ms'])
+
+        out = StringIO()
+        call_command('benchmark_api', iterations=2, warmup=0, endpoints=['tests_list'], compare=output,
+                     stdout=out, stderr=StringIO())
+        self.assertIn('Сравнение с', out.getvalue())
+        self.assertRegex(out.getvalue(), r'tests_list\s+p95 [+-]')
@@ -0,0 +1,104 @@
+import importlib
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection
+from django.test import override_settings
+from rest_framework.mixins import ListModelMixin
+
+from autoschool.checks import check_shared_cache
+from autoschool.conditional import COLLECTION_VERSION_KEY, bump_users
+from autoschool.models import Lecture, LectureImage, StudentGroup, Test
+
+from .base import AutoschoolTestCase
+
+
+class ConditionalGetTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.student)
+        self.detail_url = f'/api/tests/{self.test.pk}/'
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_list_304_skips_serialization(self):
+        etag = self.etag('/api/tests/')
+        with mock.patch.object(ListModelMixin, 'list') as render:
+            self.assertNotModified('/api/tests/', etag)
+        render.assert_not_called()
+        # Параметры запроса входят в ETag
+        self.assertNotEqual(self.etag('/api/tests/?page_size=1'), etag)
+
+    def test_detail_validators(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertNotModified(self.detail_url, response['ETag'])
+        since = self.client.get(self.detail_url, headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(since.status_code, 304)
+
+    def test_child_changes_bump_parent(self):
+        list_etag, detail_etag = self.etag('/api/tests/'), self.etag(self.detail_url)
+        answer = self.questions[0].answers.first()
+        answer.text = 'Исправленный ответ'
+        answer.save()
+        self.assertNotEqual(self.etag(self.detail_url), detail_etag)
+        self.assertNotEqual(self.etag('/api/tests/'), list_etag)
+
+        lecture = Lecture.objects.create(title='Знаки', content='...', author=self.instructor)
+        lecture.groups.add(self.group)
+        lecture_url = f'/api/lectures/{lecture.pk}/'
+        etag = self.etag(lecture_url)
+        LectureImage.objects.create(lecture=lecture, caption='Без файла')
+        self.assertNotEqual(self.etag(lecture_url), etag)
+
+    def test_group_membership_bumps_user_collections(self):
+        etag = self.etag('/api/tests/')
+        StudentGroup.objects.filter(student=self.student).delete()
+        self.assertNotEqual(self.etag('/api/tests/'), etag)
+
+    def test_versions_are_visible_to_other_processes(self):
+        self.etag('/api/tests/')
+        key = COLLECTION_VERSION_KEY.format(name='test')
+        # Отдельный экземпляр бэкенда с той же таблицей — как кэш другого воркера
+        other = DatabaseCache('autoschool_cache', {})
+        before = other.get(key)
+        self.assertIsNotNone(before)
+        Test.objects.create(title='Новый', author=self.instructor)
+        self.assertNotEqual(other.get(key), before)
+
+
+    def test_user_versions_bump_in_one_query(self):
+        etag = self.etag('/api/tests/')
+        with self.assertNumQueries(1):
+            bump_users([self.student.pk, self.other_student.pk, self.outsider.pk])
+        self.assertNotEqual(self.etag('/api/tests/'), etag)
+        # Второй сдвиг обновляет уже существующие строки
+        etag = self.etag('/api/tests/')
+        bump_users([self.student.pk])
+        self.assertNotEqual(self.etag('/api/tests/'), etag)
+
+
+class SharedCacheCheckTests(AutoschoolTestCase):
+    def test_project_cache_is_shared(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_warns(self):
+        warnings = check_shared_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['autoschool.W001'])
+
+
+class CacheTableMigrationTests(AutoschoolTestCase):
+    def test_migration_creates_cache_table(self):
+        migration = importlib.import_module('autoschool.migrations.0013_cache_and_user_versions')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE autoschool_cache')
+        migration.create_cache_tables(None, SimpleNamespace(connection=connection))
+        self.assertIn('autoschool_cache', connection.introspection.table_names())
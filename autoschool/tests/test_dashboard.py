@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool.conditional import collection_key, get_versions
+from autoschool.dashboard import dashboard_versions
+from autoschool.models import Lecture, StudentGroup, Test, UserVersion
+
+from .base import AutoschoolTestCase
+
+URL = '/api/me/dashboard/'
+
+
+class DashboardTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.student)
+
+    def dashboard(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def submit(self, answers):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/tests/{self.test.pk}/submit_test/', {'answers': answers}, format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_contents(self):
+        lecture = Lecture.objects.create(title='ПДД', content='...', author=self.instructor)
+        lecture.groups.add(self.group)
+        Lecture.objects.create(title='Чужая', content='...', author=self.instructor)
+        data = self.dashboard().json()
+        self.assertEqual([group['name'] for group in data['groups']], ['Группа А'])
+        self.assertEqual([item['id'] for item in data['lectures']], [lecture.pk])
+        self.assertEqual([item['id'] for item in data['pending_tests']], [self.test.pk])
+        self.assertEqual(data['latest_results'], [])
+
+        self.submit(self.correct_answers())
+        data = self.dashboard().json()
+        self.assertEqual(data['pending_tests'], [])
+        self.assertEqual([result['test_title'] for result in data['latest_results']], ['Знаки'])
+
+    def test_second_request_is_cached(self):
+        etag = self.dashboard()['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.dashboard()
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('autoschool_lecture', sql)
+        self.assertNotIn('autoschool_testresult', sql)
+        self.assertEqual(self.client.get(URL, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_versions_read_in_two_queries(self):
+        dashboard_versions(self.student.pk)
+        # Версия курсанта из UserVersion и все версии из кэша одним get_many
+        with CaptureQueriesContext(connection) as queries:
+            versions = dashboard_versions(self.student.pk)
+        self.assertEqual(len(versions), 5)
+        self.assertEqual(len(queries), 2)
+
+    def test_missing_versions_are_seeded_at_once(self):
+        keys = [collection_key(Lecture), collection_key(Test)]
+        cache.delete_many(keys)
+        with mock.patch.object(cache, 'add') as add, mock.patch.object(cache, 'set_many',
+                                                                     wraps=cache.set_many) as set_many:
+            versions = get_versions(keys)
+        add.assert_not_called()
+        set_many.assert_called_once()
+        self.assertEqual(get_versions(keys), versions)
+
+    def test_invalidated_by_enrollment_content_and_results(self):
+        etag = self.dashboard()['ETag']
+
+        lecture = Lecture.objects.create(title='Новая', content='...', author=self.instructor)
+        lecture.groups.add(self.group)
+        response = self.dashboard()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([item['title'] for item in response.json()['lectures']], ['Новая'])
+
+        etag = response['ETag']
+        self.submit(self.wrong_answers())
+        response = self.dashboard()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['latest_results']), 1)
+
+        etag = response['ETag']
+        StudentGroup.objects.filter(student=self.student).delete()
+        response = self.dashboard()
+        self.assertNotEqual(response['ETag'], etag)
+        data = response.json()
+        self.assertEqual((data['groups'], data['lectures'], data['pending_tests']), ([], [], []))
+
+    def test_versions_are_shared_between_processes(self):
+        self.dashboard()
+        # Отдельный экземпляр бэкенда с той же таблицей — как кэш другого воркера
+        other = DatabaseCache('autoschool_cache', {})
+        before = other.get(collection_key(Lecture))
+        self.assertIsNotNone(before)
+        Lecture.objects.create(title='Новая', content='...', author=self.instructor)
+        self.assertNotEqual(other.get(collection_key(Lecture)), before)
+
+        # Версия результатов — в базе, общей для всех воркеров
+        self.submit(self.correct_answers())
+        first = UserVersion.objects.get(user=self.student).results
+        self.submit(self.correct_answers())
+        self.assertGreater(UserVersion.objects.get(user=self.student).results, first)
+
+    def test_students_only(self):
+        for user in (self.instructor, self.admin):
+            self.assertEqual(self.client_for(user).get(URL).status_code, 403)
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from autoschool.database import ReplicaRouter, ReplicaRoutingMiddleware, _read_alias, configure_sqlite
+from autoschool.models import Test
+
+from .base import AutoschoolTestCase
+
+
+class SQLitePragmaTests(AutoschoolTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_on_connect(self):
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    @override_settings(AUTOSCHOOL_DB_REPLICAS=['replica'], AUTOSCHOOL_SQLITE_PRAGMAS={'synchronous': 'NORMAL'})
+    def test_replica_connections_are_read_only(self):
+        replica = mock.MagicMock(vendor='sqlite', alias='replica')
+        configure_sqlite(None, replica)
+        cursor = replica.cursor.return_value.__enter__.return_value
+        self.assertEqual([call.args[0] for call in cursor.execute.call_args_list],
+                         ['PRAGMA synchronous = NORMAL', 'PRAGMA query_only = ON'])
+
+
+@override_settings(AUTOSCHOOL_DB_REPLICAS=['replica'])
+class ReplicaRoutingTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory(headers={'Authorization': 'Token abc'})
+        self.routed = []
+
+    def view(self, status=200):
+        def get_response(request):
+            self.routed.append(router.db_for_read(Test))
+            return HttpResponse(status=status)
+        return get_response
+
+    def async_view(self, status=200):
+        async def get_response(request):
+            self.routed.append(router.db_for_read(Test))
+            return HttpResponse(status=status)
+        return get_response
+
+    def test_router(self):
+        routing = ReplicaRouter()
+        token = _read_alias.set('replica')
+        try:
+            self.assertEqual(routing.db_for_read(Test), 'replica')
+            self.assertEqual(routing.db_for_write(Test), 'default')
+            # Версии и закрепления в таблице кэша читаются только с основной базы
+            self.assertEqual(routing.db_for_read(DatabaseCache('autoschool_cache', {}).cache_model_class), 'default')
+        finally:
+            _read_alias.reset(token)
+        self.assertEqual(routing.db_for_read(Test), 'default')
+        self.assertFalse(routing.allow_migrate('replica', 'autoschool'))
+        self.assertTrue(routing.allow_migrate('default', 'autoschool'))
+
+    def test_reads_go_to_replica_until_a_write(self):
+        ReplicaRoutingMiddleware(self.view())(self.factory.get('/api/tests/'))
+        ReplicaRoutingMiddleware(self.view(status=400))(self.factory.post('/api/tests/'))
+        ReplicaRoutingMiddleware(self.view())(self.factory.get('/api/tests/'))
+        ReplicaRoutingMiddleware(self.view())(self.factory.post('/api/tests/'))
+        ReplicaRoutingMiddleware(self.view())(self.factory.get('/api/tests/'))
+        # Запись читается с основной базы; после успешной записи клиент закреплён за ней
+        self.assertEqual(self.routed, ['replica', 'default', 'replica', 'default', 'default'])
+        ReplicaRoutingMiddleware(self.view())(RequestFactory().get('/api/tests/'))
+        self.assertEqual(self.routed[-1], 'replica')
+
+    def test_async_stack(self):
+        middleware = ReplicaRoutingMiddleware(self.async_view())
+        async_to_sync(middleware)(self.factory.get('/api/tests/'))
+        async_to_sync(middleware)(self.factory.post('/api/tests/'))
+        async_to_sync(middleware)(self.factory.get('/api/tests/'))
+        self.assertEqual(self.routed, ['replica', 'default', 'default'])
+
+    @override_settings(AUTOSCHOOL_DB_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        ReplicaRoutingMiddleware(self.view())(self.factory.get('/api/tests/'))
+        self.assertEqual(self.routed, ['default'])
@@ -0,0 +1,71 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool import visibility
+from autoschool.models import CustomUser, StudentGroup, Test
+
+from .base import AutoschoolTestCase
+
+
+class BulkEnrollmentTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.instructor)
+        self.url = f'/api/groups/{self.group.pk}/'
+
+    def members(self):
+        return set(StudentGroup.objects.filter(group=self.group).values_list('student_id', flat=True))
+
+    def test_add_students_by_id(self):
+        response = self.client.post(self.url + 'add_students/',
+                                    {'student_ids': [self.outsider.pk, self.student.pk, 999999]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'added': [self.outsider.pk], 'skipped': [self.student.pk], 'missing': [999999]})
+        self.assertIn(self.outsider.pk, self.members())
+        # Индекс видимости обновлён, хотя bulk_create не шлёт сигналов
+        self.assertTrue(Test.objects.filter(id__in=visibility.visible_ids(self.outsider, Test)).exists())
+
+    def test_add_students_from_csv(self):
+        upload = SimpleUploadedFile('students.csv', 'username\noutsider\nnobody\n'.encode('utf-8-sig'))
+        response = self.client.post(self.url + 'add_students/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['added'], [self.outsider.pk])
+        self.assertEqual(response.data['missing'], ['nobody'])
+
+    def test_instructors_are_not_enrolled(self):
+        response = self.client.post(self.url + 'add_students/', {'student_ids': [self.instructor.pk]}, format='json')
+        self.assertEqual(response.data['missing'], [self.instructor.pk])
+        self.assertNotIn(self.instructor.pk, self.members())
+
+    def test_remove_students(self):
+        response = self.client.delete(self.url + 'remove_students/',
+                                      {'student_ids': [self.student.pk, self.outsider.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['removed'], response.data['skipped']), ([self.student.pk], [self.outsider.pk]))
+        self.assertEqual(self.members(), {self.other_student.pk})
+        self.assertFalse(Test.objects.filter(id__in=visibility.visible_ids(self.student, Test)).exists())
+
+    def test_bad_input_is_400(self):
+        for payload in ({}, {'student_ids': 'abc'}, {'student_ids': ['x']}):
+            response = self.client.post(self.url + 'add_students/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+
+    def test_students_cannot_enroll(self):
+        response = self.client_for(self.student).post(self.url + 'add_students/',
+                                                        {'student_ids': [self.outsider.pk]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def queries(students):
+            ids = {'student_ids': [student.pk for student in students]}
+            with CaptureQueriesContext(connection) as added:
+                self.assertEqual(self.client.post(self.url + 'add_students/', ids, format='json').status_code, 201)
+            with CaptureQueriesContext(connection) as removed:
+                self.assertEqual(self.client.delete(self.url + 'remove_students/', ids, format='json').status_code, 200)
+            return len(added), len(removed)
+
+        students = CustomUser.objects.bulk_create(
+            CustomUser(username=f'intake{number}', user_type='student') for number in range(33)
+        )
+        self.assertEqual(queries(students[:3]), queries(students[3:]))
+        self.assertEqual(self.members(), {self.student.pk, self.other_student.pk})
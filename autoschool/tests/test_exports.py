@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool.models import TestResult
+
+from .base import AutoschoolTestCase
+
+
+class ExportTests(AutoschoolTestCase):
+    url = '/api/results/export/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day, student in ((1, cls.student), (2, cls.other_student), (3, cls.student)):
+            TestResult.objects.create(test=cls.test, student=student, score=day, max_score=3,
+                                      date_taken=datetime(2024, 3, day, 23, 30, tzinfo=dt_timezone.utc))
+
+    def export(self, query='', user=None):
+        response = self.client_for(user or self.admin).get(self.url + query)
+        body = b''.join(response.streaming_content).decode() if response.status_code == 200 else None
+        return response, body
+
+    def test_csv_export(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(body.lstrip('﻿'))))
+        self.assertEqual(rows[0][:3], ['id', 'test_id', 'test_title'])
+        self.assertEqual([row[7] for row in rows[1:]], ['1', '2', '3'])
+
+    def test_csv_escapes_formulas(self):
+        self.test.title = '=HYPERLINK("http://evil")'
+        self.test.save()
+        self.student.first_name = '@SUM(1)'
+        self.student.last_name = '-2+3'
+        self.student.save()
+        _, body = self.export()
+        row = list(csv.reader(io.StringIO(body.lstrip('﻿'))))[1]
+        self.assertEqual((row[2], row[5], row[6]), ("'=HYPERLINK(\"http://evil\")", "'@SUM(1)", "'-2+3"))
+
+        # В JSON экранировать нечего
+        _, body = self.export('?file_format=ndjson')
+        self.assertEqual(json.loads(body.splitlines()[0])['test_title'], '=HYPERLINK("http://evil")')
+
+    def test_ndjson_export(self):
+        _, body = self.export('?file_format=ndjson')
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record['student_username'] for record in records], ['student', 'student2', 'student'])
+
+    def test_student_exports_only_own_results(self):
+        _, body = self.export('?file_format=ndjson', user=self.student)
+        self.assertEqual({json.loads(line)['student_id'] for line in body.splitlines()}, {self.student.pk})
+
+    def test_day_bounds_include_whole_day(self):
+        _, body = self.export('?file_format=ndjson&date_from=2024-03-02&date_to=2024-03-02')
+        self.assertEqual([json.loads(line)['score'] for line in body.splitlines()], [2])
+
+    def test_day_filter_uses_column_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.export('?date_from=2024-03-02&date_to=2024-03-03')
+        sql = next(query['sql'] for query in queries.captured_queries if 'autoschool_testresult' in query['sql'])
+        self.assertNotIn('django_datetime_cast_date', sql)
+        self.assertIn('"date_taken" <', sql)
+
+    def test_invalid_dates_are_400(self):
+        for value in ('2024-02-30', '2024-13-01T10:00', 'вчера'):
+            response, _ = self.export(f'?date_from={value}')
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_unknown_format_is_400(self):
+        response, _ = self.export('?file_format=xml')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,67 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool.models import Lecture
+
+from .base import AutoschoolTestCase
+
+
+class SparseFieldsetTests(AutoschoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lecture = Lecture.objects.create(title='Знаки', content='Длинный текст лекции', author=cls.instructor)
+        cls.lecture.groups.add(cls.group)
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.instructor)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_list_without_expand_skips_nested_tables(self):
+        data, queries = self.get('/api/tests/')
+        self.assertNotIn('questions', data['results'][0])
+        self.assertFalse([sql for sql in queries if 'autoschool_question' in sql or 'autoschool_answer' in sql])
+
+    def test_expand_prefetches_nested(self):
+        data, queries = self.get('/api/tests/', expand='questions')
+        questions = data['results'][0]['questions']
+        self.assertEqual(len(questions), 3)
+        self.assertEqual(len(questions[0]['answers']), 3)
+        # Вопросы и ответы — по одному запросу на всю страницу
+        self.assertEqual(len([sql for sql in queries if 'FROM "autoschool_answer"' in sql]), 1)
+
+    def test_fields_limit_columns(self):
+        data, queries = self.get('/api/tests/', fields='id,title')
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+        test_select = next(sql for sql in queries if 'FROM "autoschool_test"' in sql and 'LIMIT' in sql)
+        self.assertNotIn('"description"', test_select)
+
+        data, queries = self.get('/api/lectures/', fields='id,title')
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+        lecture_select = next(sql for sql in queries if 'FROM "autoschool_lecture"' in sql and 'LIMIT' in sql)
+        self.assertNotIn('"content"', lecture_select)
+
+    def test_detail_embeds_nested_by_default(self):
+        data, _ = self.get(f'/api/tests/{self.test.pk}/')
+        self.assertEqual(len(data['questions']), 3)
+        data, _ = self.get(f'/api/tests/{self.test.pk}/', fields='title')
+        self.assertEqual(set(data), {'title'})
+
+    def test_lecture_images_are_opt_in(self):
+        data, queries = self.get('/api/lectures/')
+        self.assertNotIn('images', data['results'][0])
+        self.assertFalse([sql for sql in queries if 'autoschool_lectureimage' in sql])
+        data, _ = self.get('/api/lectures/', expand='images')
+        self.assertEqual(data['results'][0]['images'], [])
+
+    def test_writes_ignore_selection(self):
+        response = self.client.patch(f'/api/tests/{self.test.pk}/?fields=title', {'description': 'Новое'},
+                                     format='json')
+        self.assertEqual(response.data['description'], 'Новое')
+        self.assertIn('questions', response.data)
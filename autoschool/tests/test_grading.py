@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from autoschool import grading
+from autoschool.models import Answer, Test, TestResult
+
+from .base import AutoschoolTestCase
+
+
+class GradeTests(AutoschoolTestCase):
+    def test_grade_counts_only_correct_answers(self):
+        answer_key = grading.build_answer_key(self.test.pk)
+        submitted = self.correct_answers(self.questions[:2])
+        submitted[str(self.questions[2].pk)] = 'не число'
+
+        score, max_score, responses = grading.grade(answer_key, submitted)
+
+        self.assertEqual((score, max_score), (2, 3))
+        self.assertIn((self.questions[2].pk, None, False), responses)
+
+    def test_build_answer_key_limited_to_ticket_questions(self):
+        question_ids = [self.questions[1].pk]
+        answer_key = grading.build_answer_key(self.test.pk, question_ids)
+        self.assertEqual(set(answer_key), set(question_ids))
+
+
+class AnswerKeyCacheTests(AutoschoolTestCase):
+    def test_answer_key_built_once(self):
+        with mock.patch('autoschool.grading.build_answer_key', wraps=grading.build_answer_key) as build:
+            first = grading.get_answer_key(self.test)
+            second = grading.get_answer_key(self.test)
+        self.assertEqual(first, second)
+        self.assertEqual(build.call_count, 1)
+
+    def test_content_change_moves_cache_key_without_invalidation(self):
+        stale = grading.get_answer_key(self.test)
+        question = self.questions[0]
+        Answer.objects.filter(question=question).update(is_correct=False)
+        answer = question.answers.order_by('id').last()
+        answer.is_correct = True
+        answer.save()
+
+        test = Test.objects.get(pk=self.test.pk)
+        self.assertNotEqual(test.updated_at, self.test.updated_at)
+        # Старый ключ остаётся в кэше (другие процессы его не сбрасывают), но больше не используется
+        self.assertIsNotNone(cache.get(grading._answer_key_cache_key(self.test)))
+        fresh = grading.get_answer_key(test)
+        self.assertNotEqual(fresh, stale)
+        self.assertEqual(fresh[question.pk], frozenset([answer.pk]))
+
+    def test_ticket_answer_key_reuses_cached_test_key(self):
+        grading.get_answer_key(self.test)
+        question_ids = [self.questions[2].pk, self.questions[0].pk]
+        with mock.patch('autoschool.grading.build_answer_key') as build:
+            answer_key = grading.get_ticket_answer_key(self.test, question_ids)
+        build.assert_not_called()
+        self.assertEqual(list(answer_key), question_ids)
+
+
+class SubmitTestTests(AutoschoolTestCase):
+    def test_submit_test_saves_graded_result(self):
+        response = self.client_for(self.student).post(
+            f'/api/tests/{self.test.pk}/submit_test/',
+            {'answers': self.correct_answers(self.questions[:2])}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['score'], response.data['max_score']), (2, 3))
+        result = TestResult.objects.get(pk=response.data['id'])
+        self.assertEqual((result.student, result.score), (self.student, 2))
+
+    def test_submit_test_only_for_students(self):
+        response = self.client_for(self.instructor).post(
+            f'/api/tests/{self.test.pk}/submit_test/', {'answers': {}}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(TestResult.objects.exists())
+
+    def test_submit_test_rejects_non_object_answers(self):
+        client = self.client_for(self.student)
+        for answers in ([self.questions[0].pk], 'ответы', 5):
+            response = client.post(
+                f'/api/tests/{self.test.pk}/submit_test/', {'answers': answers}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, answers)
+        self.assertFalse(TestResult.objects.exists())
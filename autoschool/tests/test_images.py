@@ -0,0 +1,88 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from autoschool import images
+from autoschool.models import Lecture, LectureImage, Question
+
+from .base import AutoschoolTestCase
+
+
+def png(name='photo.png', size=(2000, 1000), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImagePipelineTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.lecture = Lecture.objects.create(title='Разметка', content='...', author=self.instructor)
+
+    def upload(self, **kwargs):
+        with mock.patch.object(images._executor, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client_for(self.instructor).post(
+                    f'/api/lectures/{self.lecture.pk}/add_image/', {'image': png(**kwargs)}, format='multipart'
+                )
+        self.assertEqual(response.status_code, 201)
+        return response, submit
+
+    def test_upload_schedules_processing_and_returns_original(self):
+        response, submit = self.upload()
+        # Ответ уходит сразу: вариантов ещё нет, обработка поставлена в пул
+        self.assertEqual(response.data['variants'], {})
+        self.assertIsNone(response.data['image_width'])
+        submit.assert_called_once_with(images._run, LectureImage, response.data['id'])
+
+    def test_process_builds_variants(self):
+        response, _ = self.upload()
+        images.process(LectureImage, response.data['id'])
+        image = LectureImage.objects.get(pk=response.data['id'])
+        self.assertEqual((image.image_width, image.image_height), (2000, 1000))
+        self.assertEqual(len(image.image_hash), 64)
+        self.assertEqual(set(image.image_variants), {'thumb', 'medium', 'webp', 'source'})
+        with default_storage.open(image.image_variants['thumb']) as handle:
+            thumb = Image.open(handle)
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (320, 160)))
+        self.assertEqual(set(images.variant_urls(image)), {'thumb', 'medium', 'webp'})
+
+        # Повторная обработка ничего не делает
+        with mock.patch.object(images, 'build_variants') as build:
+            images.process(LectureImage, image.pk)
+        build.assert_not_called()
+
+    def test_identical_uploads_are_deduplicated(self):
+        first, _ = self.upload(name='one.png')
+        images.process(LectureImage, first.data['id'])
+        second, _ = self.upload(name='two.png')
+        duplicate = LectureImage.objects.get(pk=second.data['id'])
+        duplicate_name = duplicate.image.name
+        with mock.patch.object(images, 'build_variants') as build:
+            images.process(LectureImage, duplicate.pk)
+        build.assert_not_called()
+
+        original = LectureImage.objects.get(pk=first.data['id'])
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.image.name, original.image.name)
+        self.assertEqual(duplicate.image_variants, original.image_variants)
+        self.assertFalse(default_storage.exists(duplicate_name))
+
+    def test_question_variants_are_served_with_the_test(self):
+        question = Question.objects.create(test=self.test, text='Со знаком', image=png(size=(400, 300)))
+        images.process(Question, question.pk)
+        data = self.client_for(self.instructor).get(f'/api/tests/{self.test.pk}/').data
+        served = next(item for item in data['questions'] if item['id'] == question.pk)
+        self.assertEqual((served['image_width'], served['image_height']), (400, 300))
+        self.assertEqual(set(served['variants']), {'thumb', 'medium', 'webp'})
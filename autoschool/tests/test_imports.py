@@ -0,0 +1,180 @@
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from autoschool import images, imports
+from autoschool.models import CustomUser, Question, Test
+
+from .base import AutoschoolTestCase
+
+PASSWORD = 'Kj3#pLm9qw'
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(AutoschoolTestCase):
+    url = '/api/users/import/'
+
+    def row(self, username, user_type='student', **fields):
+        return {'username': username, 'user_type': user_type, 'password': PASSWORD, **fields}
+
+    def test_import_from_json_body(self):
+        response = self.client_for(self.admin).post(
+            self.url, {'users': [self.row('ivanov'), self.row('petrov', 'instructor')]}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['username'] for item in response.data['created']], ['ivanov', 'petrov'])
+        self.assertEqual(response.data['errors'], [])
+        user = CustomUser.objects.get(username='ivanov')
+        self.assertTrue(user.check_password(PASSWORD))
+
+    def test_import_from_csv_file(self):
+        upload = SimpleUploadedFile('users.csv', f'username,user_type,password\nivanov,student,{PASSWORD}\n'.encode())
+        response = self.client_for(self.instructor).post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(CustomUser.objects.filter(username='ivanov').exists())
+
+    def test_row_errors_are_reported(self):
+        rows = [self.row('ivanov'), self.row('ivanov'), self.row('student'), self.row('', 'pilot'),
+                self.row('sidorov', email='не почта')]
+        response = self.client_for(self.admin).post(self.url, {'users': rows}, format='json')
+        self.assertEqual([item['row'] for item in response.data['created']], [1])
+        errors = {item['row']: item['errors'] for item in response.data['errors']}
+        self.assertEqual(set(errors), {2, 3, 4, 5})
+        self.assertIn('username', errors[2])
+        self.assertIn('user_type', errors[4])
+        self.assertIn('email', errors[5])
+
+    def test_instructor_cannot_import_admins(self):
+        response = self.client_for(self.instructor).post(
+            self.url, {'users': [self.row('boss', 'admin')]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], [])
+        self.assertIn('user_type', response.data['errors'][0]['errors'])
+        self.assertFalse(CustomUser.objects.filter(username='boss').exists())
+
+    def test_bad_payloads_return_400(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.post(self.url, {'users': 'ivanov'}, format='json').status_code, 400)
+        upload = SimpleUploadedFile('users.json', b'{"username": "ivanov"}')
+        response = client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'JSON должен быть списком объектов'})
+
+    def test_students_cannot_import(self):
+        response = self.client_for(self.student).post(self.url, {'users': [self.row('ivanov')]}, format='json')
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual(response.data['errors'][0]['errors'], {'user_type': ['У вас нет прав на создание курсантов']})
+
+
+class HashPasswordsTests(AutoschoolTestCase):
+    @override_settings(AUTOSCHOOL_PASSWORD_HASH_POOL_THRESHOLD=100)
+    def test_small_batches_hash_in_process(self):
+        with mock.patch.object(imports._hash_pool, 'map') as pool_map:
+            hashes = imports.hash_passwords([PASSWORD])
+        pool_map.assert_not_called()
+        self.assertTrue(check_password(PASSWORD, hashes[0]))
+
+    @override_settings(AUTOSCHOOL_PASSWORD_HASH_POOL_THRESHOLD=2)
+    def test_large_batches_use_shared_spawn_pool(self):
+        self.assertEqual(imports._hash_pool._mp_context.get_start_method(), 'spawn')
+        passwords = [f'{PASSWORD}{number}' for number in range(2)]
+        with mock.patch.object(imports._hash_pool, 'map', wraps=imports._hash_pool.map) as pool_map:
+            hashes = imports.hash_passwords(passwords)
+        pool_map.assert_called_once()
+        self.assertTrue(all(check_password(password, hashed) for password, hashed in zip(passwords, hashes)))
+
+
+def png(name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (20, 10)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TestImportTests(AutoschoolTestCase):
+    url = '/api/tests/import/'
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        schedule = mock.patch.object(images._executor, 'submit')
+        schedule.start()
+        self.addCleanup(schedule.stop)
+        self.client = self.client_for(self.instructor)
+
+    def tree(self, **fields):
+        return {
+            'title': 'Разметка',
+            'groups': [self.group.pk],
+            'questions': [
+                {'text': 'Сплошная линия', 'topic': 'Разметка', 'image': 'line.png',
+                 'answers': [{'text': 'Пересекать нельзя', 'is_correct': True}, {'text': 'Можно'}]},
+                {'text': 'Прерывистая линия',
+                 'answers': [{'text': 'Можно', 'is_correct': 'да'}, {'text': 'Нельзя'}]},
+            ],
+            **fields,
+        }
+
+    def post_file(self, name, content, *images, **fields):
+        data = {'file': SimpleUploadedFile(name, content), **fields}
+        if images:
+            data['images'] = list(images)
+        return self.client.post(self.url, data, format='multipart')
+
+    def test_import_json_file_with_image(self):
+        response = self.post_file('test.json', json.dumps(self.tree()).encode(), png('line.png'))
+        self.assertEqual(response.status_code, 201)
+        test = Test.objects.get(pk=response.data['test'])
+        self.assertEqual(list(test.groups.all()), [self.group])
+        questions = list(test.questions.order_by('id'))
+        self.assertEqual([question.pk for question in questions],
+                         [item['id'] for item in response.data['questions']])
+        self.assertTrue(questions[0].image.name.endswith('.png'))
+        self.assertEqual([answer.is_correct for answer in questions[1].answers.order_by('id')], [True, False])
+
+    def test_import_csv_file(self):
+        content = 'question,topic,answer,correct\nСтоп,Знаки,Остановиться,1\n,,Проехать,\n'.encode()
+        response = self.post_file('test.csv', content, title='Знаки 2')
+        self.assertEqual(response.status_code, 201)
+        question = Question.objects.get(test_id=response.data['test'])
+        self.assertEqual(question.topic, 'Знаки')
+        self.assertEqual(question.answers.filter(is_correct=True).get().text, 'Остановиться')
+
+    def test_unknown_extension_is_rejected(self):
+        response = self.post_file('test.txt', b'question,answer\n', title='Знаки 2')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Формат должен быть json, csv или xlsx'})
+        with self.assertRaises(imports.ImportFormatError):
+            imports.test_file_format('test')
+
+    def test_duplicate_image_names_are_rejected(self):
+        tests = Test.objects.count()
+        response = self.post_file('test.json', json.dumps(self.tree()).encode(), png('line.png'), png('line.png'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'errors': {'images': ['Файл line.png загружен несколько раз']}})
+        self.assertEqual(Test.objects.count(), tests)
+
+    def test_validation_errors_write_nothing(self):
+        tree = self.tree(groups=[0])
+        tree['questions'][1]['answers'] = [{'text': 'Одна'}]
+        tests = Test.objects.count()
+        response = self.client.post(self.url, tree, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']),
+                         {'groups', 'questions[0].image', 'questions[1].answers'})
+        self.assertEqual(Test.objects.count(), tests)
+
+    def test_students_cannot_import(self):
+        response = self.client_for(self.student).post(self.url, self.tree(), format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,73 @@
+import json
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from autoschool.instrumentation import QueryInstrumentationMiddleware, normalize_sql
+from autoschool.models import Question
+
+from .base import AutoschoolTestCase
+
+
+class NormalizeSQLTests(SimpleTestCase):
+    def test_literals_and_lists_collapse(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'a''b' AND n = 15"),
+            normalize_sql("SELECT  *  FROM t WHERE id IN (%s) AND name = 'c' AND n = 2.5"),
+        )
+
+    def test_middleware_supports_both_stacks(self):
+        async def async_view(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(QueryInstrumentationMiddleware(async_view)))
+        self.assertFalse(iscoroutinefunction(QueryInstrumentationMiddleware(lambda request: HttpResponse())))
+
+
+class QueryInstrumentationTests(AutoschoolTestCase):
+    def get(self, url):
+        with self.assertLogs('autoschool.instrumentation', 'INFO') as logs:
+            response = self.client_for(self.instructor).get(url)
+        return response, [json.loads(line.split(':', 2)[2]) for line in logs.output]
+
+    def test_server_timing_and_log(self):
+        response, records = self.get('/api/tests/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+')
+        self.assertEqual(records[0]['path'], '/api/tests/')
+        self.assertGreater(records[0]['queries'], 0)
+        self.assertGreater(records[0]['render_ms'] + records[0]['serialize_ms'], 0)
+
+    @override_settings(AUTOSCHOOL_N_PLUS_ONE_THRESHOLD=3, AUTOSCHOOL_SLOW_REQUEST_SAMPLE_RATE=1.0)
+    def test_repeated_shapes_are_reported(self):
+        def view(request):
+            # Одинаковые запросы подряд — как N+1
+            for question in self.questions:
+                Question.objects.get(pk=question.pk)
+            return HttpResponse()
+
+        with self.assertLogs('autoschool.instrumentation', 'WARNING') as logs:
+            response = QueryInstrumentationMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('nplusone;desc="1 repeated shapes"', response['Server-Timing'])
+        warning = json.loads(logs.output[0].split(':', 2)[2])
+        self.assertEqual(warning['shapes'][0]['count'], 3)
+        self.assertIn('"autoschool_question"', warning['shapes'][0]['sql'])
+
+    @override_settings(AUTOSCHOOL_SLOW_REQUEST_MS=0, AUTOSCHOOL_SLOW_REQUEST_SAMPLE_RATE=0)
+    def test_slow_log_is_sampled(self):
+        _, records = self.get('/api/tests/')
+        self.assertEqual(len(records), 1)
+
+    @override_settings(AUTOSCHOOL_INSTRUMENTATION=False)
+    def test_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client_for(self.instructor).get('/api/tests/'))
+
+    async def test_async_requests_count_queries(self):
+        key = (await Token.objects.acreate(user=self.student)).key
+        with self.assertLogs('autoschool.instrumentation', 'INFO') as logs:
+            response = await AsyncClient().get('/api/student/tests/', headers={'Authorization': f'Token {key}'})
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.output[0].split(':', 2)[2])
+        # Запросы async-методов ORM и sync_to_async попадают в метрики
+        self.assertGreater(record['queries'], 0)
+        self.assertIn(f'"{record["queries"]} queries"', response['Server-Timing'])
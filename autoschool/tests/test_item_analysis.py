@@ -0,0 +1,48 @@
+from autoschool import item_analysis
+from autoschool.models import AnswerAttempt, QuestionStats
+
+from .base import AutoschoolTestCase
+
+
+class ItemAnalysisTests(AutoschoolTestCase):
+    def submit(self, student, answers):
+        return self.client_for(student).post(
+            f'/api/tests/{self.test.pk}/submit_test/', {'answers': answers}, format='json'
+        )
+
+    def setUp(self):
+        super().setUp()
+        # Сильный курсант отвечает верно на всё, слабый — только на первый вопрос
+        self.submit(self.student, self.correct_answers())
+        weak = self.wrong_answers()
+        weak.update(self.correct_answers(self.questions[:1]))
+        self.submit(self.other_student, weak)
+
+    def stats(self):
+        return {
+            stats.question_id: (stats.attempts, stats.correct, round(stats.total_sum, 6))
+            for stats in QuestionStats.objects.all()
+        }
+
+    def test_attempt_log_written_per_question(self):
+        self.assertEqual(AnswerAttempt.objects.count(), 6)
+        self.assertEqual(AnswerAttempt.objects.filter(is_correct=True).count(), 4)
+
+    def test_difficulty_and_discrimination(self):
+        easy = QuestionStats.objects.get(question=self.questions[0])
+        hard = QuestionStats.objects.get(question=self.questions[1])
+        self.assertEqual(easy.difficulty, 1.0)
+        self.assertIsNone(easy.discrimination)
+        self.assertEqual(hard.difficulty, 0.5)
+        self.assertAlmostEqual(hard.discrimination, 1.0)
+
+    def test_endpoint_lists_question_stats(self):
+        response = self.client_for(self.instructor).get(f'/api/tests/{self.test.pk}/item_analysis/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['question'] for row in response.data], [question.pk for question in self.questions])
+        self.assertEqual(response.data[1]['correct'], 1)
+
+    def test_rebuild_matches_incremental_stats(self):
+        incremental = self.stats()
+        item_analysis.rebuild()
+        self.assertEqual(self.stats(), incremental)
@@ -0,0 +1,92 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool import leaderboard
+from autoschool.models import DriverGroup, LeaderboardEntry, StudentGroup
+
+from .base import AutoschoolTestCase
+
+
+class LeaderboardTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/groups/{self.group.pk}/leaderboard/'
+
+    def submit(self, student, answers):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(student).post(f'/api/tests/{self.test.pk}/submit_test/',
+                                                     {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def entry_queries(self, user):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(user).get(self.url)
+        return response.data, [query for query in queries if 'autoschool_leaderboardentry' in query['sql']]
+
+    def test_ranking_and_my_rank(self):
+        self.submit(self.student, self.wrong_answers())
+        self.submit(self.other_student, self.correct_answers())
+        # Лучшая попытка считается, худшая — нет
+        self.submit(self.student, self.correct_answers())
+        self.submit(self.student, self.wrong_answers())
+
+        data, _ = self.entry_queries(self.student)
+        self.assertEqual(data['students'], 2)
+        # Одинаковые рейтинг и баллы — общее место
+        self.assertEqual([(row['rank'], row['rating']) for row in data['top']], [(1, 100.0), (1, 100.0)])
+        self.assertEqual(data['me']['student'], self.student.pk)
+        self.assertEqual(data['me']['best_score_sum'], 3)
+        self.assertIsNone(self.entry_queries(self.instructor)[0]['me'])
+
+    def test_local_changes_update_board_in_place(self):
+        self.submit(self.student, self.wrong_answers())
+        _, queries = self.entry_queries(self.instructor)
+        self.assertEqual(len(queries), 1)
+        self.submit(self.other_student, self.correct_answers())
+        data, queries = self.entry_queries(self.instructor)
+        self.assertEqual(queries, [])
+        self.assertEqual(data['top'][0]['student'], self.other_student.pk)
+
+    def test_changes_from_other_processes_are_seen(self):
+        self.submit(self.student, self.correct_answers())
+        self.entry_queries(self.instructor)
+        # Другой процесс меняет строки и версию, не трогая рейтинг в памяти этого процесса
+        LeaderboardEntry.objects.filter(student=self.student).update(rating=10.0)
+        leaderboard._bump([self.group.pk])
+        data, queries = self.entry_queries(self.instructor)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['top'][0]['rating'], 10.0)
+
+    def test_stale_publish_drops_board(self):
+        self.submit(self.student, self.correct_answers())
+        self.entry_queries(self.instructor)
+        DriverGroup.objects.filter(pk=self.group.pk).update(leaderboard_version=100)
+        self.submit(self.other_student, self.correct_answers())
+        _, queries = self.entry_queries(self.instructor)
+        self.assertEqual(len(queries), 1)
+
+    def test_membership_changes(self):
+        self.submit(self.student, self.correct_answers())
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentGroup.objects.filter(student=self.student).delete()
+        self.assertEqual(self.entry_queries(self.instructor)[0]['students'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentGroup.objects.create(student=self.student, group=self.group)
+        data, _ = self.entry_queries(self.instructor)
+        self.assertEqual(data['top'][0]['student'], self.student.pk)
+
+    def test_rebuild_matches_incremental(self):
+        self.submit(self.student, self.correct_answers())
+        self.submit(self.other_student, self.wrong_answers())
+        before = self.entry_queries(self.instructor)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            leaderboard.rebuild()
+        self.assertEqual(self.entry_queries(self.instructor)[0], before)
+
+    def test_limit(self):
+        self.submit(self.student, self.correct_answers())
+        self.submit(self.other_student, self.wrong_answers())
+        client = self.client_for(self.instructor)
+        self.assertEqual(len(client.get(self.url, {'limit': 1}).data['top']), 1)
+        self.assertEqual(client.get(self.url, {'limit': 'много'}).status_code, 400)
+        self.assertEqual(self.client_for(self.outsider).get(self.url).status_code, 404)
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        os.makedirs(os.path.join(self.media_root, 'lectures'))
+        self.path = os.path.join(self.media_root, 'lectures', 'sign.png')
+        with open(self.path, 'wb') as handle:
+            handle.write(CONTENT)
+        self.url = '/media/lectures/sign.png'
+
+    def test_full_response_has_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_etag_follows_content(self):
+        etag = self.client.get(self.url)['ETag']
+        with open(self.path, 'wb') as handle:
+            handle.write(CONTENT[::-1])
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': f'"other", {etag}'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        mtime = os.stat(self.path).st_mtime
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': http_date(mtime)}).status_code, 304)
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': http_date(mtime - 60)}).status_code,
+                         200)
+        # If-None-Match важнее If-Modified-Since
+        response = self.client.get(self.url, headers={'If-None-Match': '"other"', 'If-Modified-Since': http_date(mtime)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-5'})
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+        response = self.client.get(self.url, headers={'Range': 'bytes=1000-'})
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[1000:])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={'Range': f'bytes={len(CONTENT)}-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get('/media/lectures/missing.png').status_code, 404)
+        self.assertEqual(self.client.get('/media/lectures').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    @override_settings(AUTOSCHOOL_MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect_hands_body_to_proxy(self):
+        response = self.client.get('/media/lectures/sign.png')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/lectures/sign.png')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
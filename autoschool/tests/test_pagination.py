@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from autoschool.models import Test
+
+from .base import AutoschoolTestCase
+
+
+class KeysetPaginationTests(AutoschoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Половина тестов создана в одну и ту же микросекунду — курсор должен различать их по id
+        moment = timezone.now()
+        for number in range(9):
+            Test.objects.create(title=f'Тест {number}', author=cls.instructor,
+                                created_at=moment if number % 2 else timezone.now())
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+
+    def expected_ids(self):
+        return list(Test.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            data = self.client.get(url).data
+            pages.append(data)
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids, pages = self.walk('/api/tests/?page_size=3&fields=id')
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual(len(pages), 4)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_previous_page(self):
+        _, pages = self.walk('/api/tests/?page_size=3&fields=id')
+        previous = self.client.get(pages[2]['previous']).data
+        self.assertEqual(previous['results'], pages[1]['results'])
+        self.assertIsNotNone(previous['previous'])
+        first = self.client.get(previous['previous']).data
+        self.assertEqual(first['results'], pages[0]['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_pages_do_not_use_offset(self):
+        _, pages = self.walk('/api/tests/?page_size=3&fields=id')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(pages[2]['next'])
+        self.assertFalse([query for query in queries.captured_queries if 'OFFSET' in query['sql']])
+
+    def test_invalid_cursor_is_404(self):
+        # p=["x"] — неверная длина, p=["bad-date", "1"] — не дата
+        for cursor in ('garbage', 'cD0lNUIlMjJ4JTIyJTVE', 'cD0lNUIlMjJiYWQtZGF0ZSUyMiUyQyslMjIxJTIyJTVE'):
+            self.assertEqual(self.client.get(f'/api/tests/?cursor={cursor}').status_code, 404)
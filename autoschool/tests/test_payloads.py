@@ -0,0 +1,45 @@
+import json
+from unittest import mock
+
+from autoschool import payloads
+from autoschool.models import Test
+
+from .base import AutoschoolTestCase
+
+
+class StudentPayloadTests(AutoschoolTestCase):
+    def get_detail(self, user=None):
+        return self.client_for(user or self.student).get(f'/api/tests/{self.test.pk}/')
+
+    def test_student_payload_hides_correct_answers(self):
+        response = self.get_detail()
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(len(data['questions']), 3)
+        for question in data['questions']:
+            for answer in question['answers']:
+                self.assertNotIn('is_correct', answer)
+
+    def test_instructor_sees_correct_answers(self):
+        data = self.get_detail(self.instructor).json()
+        self.assertIn('is_correct', data['questions'][0]['answers'][0])
+
+    def test_payload_rendered_once_per_version(self):
+        with mock.patch('autoschool.payloads.render_student_payload',
+                        wraps=payloads.render_student_payload) as render:
+            first = self.get_detail().content
+            second = self.get_detail().content
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 1)
+
+    def test_question_edit_changes_payload(self):
+        self.get_detail()
+        question = self.questions[0]
+        question.text = 'Новый текст'
+        question.save()
+        texts = [item['text'] for item in self.get_detail().json()['questions']]
+        self.assertIn('Новый текст', texts)
+
+    def test_ticket_test_payload_has_no_question_bank(self):
+        Test.objects.filter(pk=self.test.pk).update(ticket_size=2)
+        self.assertEqual(self.get_detail().json()['questions'], [])
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib import admin
+from django.core.management import call_command
+
+from autoschool import search
+from autoschool.models import Answer, Lecture, Question, Test
+
+from .base import AutoschoolTestCase
+
+
+class SearchTests(AutoschoolTestCase):
+    url = '/api/search/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lecture = Lecture.objects.create(title='Перекрёстки', content='Проезд нерегулируемых перекрёстков',
+                                             author=cls.instructor)
+        cls.lecture.groups.add(cls.group)
+        cls.hidden_lecture = Lecture.objects.create(title='Перекрёстки для другой группы', content='Закрытая',
+                                                    author=cls.instructor)
+        cls.hidden_test = Test.objects.create(title='Скрытый', author=cls.instructor)
+        cls.hidden_question = cls.create_question(cls.hidden_test, 'Перекрёсток равнозначных дорог')
+        cls.question = cls.create_question(cls.test, 'Кто уступает на перекрёстке?')
+
+    def hits(self, user, **params):
+        response = self.client_for(user).get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {(hit['type'], hit['id']) for hit in response.data['results']}
+
+    def test_ranked_prefix_search(self):
+        response = self.client_for(self.admin).get(self.url, {'q': 'перекрёст', 'type': 'lecture,question'})
+        results = response.data['results']
+        # Совпадение в заголовке весит больше, чем в тексте
+        self.assertEqual((results[0]['type'], results[0]['id']), ('lecture', self.lecture.pk))
+        self.assertIn('[', results[0]['snippet'])
+        self.assertEqual(len(results), 4)
+
+    def test_students_see_only_their_groups(self):
+        self.assertEqual(self.hits(self.student, q='перекрёст', type='lecture,question'),
+                         {('lecture', self.lecture.pk), ('question', self.question.pk)})
+        self.assertEqual(self.hits(self.outsider, q='перекрёст'), set())
+
+    def test_filter_by_type_and_answers_are_indexed(self):
+        self.assertEqual(self.hits(self.admin, q='перекрёст', type='question'),
+                         {('question', self.question.pk), ('question', self.hidden_question.pk)})
+        answer = self.question.answers.first()
+        self.assertIn(('answer', answer.pk), self.hits(self.student, q='уступает ответ', type='answer'))
+
+    def test_index_follows_edits_and_deletes(self):
+        self.question.text = 'Обгон запрещён'
+        self.question.save()
+        self.assertEqual(self.hits(self.admin, q='обгон'), {('question', self.question.pk)})
+        self.question.delete()
+        self.assertEqual(self.hits(self.admin, q='обгон'), set())
+
+    def test_bad_requests(self):
+        client = self.client_for(self.student)
+        self.assertEqual(client.get(self.url).status_code, 400)
+        self.assertEqual(client.get(self.url, {'q': 'знак', 'type': 'video'}).status_code, 400)
+        self.assertEqual(self.hits(self.student, q='!!!'), set())
+
+    def test_rebuild_command(self):
+        search.get_backend().clear()
+        self.assertEqual(self.hits(self.admin, q='перекрёст'), set())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.hits(self.admin, q='перекрёст', type='lecture,question')), 4)
+        Question.objects.filter(pk=self.question.pk).update(text='Без сигналов')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertIn(('question', self.question.pk), self.hits(self.admin, q='сигналов'))
+
+    def test_students_search_the_published_version(self):
+        self.client_for(self.instructor).post(f'/api/tests/{self.test.pk}/publish/')
+        self.question.text = 'Черновик про разворот'
+        self.question.save()
+        draft = self.create_question(self.test, 'Новый черновой разворот')
+        # Курсант находит опубликованный текст и не видит черновик
+        self.assertEqual(self.hits(self.student, q='разворот'), set())
+        self.assertEqual(self.hits(self.student, q='уступает', type='question'), {('question', self.question.pk)})
+        # Персонал ищет по черновику
+        self.assertEqual(self.hits(self.admin, q='разворот', type='question'),
+                         {('question', self.question.pk), ('question', draft.pk)})
+        self.assertEqual(self.hits(self.admin, q='уступает', type='question'), set())
+
+        self.client_for(self.instructor).post(f'/api/tests/{self.test.pk}/publish/')
+        self.assertEqual(self.hits(self.student, q='разворот', type='question'),
+                         {('question', self.question.pk), ('question', draft.pk)})
+        self.assertEqual(self.hits(self.student, q='уступает', type='question'), set())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.hits(self.student, q='разворот', type='question')), 2)
+
+        self.test.delete()
+        self.assertEqual(self.hits(self.admin, q='разворот'), set())
+
+
+class AdminSearchTests(AutoschoolTestCase):
+    def results(self, model, term):
+        queryset, _ = admin.site._registry[model].get_search_results(None, model.objects.all(), term)
+        return queryset
+
+    def test_all_matches_without_limit(self):
+        lectures = Lecture.objects.bulk_create(
+            [Lecture(title=f'Разметка {n}', content='...', author=self.instructor) for n in range(1005)]
+        )
+        search.get_backend().index(search.lecture_documents(lectures))
+        self.assertEqual(self.results(Lecture, 'размет').count(), 1005)
+        self.assertEqual(self.results(Lecture, '!!').count(), 0)
+
+    def test_kinds_do_not_mix(self):
+        question = self.create_question(self.test, 'Обгон запрещён', answers=0)
+        answer = Answer.objects.create(question=question, text='Разворот', is_correct=True)
+        self.assertEqual(list(self.results(Question, 'обгон')), [question])
+        self.assertEqual(list(self.results(Answer, 'разворот')), [answer])
+        self.assertFalse(self.results(Answer, 'обгон').exists())
+        self.assertFalse(self.results(Lecture, 'обгон').exists())
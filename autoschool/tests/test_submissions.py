@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from autoschool.grading import get_ticket_answer_key
+from autoschool.models import Test, TestAttempt, TestResult
+from autoschool.writebehind import ResultWriteQueue
+
+from .base import AutoschoolTestCase
+
+
+class SubmitBatchTests(AutoschoolTestCase):
+    url = '/api/tests/submit_batch/'
+
+    def submit(self, submissions):
+        return self.client_for(self.instructor).post(
+            self.url, {'test': self.test.pk, 'submissions': submissions}, format='json'
+        )
+
+    def test_batch_grades_every_submission_and_reports_errors(self):
+        response = self.submit([
+            {'student_id': self.student.pk, 'answers': self.correct_answers()},
+            {'student_id': self.other_student.pk, 'answers': self.wrong_answers()},
+            {'student_id': self.outsider.pk, 'answers': {}},
+        ])
+        self.assertEqual(response.status_code, 201)
+        results = response.data['results']
+        self.assertEqual([results[0]['score'], results[1]['score']], [3, 0])
+        self.assertEqual(results[2]['student_id'], self.outsider.pk)
+        self.assertIn('error', results[2])
+        self.assertEqual(TestResult.objects.count(), 2)
+
+    def test_duplicate_students_rejected(self):
+        response = self.submit([
+            {'student_id': self.student.pk, 'answers': self.correct_answers()},
+            {'student_id': str(self.student.pk), 'answers': self.wrong_answers()},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['student_ids'], [self.student.pk])
+        self.assertFalse(TestResult.objects.exists())
+
+    def test_submission_without_student_id_rejected(self):
+        response = self.submit([{'answers': {}}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_students_cannot_submit_batches(self):
+        response = self.client_for(self.student).post(
+            self.url, {'test': self.test.pk, 'submissions': [{'student_id': self.student.pk}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class WriteBehindTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        # Таймер сброса не должен сработать во время теста
+        self.queue = ResultWriteQueue(batch_size=2, flush_interval=3600)
+        patcher = mock.patch('autoschool.views.result_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.queue.flush)
+
+    def submit(self, student):
+        return self.client_for(student).post(
+            f'/api/tests/{self.test.pk}/submit_test/', {'answers': self.correct_answers()}, format='json'
+        )
+
+    @override_settings(AUTOSCHOOL_RESULT_WRITE_BEHIND=True)
+    def test_queued_result_answers_202_without_id(self):
+        response = self.submit(self.student)
+        self.assertEqual(response.status_code, 202)
+        self.assertNotIn('id', response.data)
+        self.assertEqual(response.data['score'], 3)
+        self.assertFalse(TestResult.objects.exists())
+
+        self.queue.flush()
+        self.assertEqual(TestResult.objects.get().student, self.student)
+
+    @override_settings(AUTOSCHOOL_RESULT_WRITE_BEHIND=True)
+    def test_queue_flushes_full_batch(self):
+        self.submit(self.student)
+        self.submit(self.other_student)
+        self.assertEqual(TestResult.objects.count(), 2)
+
+
+class SubmitBatchTicketTests(AutoschoolTestCase):
+    url = '/api/tests/submit_batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pool = Test.objects.create(title='Билеты', author=cls.instructor, ticket_size=2)
+        cls.pool.groups.add(cls.group)
+        cls.bank = [cls.create_question(cls.pool, f'Билетный {number}') for number in range(4)]
+
+    def attempt(self, student):
+        response = self.client_for(student).post(f'/api/tests/{self.pool.pk}/start_attempt/')
+        return TestAttempt.objects.get(pk=response.data['id'])
+
+    def submit(self, submissions):
+        return self.client_for(self.instructor).post(
+            self.url, {'test': self.pool.pk, 'submissions': submissions}, format='json'
+        )
+
+    def test_bad_test_id_is_400(self):
+        for test_id in ('abc', '1.5', -1):
+            response = self.client_for(self.instructor).post(
+                self.url, {'test': test_id, 'submissions': [{'student_id': self.student.pk}]}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, test_id)
+
+    def test_attempt_claimed_concurrently_is_not_graded(self):
+        first, second = self.attempt(self.student), self.attempt(self.other_student)
+
+        def claim_first(*args):
+            # Параллельный пакет успел сдать попытку первого курсанта
+            TestAttempt.objects.filter(pk=first.pk).update(submitted_at=timezone.now())
+            return get_ticket_answer_key(*args)
+
+        with mock.patch('autoschool.views.get_ticket_answer_key', side_effect=claim_first):
+            response = self.submit([
+                {'student_id': self.student.pk, 'attempt': first.pk, 'answers': self.correct_answers(self.bank)},
+                {'student_id': self.other_student.pk, 'attempt': second.pk,
+                 'answers': self.correct_answers(self.bank)},
+            ])
+        self.assertEqual(response.status_code, 201)
+        results = response.data['results']
+        self.assertEqual(results[0], {'student_id': self.student.pk, 'error': 'Попытка не найдена или уже завершена'})
+        self.assertEqual(results[1]['score'], 2)
+        self.assertEqual(list(TestResult.objects.values_list('student_id', flat=True)), [self.other_student.pk])
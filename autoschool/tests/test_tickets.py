@@ -0,0 +1,104 @@
+from collections import Counter
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from autoschool import tickets
+from autoschool.models import Question, Test, TestAttempt, TestResult
+
+from .base import AutoschoolTestCase
+
+
+class TicketTests(AutoschoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pool = Test.objects.create(title='Билеты', author=cls.instructor, ticket_size=4)
+        cls.pool.groups.add(cls.group)
+        cls.bank = [cls.create_question(cls.pool, f'Билетный {number}', topic='Знаки' if number < 6 else 'Разметка',
+                                        answers=2)
+                    for number in range(9)]
+        cls.pool.refresh_from_db()
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.student)
+        self.url = f'/api/tests/{self.pool.pk}/'
+
+    def start(self, client=None):
+        return (client or self.client).post(self.url + 'start_attempt/')
+
+    def test_start_returns_ticket(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        ids = [question['id'] for question in response.data['questions']]
+        self.assertEqual(len(set(ids)), 4)
+        self.assertTrue(set(ids) <= {question.pk for question in self.bank})
+        self.assertNotIn('is_correct', response.data['questions'][0]['answers'][0])
+        self.assertEqual(TestAttempt.objects.get(pk=response.data['id']).question_ids, ids)
+
+    def test_open_attempt_is_reused(self):
+        first = self.start()
+        second = self.start()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(second.data['questions'], first.data['questions'])
+        self.assertEqual(TestAttempt.objects.filter(student=self.student).count(), 1)
+        # У другого курсанта — своя попытка
+        self.assertEqual(self.start(self.client_for(self.other_student)).status_code, 201)
+
+    def test_submit_grades_only_drawn_questions(self):
+        attempt = self.start().data
+        drawn = Question.objects.filter(pk__in=[question['id'] for question in attempt['questions']])
+        answers = {**self.correct_answers(drawn), **self.correct_answers(self.bank)}
+        response = self.client.post(self.url + 'submit_test/', {'attempt': attempt['id'], 'answers': answers},
+                                    format='json')
+        self.assertEqual((response.data['score'], response.data['max_score']), (4, 4))
+
+        # Сданную попытку второй раз не сдать, а новый запрос выдаёт новый билет
+        response = self.client.post(self.url + 'submit_test/', {'attempt': attempt['id'], 'answers': answers},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TestResult.objects.filter(test=self.pool).count(), 1)
+        restarted = self.start()
+        self.assertEqual(restarted.status_code, 201)
+        self.assertNotEqual(restarted.data['id'], attempt['id'])
+
+    def test_failed_save_keeps_attempt_open(self):
+        attempt = self.start().data
+        payload = {'attempt': attempt['id'], 'answers': self.correct_answers(self.bank)}
+        with mock.patch('autoschool.views.save_results', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url + 'submit_test/', payload, format='json')
+        self.assertIsNone(TestAttempt.objects.get(pk=attempt['id']).submitted_at)
+
+        response = self.client.post(self.url + 'submit_test/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(TestResult.objects.filter(test=self.pool).count(), 1)
+
+    def test_ticket_tests_require_attempt(self):
+        response = self.client.post(self.url + 'submit_test/', {'answers': self.correct_answers(self.bank)},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_students_start_attempts(self):
+        self.assertEqual(self.start(self.client_for(self.instructor)).status_code, 403)
+
+    def test_draw_is_seeded_and_uses_cached_pool(self):
+        self.assertEqual(tickets.draw(self.pool, 7), tickets.draw(self.pool, 7))
+        with CaptureQueriesContext(connection) as queries:
+            tickets.draw(self.pool, 8)
+        self.assertFalse([query for query in queries if 'autoschool_question' in query['sql']])
+
+    def test_stratified_by_topic(self):
+        self.pool.ticket_by_topic = True
+        self.pool.ticket_size = 3
+        topics = {question.pk: question.topic for question in self.bank}
+        for seed in range(5):
+            counts = Counter(topics[question_id] for question_id in tickets.draw(self.pool, seed))
+            self.assertEqual(counts, {'Знаки': 2, 'Разметка': 1})
+
+    def test_allocate(self):
+        self.assertEqual(tickets.allocate({'a': 6, 'b': 3}, 3), {'a': 2, 'b': 1})
+        self.assertEqual(sum(tickets.allocate({'a': 1, 'b': 1, 'c': 1}, 2).values()), 2)
@@ -0,0 +1,69 @@
+from autoschool.models import CustomUser, QuestionStats, TestResult, TestVersion
+
+from .base import AutoschoolTestCase
+
+
+class TestVersionTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.instructor_client = self.client_for(self.instructor)
+        self.student_client = self.client_for(self.student)
+
+    def publish(self):
+        response = self.instructor_client.post(f'/api/tests/{self.test.pk}/publish/')
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def submit(self, answers):
+        response = self.student_client.post(
+            f'/api/tests/{self.test.pk}/submit_test/', {'answers': answers}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_draft_edits_stay_hidden_until_republished(self):
+        self.assertEqual(self.publish()['number'], 1)
+        question = self.questions[0]
+        question.text = 'Черновик'
+        question.save()
+        detail = self.student_client.get(f'/api/tests/{self.test.pk}/').json()
+        self.assertEqual(detail['questions'][0]['text'], 'Вопрос 0')
+        self.assertEqual(self.publish()['number'], 2)
+        detail = self.student_client.get(f'/api/tests/{self.test.pk}/').json()
+        self.assertEqual(detail['questions'][0]['text'], 'Черновик')
+
+    def test_publish_requires_questions_and_staff(self):
+        self.assertEqual(self.student_client.post(f'/api/tests/{self.test.pk}/publish/').status_code, 403)
+        self.test.questions.all().delete()
+        response = self.instructor_client.post(f'/api/tests/{self.test.pk}/publish/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_submission_after_deleting_draft_question(self):
+        self.publish()
+        self.submit(self.correct_answers())
+        deleted = self.questions[0]
+        deleted.delete()
+        # Вопрос остаётся в опубликованной версии и проверяется по ней
+        result = self.submit(self.correct_answers(self.questions[1:]) | {str(deleted.pk): 0})
+        self.assertEqual((result['score'], result['max_score']), (2, 3))
+        self.assertEqual(TestResult.objects.filter(test=self.test).count(), 2)
+        self.assertFalse(QuestionStats.objects.filter(question_id=deleted.pk).exists())
+        self.assertEqual(QuestionStats.objects.get(question=self.questions[1]).attempts, 2)
+
+
+class TestVersionAdminTests(AutoschoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(CustomUser.objects.create_superuser('root', password='x'))
+        self.client_for(self.instructor).post(f'/api/tests/{self.test.pk}/publish/')
+        self.version = TestVersion.objects.get(test=self.test)
+        self.url = f'/admin/autoschool/testversion/{self.version.pk}/change/'
+
+    def test_versions_are_read_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['has_change_permission'])
+        self.assertEqual(self.client.post(self.url, {'number': 5}).status_code, 403)
+        self.assertEqual(self.client.get('/admin/autoschool/testversion/add/').status_code, 403)
+        self.version.refresh_from_db()
+        self.assertEqual(self.version.number, 1)
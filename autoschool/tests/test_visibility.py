@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+
+from autoschool import visibility
+from autoschool.models import ContentVisibility, Lecture, StudentGroup, Test
+
+from .base import AutoschoolTestCase
+
+
+class VisibilityTests(AutoschoolTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lecture = Lecture.objects.create(title='Разметка', content='Сплошная линия', author=cls.instructor)
+        cls.lecture.groups.add(cls.group)
+
+    def visible(self, student, model):
+        return set(model.objects.filter(id__in=visibility.visible_ids(student, model)).values_list('id', flat=True))
+
+    def test_group_members_see_assigned_content(self):
+        self.assertEqual(self.visible(self.student, Test), {self.test.pk})
+        self.assertEqual(self.visible(self.student, Lecture), {self.lecture.pk})
+        self.assertEqual(self.visible(self.outsider, Test), set())
+
+    def test_outsider_gets_404_and_empty_list(self):
+        client = self.client_for(self.outsider)
+        self.assertEqual(client.get(f'/api/tests/{self.test.pk}/').status_code, 404)
+        self.assertEqual(client.get('/api/lectures/').data['results'], [])
+
+    def test_joining_and_leaving_group_updates_index(self):
+        membership = StudentGroup.objects.create(student=self.outsider, group=self.group)
+        self.assertEqual(self.visible(self.outsider, Test), {self.test.pk})
+        membership.delete()
+        self.assertEqual(self.visible(self.outsider, Test), set())
+
+    def test_unassigning_content_hides_it(self):
+        self.test.groups.remove(self.group)
+        self.assertEqual(self.visible(self.student, Test), set())
+        self.group.lectures.clear()
+        self.assertEqual(self.visible(self.student, Lecture), set())
+
+    def test_deleted_content_dropped_from_index(self):
+        lecture_id = self.lecture.pk
+        self.lecture.delete()
+        self.assertFalse(ContentVisibility.objects.filter(
+            content_type=ContentType.objects.get_for_model(Lecture), object_id=lecture_id
+        ).exists())
+
+    def test_deferred_refresh_recomputes_once(self):
+        with mock.patch('autoschool.visibility.bump_users') as bump:
+            with visibility.deferred_refresh():
+                StudentGroup.objects.create(student=self.outsider, group=self.group)
+                StudentGroup.objects.filter(student=self.student).delete()
+        bump.assert_called_once()
+        self.assertEqual(set(bump.call_args.args[0]), {self.outsider.pk, self.student.pk})
+        self.assertEqual(self.visible(self.outsider, Test), {self.test.pk})
+        self.assertEqual(self.visible(self.student, Test), set())
+
+    def test_rebuild_matches_incremental_index(self):
+        before = set(ContentVisibility.objects.values_list('student_id', 'content_type_id', 'object_id'))
+        visibility.rebuild()
+        after = set(ContentVisibility.objects.values_list('student_id', 'content_type_id', 'object_id'))
+        self.assertEqual(before, after)
@@ -0,0 +1,106 @@
+import random
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Question, TestAttempt
+from .payloads import content_version
+from .serializers import StudentQuestionSerializer
+from .versions import published_questions
+
+QUESTION_POOL_CACHE_KEY = 'autoschool:question_pool:{test_id}:{version}'
+
+
+def question_pool(test):
+    """Банк вопросов теста: (все id, {тема: id}).
+
+    Банк опубликованной версии кэшируется без срока, банк черновика — до
+    изменения теста.
+    """
+    if test.published_version_id:
+        version = f'v{test.published_version_id}'
+        timeout = None
+    else:
+        version = content_version(test)
+        timeout = getattr(settings, 'AUTOSCHOOL_PAYLOAD_CACHE_TIMEOUT', 24 * 60 * 60)
+    cache_key = QUESTION_POOL_CACHE_KEY.format(test_id=test.id, version=version)
+    pool = cache.get(cache_key)
+    if pool is None:
+        if test.published_version_id:
+            rows = ((question['id'], question['topic'])
+                    for question in published_questions(test.published_version_id))
+        else:
+            rows = Question.objects.filter(test=test).order_by('id').values_list('id', 'topic')
+        ids, topics = [], {}
+        for question_id, topic in rows:
+            ids.append(question_id)
+            topics.setdefault(topic, []).append(question_id)
+        pool = (tuple(ids), {topic: tuple(topic_ids) for topic, topic_ids in topics.items()})
+        cache.set(cache_key, pool, timeout)
+    return pool
+
+
+def allocate(sizes, size):
+    """Делит size вопросов между темами пропорционально их объёму (метод наибольших остатков)."""
+    total = sum(sizes.values())
+    quotas = {topic: size * count / total for topic, count in sizes.items()}
+    counts = {topic: int(quota) for topic, quota in quotas.items()}
+    remainder = size - sum(counts.values())
+    for topic in sorted(quotas, key=lambda topic: (counts[topic] - quotas[topic], topic))[:remainder]:
+        counts[topic] += 1
+    return counts
+
+
+def draw(test, seed):
+    """id вопросов билета для seed.
+
+    random.sample по закэшированному кортежу при большом банке выбирает
+    индексы без копирования популяции, так что билет строится за O(N).
+    """
+    ids, topics = question_pool(test)
+    size = test.ticket_size
+    if not size or size >= len(ids):
+        return list(ids)
+    rng = random.Random(seed)
+    if not test.ticket_by_topic or len(topics) < 2:
+        return rng.sample(ids, size)
+    ticket = []
+    for topic, count in allocate({topic: len(ids) for topic, ids in topics.items()}, size).items():
+        ticket.extend(rng.sample(topics[topic], count))
+    rng.shuffle(ticket)
+    return ticket
+
+
+def start_attempt(test, student):
+    """Открытая попытка курсанта по тесту и флаг, создана ли она сейчас.
+
+    Пока билет не сдан, повторный запрос возвращает его же: иначе можно было
+    бы перебирать билеты, пока не попадётся удобный, и копить попытки в базе.
+    """
+    with transaction.atomic():
+        # Транзакция SQLite в режиме IMMEDIATE сразу берёт блокировку записи,
+        # так что два одновременных запроса не создадут две попытки
+        attempt = TestAttempt.objects.filter(
+            test=test, student=student, submitted_at__isnull=True
+        ).order_by('-id').first()
+        if attempt is not None:
+            return attempt, False
+        seed = secrets.randbits(63)
+        attempt = TestAttempt.objects.create(test=test, student=student, seed=seed, question_ids=draw(test, seed),
+                                             version_id=test.published_version_id)
+    return attempt, True
+
+
+def ticket_questions(attempt, context=None):
+    """Вопросы билета в представлении для курсанта, в порядке выдачи."""
+    question_ids = attempt.question_ids
+    if attempt.version_id:
+        questions = {question['id']: question for question in published_questions(attempt.version_id)}
+        return [questions[question_id] for question_id in question_ids if question_id in questions]
+    questions = Question.objects.prefetch_related('answers').in_bulk(question_ids)
+    return StudentQuestionSerializer(
+        [questions[question_id] for question_id in question_ids if question_id in questions],
+        many=True, context=context
+    ).data
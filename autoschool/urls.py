@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     CustomUserViewSet, DriverGroupViewSet, LectureViewSet,
-    TestViewSet, TestResultViewSet
+    TestViewSet, TestResultViewSet, TestStatsViewSet,
+    GroupTestStatsViewSet, StudentTestStatsViewSet, SearchViewSet, MeViewSet
 )
 
 router = DefaultRouter()
@@ -11,8 +13,19 @@ router.register(r'groups', DriverGroupViewSet)
 router.register(r'lectures', LectureViewSet)
 router.register(r'tests', TestViewSet)
 router.register(r'results', TestResultViewSet)
+router.register(r'analytics/tests', TestStatsViewSet)
+router.register(r'analytics/groups', GroupTestStatsViewSet)
+router.register(r'analytics/students', StudentTestStatsViewSet)
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'me', MeViewSet, basename='me')
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    # Асинхронные варианты чтения для курсантов (при запуске через ASGI)
+    path('api/student/tests/', async_views.test_list),
+    path('api/student/tests/<int:pk>/', async_views.test_detail),
+    path('api/student/lectures/', async_views.lecture_list),
+    path('api/student/lectures/<int:pk>/', async_views.lecture_detail),
+    path('api/student/results/', async_views.result_list),
     path('api-auth/', include('rest_framework.urls')),
 ]
\ No newline at end of file
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import search
+from .conditional import bump_collection
+from .models import Question, Test, TestVersion
+
+VERSION_QUESTIONS_CACHE_KEY = 'autoschool:version_questions:{version_id}'
+
+
+class PublishError(ValueError):
+    pass
+
+
+def publish(test, user=None):
+    """Замораживает текущие вопросы и ответы теста в новую версию и публикует её.
+
+    Дальнейшие правки вопросов меняют только черновик: курсанты и проверка
+    ответов работают с опубликованной версией до следующей публикации.
+    """
+    from .serializers import StudentQuestionSerializer
+
+    with transaction.atomic():
+        questions = list(Question.objects.filter(test=test).order_by('id').prefetch_related('answers'))
+        if not questions:
+            raise PublishError('Нельзя опубликовать тест без вопросов')
+        answer_key = {
+            str(question.pk): [answer.pk for answer in question.answers.all() if answer.is_correct]
+            for question in questions
+        }
+        previous = Test.objects.filter(pk=test.pk).values_list('published_version', flat=True).get()
+        number = (TestVersion.objects.filter(test=test).aggregate(last=Max('number'))['last'] or 0) + 1
+        version = TestVersion.objects.create(
+            test=test,
+            number=number,
+            questions=StudentQuestionSerializer(questions, many=True).data,
+            answer_key=answer_key,
+            published_by=user
+        )
+        Test.objects.filter(pk=test.pk).update(published_version=version, updated_at=timezone.now())
+        search.replace_version(
+            test.pk, published_questions(previous) if previous else None, version.questions
+        )
+    bump_collection(Test)
+    return version
+
+
+def published_questions(version_id):
+    """Вопросы версии в представлении для курсанта; кэшируются без срока."""
+    cache_key = VERSION_QUESTIONS_CACHE_KEY.format(version_id=version_id)
+    questions = cache.get(cache_key)
+    if questions is None:
+        questions = TestVersion.objects.filter(pk=version_id).values_list('questions', flat=True).get()
+        cache.set(cache_key, questions, None)
+    return questions
@@ -1,15 +1,46 @@
+from datetime import datetime, time, timedelta
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
 from .models import (
     CustomUser, DriverGroup, StudentGroup, Lecture,
-    LectureImage, Test, Question, Answer, TestResult
+    LectureImage, Test, Question, Answer, TestResult,
+    TestStats, GroupTestStats, StudentTestStats, QuestionStats, TestAttempt
+)
+from .conditional import ConditionalGetMixin, make_etag, not_modified, set_validators
+from .dashboard import dashboard_versions, get_dashboard
+from .enrollment import EnrollmentError, enroll, parse_student_refs, resolve_students, unenroll
+from .fieldsets import SparseQuerysetMixin, has_selection
+from .exports import stream_csv, stream_ndjson
+# Под своими именами функции импорта перекрывались бы одноимёнными действиями представлений
+from .imports import (
+    ImportFormatError, TestImportError, image_files, import_test as import_test_data,
+    import_users as import_user_rows, read_rows, read_test, test_file_format
 )
+from .grading import get_test_answer_key, get_ticket_answer_key, grade, save_results
+from .leaderboard import standings
+from .permissions import IsStudentUser, user_creation_error
+from .pagination import IdPagination, TestResultPagination
+from .payloads import get_student_payload
+from .search import get_backend as get_search_backend
+from .tickets import start_attempt as start_ticket_attempt, ticket_questions
+from .versions import PublishError, publish as publish_version
+from .visibility import visible_ids
+from .writebehind import result_queue
 from .serializers import (
     CustomUserSerializer, DriverGroupSerializer, StudentGroupSerializer,
     LectureSerializer, LectureImageSerializer, TestSerializer,
-    QuestionSerializer, AnswerSerializer, TestResultSerializer
+    QuestionSerializer, AnswerSerializer, TestResultSerializer,
+    StudentTestSerializer, TestStatsSerializer, GroupTestStatsSerializer,
+    StudentTestStatsSerializer, TestAttemptSerializer, TestVersionSerializer
 )
 
 
@@ -25,9 +56,10 @@ class IsAdminOrInstructor(permissions.BasePermission):
         return request.user.is_authenticated and request.user.user_type in ['admin', 'instructor']
 
 
-class CustomUserViewSet(viewsets.ModelViewSet):
+class CustomUserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
+    pagination_class = IdPagination
 
     def get_permissions(self):
         if self.action == 'create':
@@ -38,28 +70,76 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         user_type = request.data.get('user_type')
 
         # Проверка разрешений
-        if user_type == 'admin':
-            if not request.user.has_perm('autoschool.create_admin'):
-                return Response({'error': 'У вас нет прав на создание администраторов'},
-                                status=status.HTTP_403_FORBIDDEN)
-        elif user_type == 'instructor':
-            if not (request.user.user_type == 'admin' or request.user.has_perm('autoschool.create_instructor')):
-                return Response({'error': 'У вас нет прав на создание инструкторов'},
-                                status=status.HTTP_403_FORBIDDEN)
-        elif user_type == 'student':
-            if not (request.user.user_type in ['admin', 'instructor'] or
-                    request.user.has_perm('autoschool.create_student')):
-                return Response({'error': 'У вас нет прав на создание курсантов'},
-                                status=status.HTTP_403_FORBIDDEN)
+        error = user_creation_error(request.user, user_type)
+        if error:
+            return Response({'error': error}, status=status.HTTP_403_FORBIDDEN)
 
         return super().create(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_users(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                file_format = 'json' if upload.name.lower().endswith('.json') else 'csv'
+                rows = read_rows(upload.read(), file_format)
+            else:
+                rows = request.data.get('users') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise ImportFormatError('Нужно передать список users или загрузить файл')
+        except ImportFormatError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_user_rows(rows, actor=request.user)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
 
-class DriverGroupViewSet(viewsets.ModelViewSet):
+
+class DriverGroupViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = DriverGroup.objects.all()
     serializer_class = DriverGroupSerializer
     permission_classes = [IsAdminOrInstructor]
 
+    def get_permissions(self):
+        if self.action == 'leaderboard':
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.user_type == 'student':
+            # Курсанту доступны только рейтинги его групп
+            return DriverGroup.objects.filter(students__student=user)
+        return super().get_queryset()
+
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        group = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'error': 'limit должен быть числом'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), getattr(settings, 'AUTOSCHOOL_LEADERBOARD_MAX_LIMIT', 100))
+
+        student_id = request.user.pk if request.user.user_type == 'student' else None
+        total, top, me = standings(group.pk, limit, student_id)
+        usernames = dict(
+            CustomUser.objects.filter(pk__in=[row[1] for row in top]).values_list('id', 'username')
+        )
+
+        def entry(row, username=None):
+            rank, student, (tests_taken, best_score_sum, max_score_sum, rating) = row
+            return {'rank': rank, 'student': student, 'username': username,
+                    'tests_taken': tests_taken, 'best_score_sum': best_score_sum,
+                    'max_score_sum': max_score_sum, 'rating': rating}
+
+        return Response({
+            'group': group.pk,
+            'students': total,
+            'top': [entry(row, usernames.get(row[1])) for row in top],
+            'me': entry(me, request.user.username) if me else None,
+        })
+
     @action(detail=True, methods=['post'])
     def add_student(self, request, pk=None):
         group = self.get_object()
@@ -107,16 +187,48 @@ class DriverGroupViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Курсант не находится в этой группе'},
                             status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=['post'])
+    def add_students(self, request, pk=None):
+        group = self.get_object()
+        try:
+            student_ids, usernames = parse_student_refs(request.data, request.FILES)
+        except EnrollmentError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        found, missing = resolve_students(student_ids, usernames)
+        added, skipped = enroll(group, found)
+        return Response({'added': added, 'skipped': skipped, 'missing': missing},
+                        status=status.HTTP_201_CREATED if added else status.HTTP_200_OK)
 
-class LectureViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['delete'])
+    def remove_students(self, request, pk=None):
+        group = self.get_object()
+        try:
+            student_ids, usernames = parse_student_refs(request.data, request.FILES)
+        except EnrollmentError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        found, missing = resolve_students(student_ids, usernames)
+        removed, skipped = unenroll(group, found)
+        return Response({'removed': removed, 'skipped': skipped, 'missing': missing},
+                        status=status.HTTP_200_OK)
+
+
+class LectureViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Lecture.objects.all()
     serializer_class = LectureSerializer
     permission_classes = [IsAdminOrInstructor]
+    always_fields = ('updated_at',)
+
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve']:
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
 
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'student':
-            return Lecture.objects.filter(groups__students__student=user).distinct()
+            return Lecture.objects.filter(id__in=visible_ids(user, Lecture))
         return super().get_queryset()
 
     @action(detail=True, methods=['post'])
@@ -139,17 +251,70 @@ class LectureViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class TestViewSet(viewsets.ModelViewSet):
+class TestViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Test.objects.all()
     serializer_class = TestSerializer
     permission_classes = [IsAdminOrInstructor]
+    always_fields = ('updated_at', 'published_version')
+
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve', 'start_attempt', 'submit_test']:
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
 
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'student':
-            return Test.objects.filter(groups__students__student=user).distinct()
+            return Test.objects.filter(id__in=visible_ids(user, Test))
         return super().get_queryset()
 
+    def get_serializer_class(self):
+        if self.request.user.user_type == 'student':
+            return StudentTestSerializer
+        return super().get_serializer_class()
+
+    def serves_cached_payload(self):
+        # Курсантам отдаём заранее собранный JSON из кэша, если не заказан свой набор полей
+        return (self.action == 'retrieve' and self.request.user.user_type == 'student'
+                and not has_selection(self.request))
+
+    def sparse_fields_enabled(self):
+        return super().sparse_fields_enabled() and not self.serves_cached_payload()
+
+    def retrieve_response(self, instance):
+        if self.serves_cached_payload():
+            return HttpResponse(get_student_payload(instance), content_type='application/json')
+        return super().retrieve_response(instance)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_test(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                data = read_test(upload.read(), test_file_format(upload.name))
+                # Поля самого теста можно передать рядом с файлом
+                for field in ('title', 'description', 'ticket_size', 'ticket_by_topic'):
+                    if field in request.data:
+                        data[field] = request.data.get(field)
+                if 'groups' in request.data:
+                    data['groups'] = request.data.getlist('groups')
+            elif isinstance(request.data, dict):
+                data = request.data
+            else:
+                raise ImportFormatError('Нужно передать тест объектом или загрузить файл')
+        except ImportFormatError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Изображения вопросов — остальные файлы запроса, по имени файла
+            files = image_files(
+                image for field, uploads in request.FILES.lists() if field != 'file' for image in uploads
+            )
+            report = import_test_data(data, request.user, files)
+        except TestImportError as exc:
+            return Response({'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'])
     def add_question(self, request, pk=None):
         test = self.get_object()
@@ -163,6 +328,7 @@ class TestViewSet(viewsets.ModelViewSet):
         question = Question.objects.create(
             test=test,
             text=text,
+            topic=request.data.get('topic', ''),
             image=image
         )
 
@@ -195,6 +361,51 @@ class TestViewSet(viewsets.ModelViewSet):
         serializer = AnswerSerializer(answer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        test = self.get_object()
+        try:
+            version = publish_version(test, request.user)
+        except PublishError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TestVersionSerializer(version).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        test = self.get_object()
+        serializer = TestVersionSerializer(test.versions.order_by('-number'), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def item_analysis(self, request, pk=None):
+        test = self.get_object()
+        stats = (QuestionStats.objects.filter(question__test=test)
+                 .select_related('question').order_by('question_id'))
+        data = [
+            {
+                'question': item.question_id,
+                'text': item.question.text,
+                'attempts': item.attempts,
+                'correct': item.correct,
+                'difficulty': item.difficulty,
+                'discrimination': item.discrimination,
+            }
+            for item in stats
+        ]
+        return Response(data)
+
+    @action(detail=True, methods=['post'])
+    def start_attempt(self, request, pk=None):
+        test = self.get_object()
+        if request.user.user_type != 'student':
+            return Response({'error': 'Только курсанты могут проходить тесты'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        attempt, created = start_ticket_attempt(test, request.user)
+        data = TestAttemptSerializer(attempt).data
+        data['questions'] = ticket_questions(attempt, self.get_serializer_context())
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'])
     def submit_test(self, request, pk=None):
         test = self.get_object()
@@ -204,38 +415,172 @@ class TestViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Только курсанты могут проходить тесты'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        # Проверка ответов
-        submitted_answers = request.data.get('answers', {})
-        score = 0
-        max_score = 0
-
-        for question in test.questions.all():
-            max_score += 1
-            correct_answer_id = question.answers.filter(is_correct=True).first()
-
-            if correct_answer_id:
-                correct_answer_id = correct_answer_id.id
-                submitted_answer_id = submitted_answers.get(str(question.id))
+        # Проверяем тело до того, как закрыть попытку билета
+        submitted_answers = request.data.get('answers') or {}
+        if not isinstance(submitted_answers, dict):
+            return Response({'error': 'Ответы должны быть объектом {id вопроса: id ответа}'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-                if submitted_answer_id and int(submitted_answer_id) == correct_answer_id:
-                    score += 1
+        write_behind = getattr(settings, 'AUTOSCHOOL_RESULT_WRITE_BEHIND', False)
+        attempt_id = request.data.get('attempt')
+        # Попытка закрывается вместе с сохранением результата: если проверка или запись
+        # упадут, попытку можно будет сдать повторно
+        with transaction.atomic():
+            if attempt_id is not None or test.ticket_size:
+                # Билет проверяется только по своим вопросам; попытку можно сдать один раз
+                attempt = TestAttempt.objects.filter(
+                    pk=attempt_id if str(attempt_id).isdigit() else None,
+                    test=test, student=student, submitted_at__isnull=True
+                ).only('id', 'question_ids', 'version').first()
+                if attempt is None or not TestAttempt.objects.filter(
+                        pk=attempt.pk, submitted_at__isnull=True).update(submitted_at=timezone.now()):
+                    return Response({'error': 'Попытка не найдена или уже завершена'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                answer_key = get_ticket_answer_key(test, attempt.question_ids, attempt.version_id)
+                version_id = attempt.version_id
+            else:
+                # Проверка ответов по закэшированному ключу опубликованной версии или черновика
+                answer_key = get_test_answer_key(test)
+                version_id = test.published_version_id
+
+            score, max_score, responses = grade(answer_key, submitted_answers)
+
+            # Сохранение результата
+            test_result = TestResult(
+                test=test,
+                student=student,
+                score=score,
+                max_score=max_score,
+                version_id=version_id
+            )
+            test_result.responses = responses
+            if not write_behind:
+                save_results([test_result])
 
-        # Сохранение результата
-        test_result = TestResult.objects.create(
-            test=test,
-            student=student,
-            score=score,
-            max_score=max_score
-        )
+        if write_behind:
+            # Результат ещё в очереди записи: id у него появится только после сброса
+            result_queue.enqueue(test_result)
+            data = TestResultSerializer(test_result).data
+            del data['id']
+            return Response(data, status=status.HTTP_202_ACCEPTED)
 
         serializer = TestResultSerializer(test_result)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def submit_batch(self, request):
+        test_id = request.data.get('test')
+        submissions = request.data.get('submissions')
+
+        if not test_id or not isinstance(submissions, list) or not submissions:
+            return Response({'error': 'Нужно указать ID теста и список ответов курсантов'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not str(test_id).isdigit():
+            return Response({'error': 'Некорректный ID теста'}, status=status.HTTP_400_BAD_REQUEST)
+
+        test = get_object_or_404(self.get_queryset(), pk=test_id)
+
+        student_ids = set()
+        duplicates = set()
+        for submission in submissions:
+            try:
+                student_id = int(submission.get('student_id'))
+            except (AttributeError, TypeError, ValueError):
+                return Response({'error': 'У каждой записи должен быть student_id'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if student_id in student_ids:
+                duplicates.add(student_id)
+            student_ids.add(student_id)
+        if duplicates:
+            return Response({'error': 'Каждый курсант может быть указан только в одной записи',
+                             'student_ids': sorted(duplicates)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Курсанты, которым тест назначен через их группы, одним запросом
+        allowed_ids = set(
+            StudentGroup.objects.filter(
+                student_id__in=student_ids,
+                student__user_type='student',
+                group__tests=test
+            ).values_list('student_id', flat=True)
+        )
 
-class TestResultViewSet(viewsets.ReadOnlyModelViewSet):
+        # Для билетов у каждой записи должна быть своя незавершённая попытка
+        attempts = {}
+        if test.ticket_size:
+            attempt_ids = [submission.get('attempt') for submission in submissions]
+            attempts = TestAttempt.objects.filter(
+                pk__in=[value for value in attempt_ids if str(value).isdigit()],
+                test=test, submitted_at__isnull=True
+            ).only('id', 'student_id', 'question_ids', 'version').in_bulk()
+        else:
+            answer_key = get_test_answer_key(test)
+            version_id = test.published_version_id
+
+        results = []
+        report = []
+        # id попытки -> результат, который по ней проверен
+        submitted_attempts = {}
+        for submission in submissions:
+            student_id = int(submission['student_id'])
+            if student_id not in allowed_ids:
+                report.append({'student_id': student_id,
+                               'error': 'Курсант не найден или тест ему не назначен'})
+                continue
+            answers = submission.get('answers') or {}
+            if not isinstance(answers, dict):
+                report.append({'student_id': student_id,
+                               'error': 'Ответы должны быть объектом {id вопроса: id ответа}'})
+                continue
+            if test.ticket_size:
+                attempt = attempts.pop(int(submission['attempt']), None) \
+                    if str(submission.get('attempt')).isdigit() else None
+                if attempt is None or attempt.student_id != student_id:
+                    report.append({'student_id': student_id,
+                                   'error': 'Попытка не найдена или уже завершена'})
+                    continue
+                answer_key = get_ticket_answer_key(test, attempt.question_ids, attempt.version_id)
+                version_id = attempt.version_id
+            score, max_score, responses = grade(answer_key, answers)
+            result = TestResult(test=test, student_id=student_id,
+                                score=score, max_score=max_score, version_id=version_id)
+            result.responses = responses
+            results.append(result)
+            report.append(result)
+            if test.ticket_size:
+                submitted_attempts[attempt.pk] = result
+
+        with transaction.atomic():
+            if submitted_attempts:
+                # Параллельный запрос мог уже сдать те же попытки: сохраняем только
+                # результаты по попыткам, которые закрыл этот запрос
+                claimed = set(
+                    TestAttempt.objects.select_for_update()
+                    .filter(pk__in=submitted_attempts, submitted_at__isnull=True)
+                    .values_list('pk', flat=True)
+                )
+                TestAttempt.objects.filter(pk__in=claimed).update(submitted_at=timezone.now())
+                lost = {id(submitted_attempts[pk]) for pk in submitted_attempts.keys() - claimed}
+                results = [result for result in results if id(result) not in lost]
+                report = [
+                    {'student_id': item.student_id, 'error': 'Попытка не найдена или уже завершена'}
+                    if id(item) in lost else item
+                    for item in report
+                ]
+            save_results(results)
+
+        data = [
+            item if isinstance(item, dict) else TestResultSerializer(item).data
+            for item in report
+        ]
+        return Response({'results': data}, status=status.HTTP_201_CREATED)
+
+
+class TestResultViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = TestResult.objects.all()
     serializer_class = TestResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TestResultPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -247,4 +592,137 @@ class TestResultViewSet(viewsets.ReadOnlyModelViewSet):
                 test__groups__instructor=user
             ).distinct()
 
-        return super().get_queryset()
\ No newline at end of file
+        return super().get_queryset()
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # file_format, а не format: format зарезервирован DRF для выбора рендерера
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'Формат выгрузки должен быть csv или ndjson'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        for param, lookup in (('date_from', 'gte'), ('date_to', 'lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                day = parse_date(value)
+                moment = parse_datetime(value) if day is None else None
+            except ValueError:
+                # Формат верный, но такой даты нет (например, 2024-02-30)
+                day = moment = None
+            if day is not None:
+                # Границы дня — диапазоном по самому столбцу, чтобы работал индекс (date_taken, id)
+                moment = timezone.make_aware(datetime.combine(day, time.min))
+                if lookup == 'lte':
+                    moment, lookup = moment + timedelta(days=1), 'lt'
+            elif moment is None:
+                return Response({'error': f'Некорректная дата в параметре {param}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            elif timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            queryset = queryset.filter(**{f'date_taken__{lookup}': moment})
+
+        if file_format == 'csv':
+            response = StreamingHttpResponse(stream_csv(queryset), content_type='text/csv; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(stream_ndjson(queryset), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="results.{file_format}"'
+        return response
+
+
+class AnalyticsViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    """Базовый класс для сводной аналитики: чтение только из таблиц-агрегатов."""
+    permission_classes = [IsAdminOrInstructor]
+    pagination_class = IdPagination
+    filter_params = ('test',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param in self.filter_params:
+            value = self.request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise ParseError({'error': f'{param} должен быть числом'})
+                queryset = queryset.filter(**{f'{param}_id': value})
+        return queryset
+
+
+class TestStatsViewSet(AnalyticsViewSet):
+    queryset = TestStats.objects.all()
+    serializer_class = TestStatsSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.user_type == 'instructor':
+            queryset = queryset.filter(test__groups__instructor=self.request.user).distinct()
+        return queryset
+
+
+class GroupTestStatsViewSet(AnalyticsViewSet):
+    queryset = GroupTestStats.objects.all()
+    serializer_class = GroupTestStatsSerializer
+    filter_params = ('test', 'group')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.user_type == 'instructor':
+            queryset = queryset.filter(group__instructor=self.request.user)
+        return queryset
+
+
+class StudentTestStatsViewSet(AnalyticsViewSet):
+    queryset = StudentTestStats.objects.all()
+    serializer_class = StudentTestStatsSerializer
+    filter_params = ('test', 'student')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.user_type == 'instructor':
+            queryset = queryset.filter(
+                student__student_groups__group__instructor=self.request.user
+            ).distinct()
+        return queryset
+
+
+
+class SearchViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def list(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Нужно указать строку поиска q'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        if any(kind not in ('lecture', 'question', 'answer') for kind in kinds):
+            return Response({'error': 'type может быть lecture, question или answer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        student = request.user if request.user.user_type == 'student' else None
+        hits = get_search_backend().search(query, student=student, kinds=kinds, limit=max(limit, 1))
+        return Response({'results': hits})
+
+
+class MeViewSet(viewsets.ViewSet):
+    """Данные текущего курсанта одним запросом."""
+    permission_classes = [IsStudentUser]
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        # Группы, лекции, ожидающие тесты и последние результаты — из кэша по версиям
+        versions = dashboard_versions(request.user.pk)
+        etag = make_etag(request, 'dashboard', *versions)
+        last_modified = max(versions) / 1e9
+        if not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(get_dashboard(request.user, versions), content_type='application/json')
+        return set_validators(response, etag, last_modified)
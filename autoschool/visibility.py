@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .conditional import bump_collection, bump_users
+from .models import ContentVisibility, Lecture, StudentGroup, Test
+
+# Модель -> related_name её связи groups со стороны DriverGroup
+VISIBLE_MODELS = {
+    Lecture: 'lectures',
+    Test: 'tests',
+}
+
+BATCH_SIZE = 1000
+
+_state = threading.local()
+
+
+def visible_ids(student, model):
+    """Подзапрос id объектов модели, видимых курсанту."""
+    return ContentVisibility.objects.filter(
+        student=student,
+        content_type=ContentType.objects.get_for_model(model)
+    ).values('object_id')
+
+
+def _pairs(model, **filters):
+    related = VISIBLE_MODELS[model]
+    return StudentGroup.objects.filter(
+        **{f'group__{related}__isnull': False}, **filters
+    ).values_list('student_id', f'group__{related}').distinct()
+
+
+def _insert(model, pairs):
+    content_type = ContentType.objects.get_for_model(model)
+    ContentVisibility.objects.bulk_create(
+        (ContentVisibility(student_id=student_id, content_type=content_type, object_id=object_id)
+         for student_id, object_id in pairs.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+@contextmanager
+def deferred_refresh():
+    """Копит пересчёты по курсантам внутри блока и выполняет их один раз в конце.
+
+    Нужен массовым операциям, где сигналы StudentGroup срабатывают на каждую строку.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = set()
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    refresh_students(pending)
+
+
+def refresh_students(student_ids):
+    """Пересчитывает видимость для курсантов (после изменения их групп)."""
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.update(student_ids)
+        return
+    student_ids = list(student_ids)
+    if not student_ids:
+        return
+    with transaction.atomic():
+        ContentVisibility.objects.filter(student_id__in=student_ids).delete()
+        for model in VISIBLE_MODELS:
+            _insert(model, _pairs(model, student_id__in=student_ids))
+    bump_users(student_ids)
+
+
+def refresh_objects(model, object_ids):
+    """Пересчитывает видимость лекций или тестов (после изменения их групп)."""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    related = VISIBLE_MODELS[model]
+    with transaction.atomic():
+        drop_objects(model, object_ids)
+        _insert(model, _pairs(model, **{f'group__{related}__in': object_ids}))
+
+
+def drop_objects(model, object_ids):
+    ContentVisibility.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id__in=list(object_ids)
+    ).delete()
+
+
+def rebuild():
+    with transaction.atomic():
+        ContentVisibility.objects.all().delete()
+        for model in VISIBLE_MODELS:
+            _insert(model, _pairs(model))
+            bump_collection(model)
+    return ContentVisibility.objects.count()
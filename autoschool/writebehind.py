@@ -0,0 +1,71 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from .grading import save_results
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWriteQueue:
+    """Буфер отложенной записи результатов тестов.
+
+    Результаты копятся в памяти и сбрасываются одной пачкой через
+    save_results, когда набирается batch_size записей или проходит
+    flush_interval секунд с первой записи в буфере. При обычном завершении
+    процесса буфер сбрасывается через atexit; если процесс убит (SIGKILL,
+    OOM), результаты из буфера теряются.
+    """
+
+    def __init__(self, batch_size=50, flush_interval=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def enqueue(self, result):
+        with self._lock:
+            self._pending.append(result)
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self._flush_in_background)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            save_results(batch)
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            save_results(batch)
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Не удалось сохранить пачку результатов тестов')
+        finally:
+            # У потока таймера своё соединение с БД, его нужно закрыть
+            connections.close_all()
+
+
+result_queue = ResultWriteQueue(
+    batch_size=getattr(settings, 'AUTOSCHOOL_RESULT_BATCH_SIZE', 50),
+    flush_interval=getattr(settings, 'AUTOSCHOOL_RESULT_FLUSH_INTERVAL', 0.5),
+)
+atexit.register(result_queue.flush)
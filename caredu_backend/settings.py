@@ -42,8 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'autoschool.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'autoschool.database.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -80,24 +82,131 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            # Сколько секунд ждать освобождения блокировки вместо "database is locked"
+            'timeout': 20,
+            # Транзакция сразу берёт блокировку записи: без взаимоблокировок при её повышении
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Реплика для чтения, например копия файла, которую поддерживает litestream:
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.sqlite3',
+    #     'NAME': BASE_DIR / 'replica.sqlite3',
+    #     'OPTIONS': {'timeout': 20},
+    #     'CONN_MAX_AGE': 600,
+    #     'CONN_HEALTH_CHECKS': True,
+    #     'TEST': {'MIRROR': 'default'},
+    # },
+}
+
+DATABASE_ROUTERS = ['autoschool.database.ReplicaRouter']
+
+# Общий для всех воркеров кэш: в нём версии коллекций, готовые ответы и закрепление
+# клиентов за основной базой. Кэш в памяти процесса (LocMemCache) для этого не подходит —
+# каждый воркер видел бы свои версии. Таблицу создаёт миграция autoschool 0013; при
+# наличии Redis его можно подставить сюда же (django.core.cache.backends.redis.RedisCache).
+# Версии отдельных курсантов хранятся не здесь, а в UserVersion
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'autoschool_cache',
+        'OPTIONS': {
+            # Версии хранятся без срока и не должны вытесняться кэшем представлений
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+# PRAGMA для каждого подключения к SQLite (autoschool.database)
+AUTOSCHOOL_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
+# Алиасы реплик из DATABASES для GET-запросов; пустой список — всё идёт в default.
+# После успешной записи клиент читает с основной базы AUTOSCHOOL_DB_PIN_SECONDS секунд
+AUTOSCHOOL_DB_REPLICAS = []
+AUTOSCHOOL_DB_PIN_SECONDS = 5
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'autoschool.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'autoschool.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
 INSTALLED_APPS += ['rest_framework.authtoken']
 
+# Отложенная запись результатов тестов (autoschool.writebehind). submit_test
+# отвечает 202 без id результата; при аварийном завершении процесса
+# (SIGKILL, OOM) результаты, ещё не сброшенные из очереди, теряются
+AUTOSCHOOL_RESULT_WRITE_BEHIND = False
+AUTOSCHOOL_RESULT_BATCH_SIZE = 50
+AUTOSCHOOL_RESULT_FLUSH_INTERVAL = 0.5
+
+# Доля правильных ответов, при которой тест считается сданным (autoschool.analytics)
+AUTOSCHOOL_PASS_RATIO = 0.8
+
+# Массовый импорт пользователей: хэширование паролей в пуле процессов (autoschool.imports)
+AUTOSCHOOL_PASSWORD_HASH_WORKERS = None  # None — по числу ядер
+AUTOSCHOOL_PASSWORD_HASH_POOL_THRESHOLD = 8
+
+# Потоки фоновой обработки изображений лекций и вопросов (autoschool.images)
+AUTOSCHOOL_IMAGE_WORKERS = 2
+# Потоки, которыми импорт теста сохраняет изображения вопросов (autoschool.imports)
+AUTOSCHOOL_IMAGE_UPLOAD_WORKERS = 4
+
+# Реализация полнотекстового поиска (autoschool.search)
+AUTOSCHOOL_SEARCH_BACKEND = 'autoschool.search.SQLiteFTSBackend'
+
+# Кэш токенов (autoschool.authentication): LRU в процессе с TTL. Попадание сверяет
+# поколение пользователя с базой не чаще раза в CHECK_INTERVAL секунд — столько
+# отзыв токена или смена пароля идут до других процессов. SHARED_CACHE — алиас
+# из CACHES для второго уровня между процессами; имеет смысл для Redis, но не для
+# DatabaseCache, чтение из которого стоит столько же, сколько загрузка токена
+AUTOSCHOOL_TOKEN_CACHE_SIZE = 10000
+AUTOSCHOOL_TOKEN_CACHE_TTL = 60
+AUTOSCHOOL_TOKEN_CACHE_CHECK_INTERVAL = 5
+AUTOSCHOOL_TOKEN_SHARED_CACHE = None
+
+# Учёт SQL-запросов, времени сериализации и рендеринга в Server-Timing и логе
+# autoschool.instrumentation; медленные запросы и N+1 логируются с формами SQL
+AUTOSCHOOL_INSTRUMENTATION = True
+AUTOSCHOOL_SLOW_REQUEST_MS = 500
+AUTOSCHOOL_SLOW_REQUEST_SAMPLE_RATE = 0.1
+AUTOSCHOOL_N_PLUS_ONE_THRESHOLD = 5
+
+# Сколько рейтингов групп держать в памяти процесса (autoschool.leaderboard)
+AUTOSCHOOL_LEADERBOARD_CACHE_GROUPS = 1000
+AUTOSCHOOL_LEADERBOARD_MAX_LIMIT = 100
+
+# Сводка главного экрана курсанта /api/me/dashboard/ (autoschool.dashboard):
+# сколько лекций, тестов и результатов отдавать и сколько хранить в кэше
+AUTOSCHOOL_DASHBOARD_ITEMS = 20
+AUTOSCHOOL_DASHBOARD_CACHE_TIMEOUT = 60 * 60
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Префикс internal-location nginx для отдачи медиа через X-Accel-Redirect;
+# None — файлы отдаёт Django через FileResponse (autoschool.media)
+AUTOSCHOOL_MEDIA_ACCEL_REDIRECT = None
+
+# Пользователи приложения — autoschool.CustomUser: на него ссылаются права, токены и внешние ключи
+# (базы, созданные со ссылками на auth_user, переводит миграция autoschool 0015)
+AUTH_USER_MODEL = 'autoschool.CustomUser'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,13 +1,14 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from autoschool.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('autoschool.urls')),  # Подключаем URL-адреса из приложения autoschool
+    # Медиафайлы с ETag, Range и долгим кэшированием (в продакшене — через X-Accel-Redirect)
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
 ]
-
-# Добавляем обработку медиафайлов в режиме разработки
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file